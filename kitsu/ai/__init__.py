@@ -1,15 +1,31 @@
 """
 VTuber AI package root. Exposes core and utils modules for easier imports.
+Modules are imported on first access so `import ai` stays cheap.
 """
+import importlib
 
-from vtuber_ai.core import emotion, response_gen
-from vtuber_ai.utils import file_ops, text
 # from vtuber_ai.config.config import load_config  # Removed due to unresolved import
-from vtuber_ai.utils.text import clean_text
+
+_LAZY_MODULES = {
+    "emotion": "vtuber_ai.core.emotion",
+    "response_gen": "vtuber_ai.core.response_gen",
+    "file_ops": "vtuber_ai.utils.file_ops",
+    "text": "vtuber_ai.utils.text",
+}
 
 __all__ = [
     "emotion", "response_gen",
     "file_ops", "text", "clean_text"
 ]
 
-__version__ = "0.1.0"
\ No newline at end of file
+__version__ = "0.1.0"
+
+
+def __getattr__(name: str):
+    if name == "clean_text":
+        from vtuber_ai.utils.text import clean_text
+        return clean_text
+    module_name = _LAZY_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module(module_name)
@@ -0,0 +1,164 @@
+"""
+Content-addressed cache of synthesized audio for phrases the character repeats.
+
+Entries are keyed on the processed text plus every voice parameter that changes
+the waveform. The in-memory tier is an LRU bounded by bytes; the optional disk
+tier stores float16 .npz files so catchphrases survive restarts.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import logging
+
+import numpy as np
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[1]
+
+
+def normalize_cache_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return " ".join(text.split())
+
+
+class AudioCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[Path] = None,
+        max_text_chars: int = 80,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_text_chars = max_text_chars
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, speaker: str, pitch: float, rate: float, model: str) -> str:
+        raw = "\x1f".join([normalize_cache_text(text), speaker, f"{pitch:.4f}", f"{rate:.4f}", model])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def should_cache(self, text: str) -> bool:
+        """Only short phrases are worth caching; long sentences rarely repeat."""
+        return len(normalize_cache_text(text)) <= self.max_text_chars
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return audio
+        audio = self._load_from_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, audio)
+        return audio
+
+    def put(self, key: str, audio: np.ndarray) -> None:
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        audio.flags.writeable = False  # shared with the player; never mutate
+        with self._lock:
+            self._insert(key, audio)
+        self._save_to_disk(key, audio)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _insert(self, key: str, audio: np.ndarray) -> None:
+        if audio.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = audio
+        self._bytes += audio.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.disk_dir / f"{key}.npz" if self.disk_dir is not None else None
+
+    def _load_from_disk(self, key: str) -> Optional[np.ndarray]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                audio = data["audio"].astype(np.float32)
+            audio.flags.writeable = False
+            return audio
+        except Exception as e:
+            logger.warning(f"[AudioCache] Dropping unreadable cache file {path}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _save_to_disk(self, key: str, audio: np.ndarray) -> None:
+        path = self._disk_path(key)
+        if path is None or path.exists():
+            return
+        tmp_path = path.with_suffix(".tmp.npz")
+        try:
+            np.savez_compressed(tmp_path, audio=audio.astype(np.float16))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"[AudioCache] Could not write {path}: {e}")
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> Optional[AudioCache]:
+    """
+    Return the shared audio cache configured by AUDIO_CACHE, or None if disabled.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = Config.get("AUDIO_CACHE", {}, warn=False)
+            if not settings.get("enabled", True):
+                return None
+            disk_dir = settings.get("disk_dir")
+            if disk_dir and not os.path.isabs(disk_dir):
+                disk_dir = KITSU_DIR / disk_dir
+            _cache = AudioCache(
+                max_bytes=int(settings.get("max_bytes", 64 * 1024 * 1024)),
+                disk_dir=disk_dir,
+                max_text_chars=int(settings.get("max_text_chars", 80)),
+            )
+        return _cache
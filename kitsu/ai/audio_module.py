@@ -1,41 +1,367 @@
-import sounddevice as sd
-import numpy as np
+"""
+Callback-driven audio output.
+
+Synthesized chunks are copied into a preallocated float32 ring buffer and
+PortAudio pulls from it in its own callback, so there is no polling thread and
+no gap while one blocking write finishes and the next chunk is fetched.
+
+Playback waits until prebuffer_ms of audio is queued (or the queued audio has
+waited that long, or the producer calls flush) before it starts, which absorbs
+jitter in how fast chunks arrive. The last crossfade_ms of every chunk is held
+back and overlapped with the start of the next one, so chunk boundaries don't
+click. If the buffer runs dry mid-utterance, that is counted and timestamped as
+an underrun, and playback goes back to prebuffering.
+
+The output device stays open across chunks and is only reopened when a chunk
+arrives with a different sample rate or channel count.
+
+Chunks enqueued with a tag are followed through the buffer: when the callback
+plays a tagged chunk's last frame it notes the perf_counter times its first and
+last frames reach the speaker, and a reporter thread passes them on to
+on_playback(tag, start, end). The callback itself never calls out, so a slow
+on_playback (or a lock it takes) can't stall the audio thread.
+"""
+from collections import deque
+from typing import Any, Callable, Optional
 import threading
-import queue
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+UNDERRUN_HISTORY = 100
+# Finished tagged chunks waiting for the reporter thread, and how often it runs
+PLAYBACK_REPORT_BACKLOG = 256
+PLAYBACK_REPORT_INTERVAL_S = 0.05
+# How long a format change waits for the old audio to finish playing
+DRAIN_TIMEOUT_S = 30.0
+
+
+class AudioRingBuffer:
+    """Fixed-capacity FIFO of (frames, channels) float32 audio. Not thread-safe on its own."""
+
+    def __init__(self, capacity: int, channels: int):
+        self._data = np.zeros((max(capacity, 1), channels), dtype=np.float32)
+        self._read = 0
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.size
+
+    def write(self, frames: np.ndarray) -> int:
+        """Copy as many frames as fit; returns how many were written."""
+        n = min(len(frames), self.free)
+        start = (self._read + self.size) % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = frames[:first]
+        self._data[:n - first] = frames[first:n]
+        self.size += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to len(out) frames into out; returns how many were read."""
+        n = min(len(out), self.size)
+        first = min(n, self.capacity - self._read)
+        out[:first] = self._data[self._read:self._read + first]
+        out[first:n] = self._data[:n - first]
+        self._read = (self._read + n) % self.capacity
+        self.size -= n
+        return n
+
+    def clear(self) -> None:
+        self._read = 0
+        self.size = 0
+
 
 class StreamingAudioPlayer:
-    def __init__(self, sample_rate=24000, channels=1):
+    def __init__(
+        self,
+        sample_rate: int = 22050,
+        channels: int = 1,
+        prebuffer_ms: float = 150,
+        crossfade_ms: float = 5,
+        buffer_seconds: float = 30,
+        blocksize: int = 0,
+        latency="low",
+    ):
         self.sample_rate = sample_rate
         self.channels = channels
-        self.audio_queue = queue.Queue()
-        self.playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
+        self.prebuffer_s = prebuffer_ms / 1000
+        self.crossfade_s = crossfade_ms / 1000
+        self.buffer_seconds = buffer_seconds
+        self.blocksize = blocksize
+        self.latency = latency
         self.playing = False
+        self.underruns = 0
+        self.underrun_times: deque[float] = deque(maxlen=UNDERRUN_HISTORY)
+        self.device_underflows = 0
+        self.on_playback: Optional[Callable[[Any, float, float], None]] = None
+        # (tag, start, end) appended by the callback, drained by report_playback
+        self._playback_reports: deque[tuple] = deque(maxlen=PLAYBACK_REPORT_BACKLOG)
+        self._report_lock = threading.Lock()
+        self._reporter: Optional[threading.Thread] = None
+        self._reporter_stop = threading.Event()
+        self._logged_underruns = 0
+        self._stream = None
+        self._output_latency = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # keeps concurrent enqueues from interleaving
+        self._configure(sample_rate, channels)
+
+    def _configure(self, sample_rate: int, channels: int) -> None:
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._ring = AudioRingBuffer(int(self.buffer_seconds * sample_rate), channels)
+        self._prebuffer_frames = int(self.prebuffer_s * sample_rate)
+        fade = int(self.crossfade_s * sample_rate)
+        # Equal-power ramps: consecutive TTS chunks are uncorrelated
+        ramp = np.linspace(0.0, np.pi / 2, fade, dtype=np.float32).reshape(-1, 1)
+        self._fade_in = np.sin(ramp)
+        self._fade_out = np.cos(ramp)
+        self._tail: Optional[np.ndarray] = None
+        self._buffering = True
+        self._buffering_since: Optional[float] = None
+        self._flushed = False
+        # Frames handed to / played from the buffer, and [start, end, tag, started_at] of tagged chunks
+        self._written = 0
+        self._played = 0
+        self._markers: deque[list] = deque()
+
+    @property
+    def queued_seconds(self) -> float:
+        """Audio waiting to be played, in seconds."""
+        with self._cond:
+            return self._queued_frames() / self.sample_rate
+
+    def _queued_frames(self) -> int:
+        return self._ring.size + (len(self._tail) if self._tail is not None else 0)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued_s": self._queued_frames() / self.sample_rate,
+                "buffering": self._buffering,
+                "underruns": self.underruns,
+                "last_underrun": self.underrun_times[-1] if self.underrun_times else None,
+                "device_underflows": self.device_underflows,
+                "sample_rate": self.sample_rate,
+                "channels": self.channels,
+            }
 
     def start(self):
         if not self.playing:
+            self._open()
             self.playing = True
-            self.playback_thread.start()
+            self._reporter_stop.clear()
+            self._reporter = threading.Thread(target=self._run_reporter, name="audio-playback-report", daemon=True)
+            self._reporter.start()
 
     def stop(self):
         self.playing = False
+        self._close()
+        if self._reporter is not None:
+            self._reporter_stop.set()
+            self._reporter.join()
+            self._reporter = None
+        self.report_playback()
+        with self._cond:
+            self._ring.clear()
+            self._tail = None
+            self._markers.clear()
+            self._cond.notify_all()
+
+    def _run_reporter(self) -> None:
+        while not self._reporter_stop.wait(PLAYBACK_REPORT_INTERVAL_S):
+            self.report_playback()
+
+    def report_playback(self) -> None:
+        """Pass the chunks the callback finished playing since the last call on to on_playback."""
+        with self._report_lock:
+            while self._playback_reports:
+                tag, start, end = self._playback_reports.popleft()
+                if self.on_playback is not None:
+                    try:
+                        self.on_playback(tag, start, end)
+                    except Exception as e:
+                        logger.error(f"[Audio] Playback report failed: {e}")
+
+    def _open(self) -> None:
+        import sounddevice as sd  # loads PortAudio; deferred until playback starts
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="float32",
+            blocksize=self.blocksize,
+            latency=self.latency,
+            callback=self._callback,
+        )
+        self._stream.start()
+        self._output_latency = float(self._stream.latency)
+        logger.info(f"[Audio] Output open at {self.sample_rate} Hz, {self.channels} channel(s)")
 
-    def enqueue(self, audio_chunk: np.ndarray):
+    def _close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _reopen(self, sample_rate: int, channels: int) -> None:
+        """Let queued audio finish at the old format, then reopen the device at the new one."""
+        self.flush()
+        with self._cond:
+            self._cond.wait_for(lambda: self._queued_frames() == 0 or not self.playing, DRAIN_TIMEOUT_S)
+        logger.info(
+            f"[Audio] Format changed from {self.sample_rate} Hz/{self.channels}ch "
+            f"to {sample_rate} Hz/{channels}ch, reopening output"
+        )
+        playing = self.playing
+        self._close()
+        with self._cond:
+            self._configure(sample_rate, channels)
+        if playing:
+            self._open()
+
+    def enqueue(self, audio_chunk: np.ndarray, sample_rate: Optional[int] = None, tag: Any = None):
         """
-        Add a chunk of audio samples (numpy array) to the playback queue.
+        Add a chunk of audio samples (numpy array) to the playback buffer.
+        Blocks only while the ring buffer is full. Pass sample_rate when the
+        chunk's rate may differ from the device's, and a tag to have its
+        playback reported to on_playback.
         """
-        self.audio_queue.put(audio_chunk)
+        if audio_chunk.dtype != np.float32:
+            audio_chunk = audio_chunk.astype(np.float32)
+        if audio_chunk.ndim == 1:
+            audio_chunk = audio_chunk.reshape(-1, 1)
+        if len(audio_chunk) == 0:
+            return
+        with self._write_lock:
+            rate = sample_rate or self.sample_rate
+            if rate != self.sample_rate or audio_chunk.shape[1] != self.channels:
+                self._reopen(rate, audio_chunk.shape[1])
+            with self._cond:
+                self._flushed = False
+                body, lead, tail = self._crossfade(audio_chunk)
+                start = self._written + lead
+                self._written += len(body)
+                if tag is not None:
+                    held = len(tail) if tail is not None else 0
+                    self._markers.append([start, self._written + held, tag, None])
+            # The new tail is only held once the body is in the ring; held earlier,
+            # a callback draining the ring meanwhile would play it before the body
+            if self._write(body):
+                with self._cond:
+                    self._tail = tail
+        self._log_underruns()
 
-    def _playback_worker(self):
+    def _crossfade(self, chunk: np.ndarray) -> tuple[np.ndarray, int, Optional[np.ndarray]]:
+        """
+        Overlap the held tail of the previous chunk with the head of this one.
+        Returns what is ready to be buffered, how many of its leading frames
+        still belong to the previous chunk, and this chunk's own tail to hold
+        back (None if it is too short to fade). Called with the lock held.
         """
-        Worker thread to continuously pull audio chunks and play them.
+        fade = len(self._fade_in)
+        tail, self._tail = self._tail, None
+        if fade == 0 or len(chunk) < 2 * fade:
+            if tail is not None:
+                return np.concatenate([tail, chunk]), len(tail), None
+            return chunk, 0, None
+        if tail is not None:
+            head = tail * self._fade_out + chunk[:fade] * self._fade_in
+            body = np.concatenate([head, chunk[fade:-fade]])
+        else:
+            body = chunk[:-fade]
+        return body, 0, chunk[-fade:]
+
+    def _write(self, frames: np.ndarray) -> bool:
+        """Copy frames into the ring, waiting for room. Returns False if the output stopped first."""
+        written = 0
+        while written < len(frames):
+            with self._cond:
+                self._cond.wait_for(lambda: self._ring.free > 0 or not self.playing)
+                if not self.playing:
+                    logger.warning("[Audio] Output is not running; dropping audio")
+                    return False
+                written += self._ring.write(frames[written:])
+                if self._buffering and self._buffering_since is None:
+                    self._buffering_since = time.monotonic()
+        return True
+
+    def flush(self) -> None:
         """
-        with sd.OutputStream(samplerate=self.sample_rate, channels=self.channels, dtype='float32') as stream:
-            while self.playing:
-                try:
-                    chunk = self.audio_queue.get(timeout=0.1)
-                    if chunk.dtype != np.float32:
-                        chunk = chunk.astype(np.float32)
-                    stream.write(chunk)
-                    self.audio_queue.task_done()
-                except queue.Empty:
-                    continue
+        Mark the end of an utterance: the held tail is buffered, playback starts
+        even below the prebuffer target, and running dry is not an underrun.
+        """
+        with self._cond:
+            if self._tail is not None and self._ring.free >= len(self._tail):
+                self._ring.write(self._tail)
+                self._written += len(self._tail)
+                self._tail = None
+            self._flushed = True
+
+    def _log_underruns(self) -> None:
+        # Logging from the PortAudio callback could itself cause underruns, so report here
+        if self.underruns != self._logged_underruns:
+            new = self.underruns - self._logged_underruns
+            self._logged_underruns = self.underruns
+            logger.warning(f"[Audio] {new} buffer underrun(s), {self.underruns} total")
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.device_underflows += 1
+        with self._cond:
+            if self._buffering:
+                waited = self._buffering_since is not None and (
+                    time.monotonic() - self._buffering_since >= self.prebuffer_s
+                )
+                if self._queued_frames() and (
+                    self._queued_frames() >= self._prebuffer_frames or self._flushed or waited
+                ):
+                    self._buffering = False
+                    self._buffering_since = None
+                else:
+                    outdata.fill(0)
+                    return
+            n = self._ring.read_into(outdata)
+            if n < frames and self._tail is not None:
+                # Nothing followed the last chunk in time; play its tail without a fade
+                take = min(frames - n, len(self._tail))
+                outdata[n:n + take] = self._tail[:take]
+                self._tail = self._tail[take:] if take < len(self._tail) else None
+                self._written += take
+                n += take
+            if self._markers and n:
+                self._advance_markers(n, time_info)
+            self._played += n
+            if n < frames:
+                outdata[n:] = 0
+                if not self._flushed:
+                    self.underruns += 1
+                    self.underrun_times.append(time.time())
+                self._buffering = True
+            self._cond.notify_all()
+
+    def _advance_markers(self, n: int, time_info) -> None:
+        """Timestamp tagged chunks whose first or last frame is in this block of n frames."""
+        try:
+            delay = time_info.outputBufferDacTime - time_info.currentTime
+        except AttributeError:
+            delay = 0.0
+        # Some host APIs leave the DAC time at 0; fall back to the latency the stream reported
+        block_start = time.perf_counter() + (delay if delay > 0 else self._output_latency)
+        played, end = self._played, self._played + n
+        while self._markers:
+            marker = self._markers[0]
+            if marker[3] is None and marker[0] < end:
+                marker[3] = block_start + max(marker[0] - played, 0) / self.sample_rate
+            if marker[1] > end:
+                break
+            self._markers.popleft()
+            finished = block_start + (marker[1] - played) / self.sample_rate
+            self._playback_reports.append((marker[2], marker[3] if marker[3] is not None else finished, finished))
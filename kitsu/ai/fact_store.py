@@ -0,0 +1,166 @@
+"""
+SQLite-backed store for the facts ConversationMemory keeps about viewers and
+the stream.
+
+Each add_fact is a single-row upsert committed on its own, so writing a fact
+costs the same no matter how many are stored. The database runs in WAL mode:
+a crash mid-write leaves the last committed state intact, and nothing is
+parsed up front at startup. Every fact carries created/updated timestamps and
+an access count. Accesses are tallied in memory and written in one
+transaction when the store is compacted, which also checkpoints the WAL and
+returns free pages to the filesystem. Compaction runs every COMPACT_EVERY
+writes and on exit.
+
+A legacy facts.json next to the database is imported once and renamed to
+facts.json.migrated.
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, Union
+import json
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPACT_EVERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    access_count INTEGER NOT NULL DEFAULT 0,
+    last_accessed REAL
+)
+"""
+_UPSERT = """
+INSERT INTO facts (key, value, created_at, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+"""
+
+
+class FactStore:
+    def __init__(self, path: Union[str, Path], legacy_json: Optional[Union[str, Path]] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect on a database without tables, i.e. on creation
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        # WAL + NORMAL: commits survive an application crash; only an OS crash can lose the last ones
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._accesses: Counter[str] = Counter()
+        self._writes = 0
+        if legacy_json is not None:
+            self._migrate(Path(legacy_json))
+
+    def _migrate(self, legacy_json: Path) -> None:
+        if not legacy_json.exists():
+            return
+        try:
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                facts = json.load(f)
+        except Exception as e:
+            logger.warning(f"[Facts] Could not read legacy {legacy_json}, leaving it in place: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Facts already in the database win over the legacy file
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO facts (key, value, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    [(str(k), str(v), now, now) for k, v in facts.items()],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        legacy_json.replace(legacy_json.with_name(legacy_json.name + ".migrated"))
+        logger.info(f"[Facts] Migrated {len(facts)} facts from {legacy_json} to {self.path}")
+
+    def upsert(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(_UPSERT, (key, value, now, now))
+            self._writes += 1
+            due = self._writes >= COMPACT_EVERY
+        if due:
+            self.compact()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM facts WHERE key = ?", (key,))
+            self._accesses.pop(key, None)
+            self._writes += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM facts")
+            self._accesses.clear()
+            self._writes += 1
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM facts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def all(self) -> dict[str, str]:
+        """Every fact, oldest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM facts ORDER BY created_at, rowid").fetchall()
+        return dict(rows)
+
+    def stats(self, key: str) -> Optional[dict]:
+        """Timestamps and access count of one fact (pending accesses included)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, access_count, last_accessed FROM facts WHERE key = ?", (key,)
+            ).fetchone()
+            pending = self._accesses.get(key, 0)
+        if row is None:
+            return None
+        return {"created_at": row[0], "updated_at": row[1], "access_count": row[2] + pending, "last_accessed": row[3]}
+
+    def touch(self, keys: Iterable[str]) -> None:
+        """Count an access of each key (e.g. the fact was put in a prompt). No I/O."""
+        with self._lock:
+            self._accesses.update(keys)
+
+    def _flush_accesses(self) -> None:
+        if not self._accesses:
+            return
+        now = time.time()
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "UPDATE facts SET access_count = access_count + ?, last_accessed = ? WHERE key = ?",
+                [(count, now, key) for key, count in self._accesses.items()],
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._accesses.clear()
+
+    def compact(self) -> None:
+        """Write pending access counts, fold the WAL into the database and release free pages."""
+        with self._lock:
+            try:
+                self._flush_accesses()
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.execute("PRAGMA incremental_vacuum").fetchall()  # frees pages as it is stepped
+                self._writes = 0
+            except sqlite3.Error as e:
+                logger.warning(f"[Facts] Compaction failed: {e}")
+
+    def close(self) -> None:
+        self.compact()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,417 @@
+"""
+Long-term conversational recall.
+
+Every past exchange (viewer message + reply) is embedded and kept in a
+VectorIndex on disk: a raw float32 matrix (float16 halves the file at some
+search cost) opened as a numpy memmap, with the snippet texts in a JSONL file
+alongside. For each new viewer message LongTermMemory.recall embeds the message
+and returns the top-k snippets by cosine similarity, computed as a single
+matrix-vector product over the normalized vectors.
+
+The index is bootstrapped from the legacy data/chat_log.txt and the JSONL
+transcripts in log order, so the same logs always produce the same index.
+After that it catches up on whatever the logs gained since the recorded byte
+offset and transcript timestamp. Live turns are appended as they happen.
+Snippets are keyed by a hash of their text, so a turn seen both live and in
+the log is stored once. All embedding work runs on a background thread. Until
+the bootstrap finishes, recall returns nothing instead of waiting.
+
+Embeddings come from a small sentence-transformers model on CPU. With
+"embedder": "hashing" (or if the model can't be loaded) a numpy-only hashed
+bag of words and character trigrams is used instead. The index records which
+embedder built it and is rebuilt from the log when that changes.
+"""
+from pathlib import Path
+from typing import Iterable, Optional
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+import logging
+
+import numpy as np
+
+from vtuber_ai.core.config_manager import Config
+from vtuber_ai.utils.file_ops import default_chat_log_path, read_chat_log
+from vtuber_ai.utils.transcript import read_transcripts
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_EMBEDDER = "sentence-transformers/all-MiniLM-L6-v2"
+HASHING_DIM = 384
+EMBED_BATCH = 32
+# float16 rows converted per block during search (about 3 MB of float32, cache friendly)
+SEARCH_BLOCK_ROWS = 2048
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def snippet_id(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+class HashingEmbedder:
+    """Deterministic hashed bag of words and character trigrams; no model download."""
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[int]:
+        features = []
+        for word in _WORD.findall(text.lower()):
+            features.append(zlib.crc32(word.encode("utf-8")))
+            padded = f"<{word}>"
+            features.extend(zlib.crc32(padded[i:i + 3].encode("utf-8")) for i in range(len(padded) - 2))
+        return features
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = np.asarray(self._features(text), dtype=np.uint64)
+            if features.size:
+                # The top hash bit picks the sign so collisions tend to cancel out
+                signs = np.where(features & 0x80000000, -1.0, 1.0).astype(np.float32)
+                np.add.at(out[row], (features % self.dim).astype(np.intp), signs)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+class SentenceEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.name = model_name
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=EMBED_BATCH, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32)
+
+
+def load_embedder(name: str):
+    if name == "hashing":
+        return HashingEmbedder()
+    try:
+        return SentenceEmbedder(name)
+    except Exception as e:
+        logger.warning(f"[LongTerm] Could not load embedding model '{name}', using hashing embedder: {e}")
+        return HashingEmbedder()
+
+
+class VectorIndex:
+    """
+    Append-only matrix of unit vectors (vectors.bin) with one JSON line per row
+    (snippets.jsonl) and a small header (index.json). Vectors are written before
+    their snippets and the header last, so after a crash the shorter of the two
+    files decides how many rows are valid.
+    """
+
+    def __init__(self, directory: Path, dim: int, embedder: str, dtype: str = "float32"):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.embedder = embedder
+        self.vectors_path = self.directory / "vectors.bin"
+        self.snippets_path = self.directory / "snippets.jsonl"
+        self.header_path = self.directory / "index.json"
+        self.texts: list[str] = []
+        self.ids: set[str] = set()
+        self.log_offset = 0
+        self.transcript_ts = 0.0  # timestamp of the last transcript record indexed
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.texts)
+
+    def _load(self) -> None:
+        header = {}
+        if self.header_path.exists():
+            try:
+                header = json.loads(self.header_path.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning(f"[LongTerm] Unreadable index header, rebuilding: {e}")
+        expected = {"embedder": self.embedder, "dim": self.dim, "dtype": self.dtype.name}
+        if any(header.get(key) != value for key, value in expected.items()):
+            if header:
+                logger.info(f"[LongTerm] Index was built with {header.get('embedder')}; rebuilding from the chat log")
+            self._reset()
+            return
+
+        if self.snippets_path.exists():
+            with open(self.snippets_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn last line
+                    self.texts.append(record["text"])
+                    self.ids.add(record["id"])
+        rows = self.vectors_path.stat().st_size // (self.dim * self.dtype.itemsize) if self.vectors_path.exists() else 0
+        valid = min(rows, len(self.texts))
+        if valid != rows or valid != len(self.texts):
+            logger.warning(f"[LongTerm] Repairing index after an interrupted write ({valid} valid rows)")
+            del self.texts[valid:]
+            self.ids = {snippet_id(text) for text in self.texts}
+            if self.vectors_path.exists():
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(valid * self.dim * self.dtype.itemsize)
+            self._rewrite_snippets()
+        self.log_offset = int(header.get("log_offset", 0))
+        self.transcript_ts = float(header.get("transcript_ts", 0.0))
+        self._remap()
+
+    def _reset(self) -> None:
+        self.texts, self.ids, self.log_offset, self.transcript_ts = [], set(), 0, 0.0
+        for path in (self.vectors_path, self.snippets_path):
+            path.unlink(missing_ok=True)
+        self._write_header()
+        self._remap()
+
+    def _rewrite_snippets(self) -> None:
+        tmp = self.snippets_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for text in self.texts:
+                f.write(json.dumps({"id": snippet_id(text), "text": text}, ensure_ascii=False) + "\n")
+        tmp.replace(self.snippets_path)
+
+    def _write_header(self) -> None:
+        header = {
+            "embedder": self.embedder, "dim": self.dim, "dtype": self.dtype.name,
+            "count": self.count, "log_offset": self.log_offset, "transcript_ts": self.transcript_ts,
+        }
+        tmp = self.header_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(header), encoding="utf-8")
+        tmp.replace(self.header_path)
+
+    def _remap(self) -> None:
+        matrix = None
+        if self.count:
+            matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+        with self._lock:
+            self._matrix = matrix
+
+    def append(
+        self, vectors: np.ndarray, texts: list[str],
+        log_offset: Optional[int] = None, transcript_ts: Optional[float] = None,
+    ) -> None:
+        """Append rows; vectors must be unit length. Called from one writer thread."""
+        if texts:
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.snippets_path, "a", encoding="utf-8") as f:
+                for text in texts:
+                    f.write(json.dumps({"id": snippet_id(text), "text": text}, ensure_ascii=False) + "\n")
+            self.ids.update(snippet_id(text) for text in texts)
+            self.texts.extend(texts)
+        if log_offset is not None:
+            self.log_offset = log_offset
+        if transcript_ts is not None:
+            self.transcript_ts = transcript_ts
+        self._write_header()
+        if texts:
+            self._remap()
+
+    def search(self, query: np.ndarray, k: int, rows: Optional[int] = None) -> list[tuple[float, int]]:
+        """Top-k (cosine score, row) over the first `rows` rows, best first."""
+        with self._lock:
+            matrix = self._matrix
+        if matrix is None or k <= 0:
+            return []
+        rows = matrix.shape[0] if rows is None else min(rows, matrix.shape[0])
+        if rows <= 0:
+            return []
+        query = query.astype(np.float32)
+        if matrix.dtype == np.float32:
+            scores = matrix[:rows] @ query
+        else:
+            # float16 halves the file but numpy has no fast half-precision matmul;
+            # convert cache-sized blocks into one reused float32 buffer
+            scores = np.empty(rows, dtype=np.float32)
+            block = np.empty((min(SEARCH_BLOCK_ROWS, rows), self.dim), dtype=np.float32)
+            for start in range(0, rows, SEARCH_BLOCK_ROWS):
+                stop = min(start + SEARCH_BLOCK_ROWS, rows)
+                block[:stop - start] = matrix[start:stop]
+                np.dot(block[:stop - start], query, out=scores[start:stop])
+        k = min(k, rows)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), int(i)) for i in top]
+
+
+class LongTermMemory:
+    def __init__(
+        self,
+        directory: Path,
+        embedder: str = DEFAULT_EMBEDDER,
+        dtype: str = "float32",
+        top_k: int = 3,
+        min_score: float = 0.3,
+        latency_budget_ms: float = 25.0,
+        max_snippet_chars: int = 500,
+        chat_log: Optional[str] = None,
+        transcript_dir: Optional[Path] = None,
+        ai_name: str = "Airi",
+    ):
+        self.directory = Path(directory)
+        self.embedder_name = embedder
+        self.dtype = dtype
+        self.top_k = top_k
+        self.min_score = min_score
+        self.latency_budget_ms = latency_budget_ms
+        self.max_snippet_chars = max_snippet_chars
+        self.chat_log = chat_log or default_chat_log_path()
+        self.transcript_dir = transcript_dir
+        self.ai_name = ai_name
+        self.embedder = None
+        self.index: Optional[VectorIndex] = None
+        self._session_start = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="long-term-memory", daemon=True)
+            self._thread.start()
+
+    def snippet(self, question: str, response: str) -> str:
+        text = f"User: {question.strip()}\n{self.ai_name}: {response.strip()}"
+        if len(text) > self.max_snippet_chars:
+            text = text[:self.max_snippet_chars].rsplit(" ", 1)[0] + "..."
+        return text
+
+    def add_turn(self, question: str, response: str) -> None:
+        """Queue a finished exchange for embedding. Never blocks on the model."""
+        if question.strip() and response.strip():
+            self._queue.put(self.snippet(question, response))
+
+    def _add(
+        self, texts: Iterable[str], log_offset: Optional[int] = None, transcript_ts: Optional[float] = None
+    ) -> int:
+        new, seen = [], set()
+        for text in texts:
+            key = snippet_id(text)
+            if key not in self.index.ids and key not in seen:
+                seen.add(key)
+                new.append(text)
+        vectors = self.embedder.encode(new) if new else np.zeros((0, self.index.dim), dtype=np.float32)
+        self.index.append(vectors, new, log_offset, transcript_ts)
+        return len(new)
+
+    def _catch_up(self) -> None:
+        """
+        Index exchanges logged since the last run: the legacy text log from its
+        recorded byte offset, then transcript records newer than the last one seen
+        (everything, on bootstrap).
+        """
+        start = self.index.log_offset
+        if os.path.exists(self.chat_log) and os.path.getsize(self.chat_log) < start:
+            start = 0  # the log was truncated or replaced
+        added = 0
+        batch, offset = [], None
+        for entry in read_chat_log(self.chat_log, start_offset=start):
+            batch.append(self.snippet(entry.question, entry.response))
+            offset = entry.end_offset
+            if len(batch) >= EMBED_BATCH:
+                added += self._add(batch, log_offset=offset)
+                batch = []
+        if batch or offset is not None:
+            added += self._add(batch, log_offset=offset)
+
+        batch, last_ts = [], None
+        since = self.index.transcript_ts
+        for record in read_transcripts(self.transcript_dir, since=since):
+            if record.get("ts", 0.0) <= since or not record.get("question") or not record.get("response"):
+                continue
+            batch.append(self.snippet(record["question"], record["response"]))
+            last_ts = record["ts"]
+            if len(batch) >= EMBED_BATCH:
+                added += self._add(batch, transcript_ts=last_ts)
+                batch = []
+        if batch or last_ts is not None:
+            added += self._add(batch, transcript_ts=last_ts)
+        if added:
+            logger.info(f"[LongTerm] Indexed {added} past exchanges from the logs ({self.index.count} total)")
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.embedder = load_embedder(self.embedder_name)
+            self.index = VectorIndex(self.directory, self.embedder.dim, self.embedder.name, self.dtype)
+            self._catch_up()
+        except Exception as e:
+            logger.error(f"[LongTerm] Long-term memory disabled: {e}")
+            return
+        # Rows from here on are this session's turns, which are still in short-term memory
+        self._session_start = self.index.count
+        self._ready.set()
+        logger.info(f"[LongTerm] Ready with {self.index.count} snippets in {time.perf_counter() - started:.2f}s")
+        while True:
+            text = self._queue.get()
+            texts = [text]
+            while not self._queue.empty():
+                texts.append(self._queue.get_nowait())
+            try:
+                self._add(texts)
+            except Exception as e:
+                logger.warning(f"[LongTerm] Could not index turn: {e}")
+
+    def recall(self, message: str, k: Optional[int] = None) -> list[str]:
+        """Most similar past exchanges (from before this session), best first; [] until ready."""
+        if not self.ready or not message.strip():
+            return []
+        start = time.perf_counter()
+        query = self.embedder.encode([message])[0]
+        hits = self.index.search(query, k or self.top_k, rows=self._session_start)
+        results = [self.index.texts[row] for score, row in hits if score >= self.min_score]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > self.latency_budget_ms:
+            logger.warning(f"[LongTerm] Recall took {elapsed_ms:.1f} ms (budget {self.latency_budget_ms:.0f} ms)")
+        else:
+            logger.debug(f"[LongTerm] Recalled {len(results)} snippets in {elapsed_ms:.1f} ms")
+        return results
+
+
+_long_term: Optional[LongTermMemory] = None
+_long_term_lock = threading.Lock()
+
+
+def get_long_term_memory() -> Optional[LongTermMemory]:
+    """Return the shared long-term memory configured by LONG_TERM_MEMORY (started), or None if disabled."""
+    global _long_term
+    with _long_term_lock:
+        if _long_term is None:
+            settings = Config.get("LONG_TERM_MEMORY", {}, warn=False)
+            if not settings.get("enabled", True):
+                return None
+            directory = Path(settings.get("dir", "data/long_term"))
+            if not directory.is_absolute():
+                directory = KITSU_DIR / directory
+            _long_term = LongTermMemory(
+                directory,
+                embedder=settings.get("embedder", DEFAULT_EMBEDDER),
+                dtype=settings.get("dtype", "float32"),
+                top_k=int(settings.get("top_k", 3)),
+                min_score=float(settings.get("min_score", 0.3)),
+                latency_budget_ms=float(settings.get("latency_budget_ms", 25.0)),
+                max_snippet_chars=int(settings.get("max_snippet_chars", 500)),
+            )
+            _long_term.start()
+        return _long_term
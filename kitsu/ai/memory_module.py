@@ -1,55 +1,98 @@
-import json
 import threading
 from collections import deque
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Iterable, Optional
 import logging
 
-logger = logging.getLogger(__name__)
+from ai.fact_store import FactStore
 
-# LangChain
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import Runnable
-from langchain_community.chat_models import ChatOllama
+logger = logging.getLogger(__name__)
 
 class ConversationMemory:
     def __init__(
         self,
         max_len: int = 6,
         save_path: str = "data/facts.json",
-        ai_name: str = "Kitsu.exe"
+        ai_name: str = "Kitsu.exe",
+        on_evict: Optional[Callable[[str], None]] = None
     ):
         self.memory = deque(maxlen=max_len)
         self.lock = threading.RLock()
         self.summary: str = ""
-        self.facts: Dict[str, str] = {}
+        # save_path names the legacy JSON file; facts now live in a SQLite database beside it
         self.save_path = Path(save_path)
+        self.fact_store = FactStore(self.save_path.with_suffix(".db"), legacy_json=self.save_path)
+        self._facts: Optional[Dict[str, str]] = None
         self.ai_name = ai_name
-        self.load_facts()
+        # Called (with the lock held, so it must not block) with each entry about to fall off the deque
+        self.on_evict = on_evict
 
-    def add_user(self, text: str) -> None:
+    def _append(self, entry: str) -> None:
         with self.lock:
-            self.memory.append(f"User: {text}")
+            if self.on_evict is not None and len(self.memory) == self.memory.maxlen:
+                self.on_evict(self.memory[0])
+            self.memory.append(entry)
+
+    def add_user(self, text: str) -> None:
+        self._append(f"User: {text}")
 
     def add_ai(self, text: str) -> None:
+        self._append(f"{self.ai_name}: {text}")
+
+    def turns(self) -> list[tuple[str, str]]:
+        """Recent memory as (role, text) pairs, role being "user" or "assistant"."""
+        user_prefix, ai_prefix = "User: ", f"{self.ai_name}: "
         with self.lock:
-            self.memory.append(f"{self.ai_name}: {text}")
+            entries = list(self.memory)
+        turns = []
+        for entry in entries:
+            if entry.startswith(user_prefix):
+                turns.append(("user", entry[len(user_prefix):]))
+            elif entry.startswith(ai_prefix):
+                turns.append(("assistant", entry[len(ai_prefix):]))
+            else:
+                turns.append(("user", entry))
+        return turns
 
     def set_summary(self, summary: str) -> None:
         """Sets a new summary (called after extracting <summary> from LLM)."""
         with self.lock:
             self.summary = summary.strip()
 
+    def replace_summary(self, expected: str, summary: str) -> bool:
+        """
+        Set a new summary only if the current one is still expected, i.e. nothing
+        replaced or cleared it while the new one was being generated.
+        """
+        with self.lock:
+            if self.summary != expected:
+                return False
+            self.summary = summary.strip()
+            return True
+
+    @property
+    def facts(self) -> Dict[str, str]:
+        """In-memory mirror of the fact store, read from the database on first use."""
+        with self.lock:
+            if self._facts is None:
+                self._facts = self.fact_store.all()
+            return self._facts
+
     def add_fact(self, key: str, value: str) -> None:
         with self.lock:
+            self.fact_store.upsert(key, value)
             self.facts[key] = value
 
+    def touch_facts(self, keys: Iterable[str]) -> None:
+        """Record that these facts were used (e.g. included in a prompt)."""
+        self.fact_store.touch(keys)
+
     def clear(self) -> None:
         with self.lock:
             self.memory.clear()
             self.summary = ""
-            self.facts.clear()
+            self.fact_store.clear()
+            self._facts = {}
             logger.info("Conversation memory cleared.")
 
     def get_prompt_context(self, personality_prompt: str = "") -> str:
@@ -77,39 +120,41 @@ class ConversationMemory:
             return "\n\n".join(parts)
 
     def save_facts(self) -> None:
-        try:
-            self.save_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.save_path, "w", encoding="utf-8") as f:
-                json.dump(self.facts, f, indent=2, ensure_ascii=False)
-            logger.debug(f"Facts saved to {self.save_path}")
-        except Exception as e:
-            logger.error(f"Failed to save facts: {e}")
+        """
+        Facts are committed as they are added; this writes pending access counts
+        and compacts the store (called on exit).
+        """
+        self.fact_store.compact()
+        logger.debug(f"Fact store compacted at {self.fact_store.path}")
 
     def load_facts(self) -> None:
-        if not self.save_path.exists():
-            return
-        try:
-            with open(self.save_path, "r", encoding="utf-8") as f:
-                self.facts = json.load(f)
-            logger.debug(f"Facts loaded from {self.save_path}")
-        except Exception as e:
-            logger.warning(f"Failed to load facts: {e}")
+        """Re-read the facts from the store."""
+        with self.lock:
+            self._facts = self.fact_store.all()
+        logger.debug(f"Facts loaded from {self.fact_store.path}")
 
     def summarize_with_langchain(self, llm=None) -> str:
         """Summarizes recent memory using LangChain + Ollama Mistral."""
+        # LangChain is only needed here, so it is not imported with the module
+        from langchain_core.prompts import PromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import Runnable
+        from langchain_community.chat_models import ChatOllama
+
+        # Snapshot under the lock; the LLM call itself runs without it
         with self.lock:
             if not self.memory:
                 return ""
+            recent_chat = "\n".join(self.memory)
 
-            if llm is None:
-                llm = ChatOllama(model="mistral", temperature=0.3)
+        if llm is None:
+            llm = ChatOllama(model="mistral", temperature=0.3)
 
-            prompt_template = PromptTemplate.from_template(
-                "Summarize the following conversation between User and {ai_name}:\n\n{chat}\n\nSummary:"
-            )
+        prompt_template = PromptTemplate.from_template(
+            "Summarize the following conversation between User and {ai_name}:\n\n{chat}\n\nSummary:"
+        )
 
-            chain: Runnable = prompt_template | llm | StrOutputParser()
-            recent_chat = "\n".join(self.memory)
-            summary = chain.invoke({"chat": recent_chat, "ai_name": self.ai_name})
-            self.set_summary(summary)
-            return summary
\ No newline at end of file
+        chain: Runnable = prompt_template | llm | StrOutputParser()
+        summary = chain.invoke({"chat": recent_chat, "ai_name": self.ai_name})
+        self.set_summary(summary)
+        return summary
\ No newline at end of file
@@ -1,21 +1,82 @@
-import pyphen
-from vtuber_ai.core.config_manager import Config
+"""
+Speech text utilities. Submodules are imported on first attribute access, so
+importing one helper (e.g. the segmenter) does not pull in the emotion model,
+langdetect or phonemizer.
+"""
+import importlib
 
-# Import all submodules for convenient access
-from .cleaning import *
-from .emotion import *
-from .language import *
-from .phonemes import *
-from .speech_style import *
-from .preprocessor import *
+from vtuber_ai.core.config_manager import Config
 
 # Config access
 VOICE_STYLE_DEFAULTS = Config.voice_style_defaults()
 PHONETIC_OVERRIDES = Config.phonetic_overrides()
 COMMON_ACTIONS = Config.commom_actions()
 
-# Optionally, load emoji speech map if needed by your submodules
-# from kitsu.config.config_emoji_speech_map import EMOJI_SPEECH_MAP
-# Or load here if you want a module-level cache
-# EMOJI_SPEECH_MAP = ...
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "remove_urls": "cleaning",
+    "remove_inline_code": "cleaning",
+    "remove_control_chars": "cleaning",
+    "clean_artifacts": "cleaning",
+    "load_emoji_speech_map": "cleaning",
+    "analyze_emotion": "emotion",
+    "add_emotion_to_file": "emotion",
+    "generate_response_again": "language",
+    "detect_and_translate_if_needed": "language",
+    "detect_language": "language",
+    "emphasize_syllables_portuguese": "phonemes",
+    "emphasize_syllables_english": "phonemes",
+    "emphasize_syllables_japanese": "phonemes",
+    "emphasize_syllables": "phonemes",
+    "prepare_phonemes": "phonemes",
+    "word_to_phonemes": "phonemes",
+    "safe_to_split": "phonemes",
+    "group_sentences": "phonemes",
+    "split_into_syllables": "phonemes",
+    "EMOJI_SPEECH_MAP": "speech_style",
+    "apply_intonation": "speech_style",
+    "adjust_tempo": "speech_style",
+    "emoji_to_speech": "speech_style",
+    "clean_tilde_tokens": "speech_style",
+    "apply_vowel_drag": "speech_style",
+    "remove_markers": "speech_style",
+    "adjust_pitch_rate": "speech_style",
+    "stretch_vowels": "speech_style",
+    "apply_consonant_strength": "speech_style",
+    "handle_emoji": "speech_style",
+    "interpret_actions": "speech_style",
+    "ensure_punctuation": "speech_style",
+    "apply_phonetic_overrides": "speech_style",
+    "PhoneticOverrideMatcher": "speech_style",
+    "get_override_matcher": "speech_style",
+    "preprocess_for_tts": "preprocessor",
+    "process_text_for_speech": "preprocessor",
+    "SPLIT_CHARS": "segmenter",
+    "CLAUSE_CHARS": "segmenter",
+    "SEGMENT_LOOKBEHIND": "segmenter",
+    "SEGMENT_LOOKAHEAD": "segmenter",
+    "StreamingSegmenter": "segmenter",
+    "PhonemeCache": "phonemizer_backend",
+    "PhonemizerBackends": "phonemizer_backend",
+    "get_phonemizer": "phonemizer_backend",
+    "EmojiRewriter": "emoji_rewriter",
+    "get_emoji_rewriter": "emoji_rewriter",
+    "drop_symbols": "emoji_rewriter",
+    "trie_pattern": "patterns",
+    "char_class": "patterns",
+}
+
+__all__ = ["VOICE_STYLE_DEFAULTS", "PHONETIC_OVERRIDES", "COMMON_ACTIONS", *_LAZY_EXPORTS]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
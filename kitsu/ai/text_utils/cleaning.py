@@ -1,16 +1,21 @@
 import os
 import re
 import json
-import unicodedata
+
+from .emoji_rewriter import drop_symbols
+
+_URLS = re.compile(r'https?://\S+')
+_INLINE_CODE = re.compile(r'`[^`]+`')
+_CONTROL_CHARS = re.compile(r'[\x00-\x1F\x7F]')
 
 def remove_urls(text: str) -> str:
-    return re.sub(r'https?://\S+', '[link]', text)
+    return _URLS.sub('[link]', text)
 
 def remove_inline_code(text: str) -> str:
-    return re.sub(r'`[^`]+`', '', text)
+    return _INLINE_CODE.sub('', text)
 
 def remove_control_chars(text: str) -> str:
-    return re.sub(r'[\x00-\x1F\x7F]', '', text)
+    return _CONTROL_CHARS.sub('', text)
 
 def clean_artifacts(text: str) -> str:
     """
@@ -25,14 +30,9 @@ def clean_artifacts(text: str) -> str:
     if text.strip() in [".", '"', "'", "…"]:
         return ""
 
-    # Remove non-speakable symbols (Unicode category "So", "Sm", "Sk", "Sm")
-    text = ''.join(
-        ch for ch in text
-        if unicodedata.category(ch) not in ("So", "Sm", "Sk")
-    )
-
-    # Optionally remove block/box drawing chars (like ┻━┻ ┬──┬)
-    text = re.sub(r"[\u2500-\u257F\u2580-\u259F\u25A0-\u25FF]+", "", text)
+    # Remove non-speakable symbols (Unicode "So", "Sm", "Sk") and box drawing
+    # chars (like ┻━┻ ┬──┬) through a precomputed translation table
+    text = drop_symbols(text)
 
     # Strip leading/trailing quotes, dots, ellipses
     text = text.strip().strip('".\'…').strip()
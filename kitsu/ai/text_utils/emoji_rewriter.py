@@ -0,0 +1,167 @@
+"""
+Single-pass emoji/symbol rewriting for TTS chunks.
+
+EmojiRewriter replaces every mapped emoji, kaomoji or :shortcode: and trims
+emoji from the edges of a chunk in one left-to-right regex scan. SYMBOL_TABLE
+is the str.translate table clean_artifacts uses to drop unspeakable symbol
+characters without a per-character unicodedata call.
+"""
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+import re
+import logging
+
+from vtuber_ai.core.config_manager import Config
+from .patterns import char_class, trie_pattern
+
+logger = logging.getLogger(__name__)
+
+# Unicode categories with nothing to pronounce (emoji, math and modifier symbols)
+DROPPED_CATEGORIES = frozenset(("So", "Sm", "Sk"))
+# Box drawing, block elements and geometric shapes (┻━┻ ┬──┬ ■)
+DROPPED_RANGES = ((0x2500, 0x257F), (0x2580, 0x259F), (0x25A0, 0x25FF))
+# Keycap sequences (1️⃣ #️⃣) are one unit: their ASCII base is not an emoji code
+# point, so without this the edge trim would strip the cap and leave the digit
+KEYCAP_PATTERN = "[#*0-9]\ufe0f?\u20e3"
+
+
+class _SymbolTable(dict):
+    """
+    str.translate table mapping dropped code points to None. Decisions are
+    precomputed for Latin-1 and memoized for everything else on first sight,
+    so translate() stays a C-level dict lookup per character.
+    """
+
+    def __init__(self):
+        super().__init__()
+        for cp in range(0x100):
+            self[cp] = self._decide(cp)
+
+    @staticmethod
+    def _decide(cp: int) -> Optional[int]:
+        if any(lo <= cp <= hi for lo, hi in DROPPED_RANGES):
+            return None
+        if unicodedata.category(chr(cp)) in DROPPED_CATEGORIES:
+            return None
+        return cp
+
+    def __missing__(self, cp: int) -> Optional[int]:
+        value = self._decide(cp)
+        self[cp] = value
+        return value
+
+
+SYMBOL_TABLE = _SymbolTable()
+
+
+def drop_symbols(text: str) -> str:
+    """Remove symbol-category and box-drawing characters in one translate pass."""
+    return text.translate(SYMBOL_TABLE)
+
+
+@lru_cache(maxsize=1)
+def emoji_code_points() -> frozenset[int]:
+    """Every non-ASCII code point used by a known emoji sequence (ASCII keycap bases # * 0-9 excluded)."""
+    import emoji
+
+    return frozenset(ord(ch) for sequence in emoji.EMOJI_DATA for ch in sequence if ord(ch) > 0x7F)
+
+
+def emoji_pattern(speech_map: dict[str, str]) -> str:
+    """
+    Regex for a run of emoji code points. Emoji are matched as a character class
+    rather than an alternation of every known sequence, which keeps the
+    per-position cost constant; plain digits are never treated as emoji.
+    """
+    emoji_chars = emoji_code_points()
+    emoji_class = char_class(emoji_chars)
+    # A run of emoji stops where a mapped tag could start, so "🔥😭" still
+    # finds a mapped "😭"
+    mapped_starts = {ord(tag[0]) for tag in speech_map if tag} & emoji_chars
+    if mapped_starts:
+        return f"{emoji_class}(?:(?!{char_class(mapped_starts)}){emoji_class})*"
+    return f"{emoji_class}+"
+
+
+class EmojiRewriter:
+    """
+    One compiled regex scanned left to right: mapped tags (a trie over the emoji
+    speech map) are tried first, then keycaps, which are kept as text, then runs
+    of emoji code points.
+    """
+
+    def __init__(self, speech_map: dict[str, str]):
+        self.speech_map = {tag: phrase for tag, phrase in speech_map.items() if tag}
+        mapped = trie_pattern(self.speech_map) if self.speech_map else "(?!)"
+        self.pattern = re.compile(
+            f"(?P<mapped>{mapped})|(?P<keycap>{KEYCAP_PATTERN})|(?P<emoji>{emoji_pattern(self.speech_map)})"
+        )
+        # Pure-ASCII text can't contain emoji, only mapped :shortcodes: / kaomoji
+        self.ascii_pattern = re.compile(f"(?P<mapped>{mapped})")
+
+    def rewrite(self, text: str) -> str:
+        """
+        Replace mapped tags with their phrases and drop emoji at the start and
+        end of the text (with the whitespace that separated them), in one scan.
+        """
+        pieces: list[str] = []
+        is_emoji: list[bool] = []
+        pos = 0
+        pattern = self.ascii_pattern if text.isascii() else self.pattern
+        for match in pattern.finditer(text):
+            if match.start() > pos:
+                pieces.append(text[pos:match.start()])
+                is_emoji.append(False)
+            if match.lastgroup == "mapped":
+                phrase = self.speech_map[match.group()]
+                logger.info(f"[Emoji2Speech] Replacing {match.group()} with {phrase}")
+                pieces.append(phrase)
+                is_emoji.append(False)
+            elif match.lastgroup == "keycap":
+                pieces.append(match.group())
+                is_emoji.append(False)
+            else:
+                pieces.append(match.group())
+                is_emoji.append(True)
+            pos = match.end()
+        if pos < len(text):
+            pieces.append(text[pos:])
+            is_emoji.append(False)
+
+        start, end = 0, len(pieces)
+        # Leading emoji: each removal also strips the whitespace it leaves behind
+        while start < end and is_emoji[start]:
+            logger.info(f"[Emoji2Speech] Removing emoji at start: {pieces[start]}")
+            start += 1
+            while start < end and not is_emoji[start] and not pieces[start].strip():
+                start += 1
+            if start < end and not is_emoji[start]:
+                pieces[start] = pieces[start].lstrip()
+        while end > start and is_emoji[end - 1]:
+            logger.info(f"[Emoji2Speech] Removing emoji at end: {pieces[end - 1]}")
+            end -= 1
+            while end > start and not is_emoji[end - 1] and not pieces[end - 1].strip():
+                end -= 1
+            if end > start and not is_emoji[end - 1]:
+                pieces[end - 1] = pieces[end - 1].rstrip()
+        return "".join(pieces[start:end])
+
+
+_rewriter: Optional[tuple[int, EmojiRewriter]] = None
+_rewriter_lock = threading.Lock()
+
+
+def get_emoji_rewriter() -> EmojiRewriter:
+    """Return the rewriter for the current emoji map, rebuilding it after a reload."""
+    global _rewriter
+    version = Config.emoji_map_version()
+    current = _rewriter
+    if current is None or current[0] != version:
+        with _rewriter_lock:
+            current = _rewriter
+            if current is None or current[0] != version:
+                current = (version, EmojiRewriter(Config.emoji_map()))
+                _rewriter = current
+    return current[1]
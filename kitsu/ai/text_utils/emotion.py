@@ -1,5 +1,5 @@
 import os
-from vtuber_ai.core.emotion import emotion_classifier
+from vtuber_ai.core.emotion import get_emotion_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,27 +9,9 @@ _emotion_cache = set()
 def analyze_emotion(text: str) -> str:
     """
     Analyze the emotion of the given text using the HuggingFace GoEmotions model.
-    Returns the top emotion label.
+    Returns the top emotion label. Requests are batched by the shared EmotionService.
     """
-    result = emotion_classifier(text)
-    try:
-        emotions = list(result) if result is not None and hasattr(result, '__iter__') else []
-    except TypeError:
-        emotions = []
-    # Check structure: emotions should be a list of lists of dicts
-    if emotions and isinstance(emotions[0], list) and emotions[0]:
-        candidate = emotions[0][0]
-        label = None
-        # Try attribute access first (for objects/tensors), then dict access
-        if hasattr(candidate, 'label'):
-            label = getattr(candidate, 'label')
-        elif isinstance(candidate, dict) and 'label' in candidate.keys():
-            label = candidate.get('label')
-        if label is not None:
-            if hasattr(label, "item"):
-                return str(label.item())
-            return str(label)
-    return "neutral"
+    return get_emotion_service().analyze(text)
 
 def add_emotion_to_file(emotion: str, filename: str = "default") -> None:
     """
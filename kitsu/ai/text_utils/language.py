@@ -1,16 +1,24 @@
 from langdetect import detect
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
 def generate_response_again(text: str) -> str:
     """
-    Translate the input text to English using the LLM response pipeline.
+    Translate the input text to English with a plain, non-streaming LLM call.
+    This runs on the speech pipeline's preprocess worker, so it must not speak:
+    the caller synthesizes the returned text in its own place in the queue.
+    Falls back to the original text if the request fails.
     """
-    from vtuber_ai.core.response_gen import generate_response
-    from .preprocessor import process_text_for_speech
+    from vtuber_ai.services.ollama_client import get_ollama_client
     prompt = f"Please rephrase the following in English for a VTuber to say aloud: {text}"
-    return generate_response(prompt, process_text_for_speech)
+    try:
+        translated = get_ollama_client().generate(prompt).strip()
+    except httpx.HTTPError as e:
+        logger.error(f"[Language] Translation request failed: {e}")
+        return text
+    return translated or text
 
 def detect_and_translate_if_needed(text: str, supported_langs: tuple = ("en", "pt", "ja")) -> tuple[str, str]:
     """
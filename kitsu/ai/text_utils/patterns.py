@@ -0,0 +1,41 @@
+import re
+from typing import Iterable
+
+
+def char_class(code_points: Iterable[int]) -> str:
+    """Regex character class for a set of code points, collapsed into ranges."""
+    ranges: list[list[int]] = []
+    for cp in sorted(set(code_points)):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    parts = [re.escape(chr(lo)) if lo == hi else f"{re.escape(chr(lo))}-{re.escape(chr(hi))}" for lo, hi in ranges]
+    return "[" + "".join(parts) + "]"
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation of literal words laid out as a character trie,
+    e.g. ["fala sério", "foi mal"] -> "f(?:ala\\ sério|oi\\ mal)". The engine walks
+    one branch per character instead of trying every word at every position,
+    and the longest word wins where words share a prefix.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        ends_here = "" in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        # Greedy "?" tries the longer continuation first, so the longest key wins
+        return "(?:" + "|".join(branches) + ")" + ("?" if ends_here else "")
+
+    return build(trie)
@@ -1,6 +1,5 @@
 import re
 from typing import Optional, Sequence
-from phonemizer import phonemize
 from vtuber_ai.core.config_manager import Config
 import pyphen
 
@@ -12,6 +11,7 @@ config = Config()
 VOICE_STYLE_DEFAULTS = config.voice_style_defaults()
 PHONETIC_OVERRIDES = config.phonetic_overrides()
 from .speech_style import apply_vowel_drag
+from .phonemizer_backend import get_phonemizer
 
 dic_pt = pyphen.Pyphen(lang='pt_BR')
 dic_en = pyphen.Pyphen(lang='en_US')
@@ -86,9 +86,10 @@ def prepare_phonemes(text: str, lang: str, style: Optional[str] = None, emotion:
     words = text.split()
     full_phoneme_sequence = []
     styles = VOICE_STYLE_DEFAULTS or {}
-    for word in words:
-        raw_phonemes = word_to_phonemes(word, lang)
-        logger.info(f"🔹 {word} → {raw_phonemes}")
+    overrides = Config.phonetic_overrides().get(lang) or {}
+    # One espeak call for the whole sentence; cached words skip espeak entirely
+    phoneme_words = get_phonemizer().phonemize_words(words, lang, overrides)
+    for word, raw_phonemes in zip(words, phoneme_words):
         if raw_phonemes:
             if style and styles.get(style, {}).get("vowel_drag", False):
                 styled_phonemes = apply_vowel_drag(raw_phonemes.split(), word, style)
@@ -98,8 +99,7 @@ def prepare_phonemes(text: str, lang: str, style: Optional[str] = None, emotion:
         else:
             full_phoneme_sequence.append(word)
     final_result = ' '.join(full_phoneme_sequence)
-    logger.info("🔊 Input Text:", text)
-    logger.info("🧬 Final Phonemes:", full_phoneme_sequence)
+    logger.debug(f"🧬 Phonemes for {text!r}: {final_result}")
     return final_result
 
 def word_to_phonemes(word: str, lang: str) -> str:
@@ -108,32 +108,8 @@ def word_to_phonemes(word: str, lang: str) -> str:
     Applies language-specific overrides if present in vtuber_config.phonetic_overrides.
     Returns a string of phonemes or the original word if conversion fails.
     """
-    lang_map = {
-        "en": "en-us",
-        "pt": "pt",
-        "ja": "ja",
-    }
-    resolved_lang = lang_map.get(lang)
-    phonetic_overrides = PHONETIC_OVERRIDES or {}
-    override = phonetic_overrides.get(lang, {}).get(word) if phonetic_overrides.get(lang) else None
-    input_word = override if override else word
-    if not resolved_lang:
-        logger.info(f"[Phonemizer Error]: Unsupported language '{lang}' for word '{word}'")
-        return word
-    try:
-        phonemes = phonemize(
-            input_word,
-            language=resolved_lang,
-            backend="espeak",
-            with_stress=False,
-            preserve_punctuation=True
-        )
-        if isinstance(phonemes, list):
-            phonemes = " ".join(str(p) for p in phonemes if isinstance(p, str))
-        return phonemes
-    except Exception as e:
-        logger.info(f"[Phonemizer Error]: {e}")
-        return word
+    overrides = Config.phonetic_overrides().get(lang) or {}
+    return get_phonemizer().phonemize_words([word], lang, overrides)[0]
     
 def safe_to_split(buffer: str, idx: int) -> bool:
     """
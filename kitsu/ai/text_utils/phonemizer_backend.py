@@ -0,0 +1,121 @@
+"""
+Long-lived espeak phonemizer backends with a word-level phoneme cache.
+
+phonemizer.phonemize() builds a new espeak backend on every call; here one
+backend per language is kept for the life of the process, whole sentences are
+phonemized in a single call, and results are memoized per (language, word,
+override) in a bounded in-process LRU.
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+ESPEAK_LANGUAGES = {
+    "en": "en-us",
+    "pt": "pt",
+    "ja": "ja",
+}
+
+CacheKey = tuple[str, str, Optional[str]]
+
+
+class PhonemeCache:
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: CacheKey, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PhonemizerBackends:
+    def __init__(self, cache: PhonemeCache):
+        self.cache = cache
+        self._backends: dict[str, object] = {}
+        # espeak keeps global state, so calls are serialized across languages
+        self._lock = threading.Lock()
+
+    def _backend(self, espeak_lang: str):
+        backend = self._backends.get(espeak_lang)
+        if backend is None:
+            from phonemizer.backend import EspeakBackend
+
+            backend = EspeakBackend(espeak_lang, preserve_punctuation=True, with_stress=False)
+            self._backends[espeak_lang] = backend
+            logger.debug(f"[Phonemizer] espeak backend ready for {espeak_lang}")
+        return backend
+
+    def phonemize_words(self, words: list[str], lang: str, overrides: Optional[dict] = None) -> list[str]:
+        """
+        Phonemize words for lang, applying phonetic overrides. Cache misses are sent
+        to espeak in one batch; words that fail fall back to their original text.
+        """
+        espeak_lang = ESPEAK_LANGUAGES.get(lang)
+        if not espeak_lang:
+            logger.info(f"[Phonemizer Error]: Unsupported language '{lang}'")
+            return list(words)
+        overrides = overrides or {}
+
+        results: list[Optional[str]] = []
+        missing: dict[CacheKey, str] = {}  # key -> text sent to espeak
+        keys = []
+        for word in words:
+            override = overrides.get(word) or None
+            key = (lang, word, override)
+            keys.append(key)
+            cached = self.cache.get(key)
+            results.append(cached)
+            if cached is None and key not in missing:
+                missing[key] = override or word
+
+        if missing:
+            try:
+                from phonemizer.separator import Separator
+
+                with self._lock:
+                    phonemized = self._backend(espeak_lang).phonemize(
+                        list(missing.values()),
+                        separator=Separator(phone="", syllable="", word=" "),
+                        strip=True,
+                        njobs=1,
+                    )
+                for key, phonemes in zip(missing, phonemized):
+                    self.cache.put(key, phonemes)
+            except Exception as e:
+                logger.info(f"[Phonemizer Error]: {e}")
+
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = self.cache.get(key) or key[1]
+        return results  # type: ignore[return-value]
+
+
+_backends: Optional[PhonemizerBackends] = None
+_backends_lock = threading.Lock()
+
+
+def get_phonemizer() -> PhonemizerBackends:
+    """Return the shared phonemizer."""
+    global _backends
+    with _backends_lock:
+        if _backends is None:
+            _backends = PhonemizerBackends(PhonemeCache())
+        return _backends
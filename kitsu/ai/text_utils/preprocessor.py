@@ -4,6 +4,7 @@ from .speech_style import handle_emoji, interpret_actions, apply_consonant_stren
 from .phonemes import group_sentences, emphasize_syllables
 from .emotion import analyze_emotion, add_emotion_to_file
 from vtuber_ai.core.config_manager import Config
+from vtuber_ai.utils.tracing import get_tracer
 
 config = Config()
 VOICE_STYLE_DEFAULTS = config.voice_style_defaults()
@@ -37,33 +38,38 @@ def process_text_for_speech(text, use_phonemes=False):
     - Applies style-based modifications (consonant strength, vowel drag)
     - Adjusts pitch, rate, tempo, and cleans tildes
     """
+    tracer = get_tracer()
+
     # Language detection and translation
     from .language import detect_and_translate_if_needed
-    text, lang = detect_and_translate_if_needed(text)
+    with tracer.span("tts.language"):
+        text, lang = detect_and_translate_if_needed(text)
 
     # Emotion analysis
-    emotion = analyze_emotion(text)
-    add_emotion_to_file(emotion)
+    with tracer.span("tts.emotion"):
+        emotion = analyze_emotion(text)
+        add_emotion_to_file(emotion)
 
-    # Text preprocessing
-    text = preprocess_for_tts(text, emotion, lang)
-    styles = VOICE_STYLE_DEFAULTS or {}
-    style = emotion.lower() if styles and emotion and emotion.lower() in styles else "neutral"
+    with tracer.span("tts.normalize"):
+        # Text preprocessing
+        text = preprocess_for_tts(text, emotion, lang)
+        styles = VOICE_STYLE_DEFAULTS or {}
+        style = emotion.lower() if styles and emotion and emotion.lower() in styles else "neutral"
 
-    # Style-based modifications
-    if styles.get(style, {}).get("consonant_strength", 1.0) != 1.0:
-        text = apply_consonant_strength(text, style)
-    if styles.get(style, {}).get("vowel_drag", False) and not use_phonemes:
-        text = emphasize_syllables(text, style, styles[style].get("vowel_multiplier", 2) if styles.get(style) else 2)
-    if styles.get(style, {}).get("intonation", False):
-        text = apply_intonation(text, style)
+        # Style-based modifications
+        if styles.get(style, {}).get("consonant_strength", 1.0) != 1.0:
+            text = apply_consonant_strength(text, style)
+        if styles.get(style, {}).get("vowel_drag", False) and not use_phonemes:
+            text = emphasize_syllables(text, style, styles[style].get("vowel_multiplier", 2) if styles.get(style) else 2)
+        if styles.get(style, {}).get("intonation", False):
+            text = apply_intonation(text, style)
 
-    # Pitch and rate
-    pitch, rate = adjust_pitch_rate(emotion)
+        # Pitch and rate
+        pitch, rate = adjust_pitch_rate(emotion)
 
-    # Tempo and tilde cleaning
-    text = adjust_tempo(text, style)
-    text = clean_tilde_tokens(text)
+        # Tempo and tilde cleaning
+        text = adjust_tempo(text, style)
+        text = clean_tilde_tokens(text)
 
     # Final output
     return text, pitch, rate
\ No newline at end of file
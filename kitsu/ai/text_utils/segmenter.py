@@ -0,0 +1,180 @@
+from typing import Optional
+
+from .phonemes import safe_to_split
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPLIT_CHARS = ".!?\n"
+# Clause boundaries the first chunk of a response may also end at
+CLAUSE_CHARS = ",;:"
+# safe_to_split looks 20 chars back for filename rules and back to the previous
+# space for the short-phrase rules (which only apply to phrases of <= 25 chars).
+SEGMENT_LOOKBEHIND = 40
+# ...and 10 chars ahead (the punctuation itself plus 9), so a "Kitsu.exe" whose
+# extension hasn't streamed in yet is not split early.
+SEGMENT_LOOKAHEAD = 10
+# Emitted characters are dropped from the buffer once this many have piled up.
+_COMPACT_THRESHOLD = 4096
+
+
+class StreamingSegmenter:
+    """
+    Incremental sentence segmenter for streamed LLM tokens.
+
+    Each character is scanned once; split decisions at punctuation only look at a
+    fixed window around it, so the work per token stays constant no matter how
+    long the response (or an unpunctuated run) gets.
+
+    With first_clause_chars set, the first chunk also ends at a clause boundary
+    (a comma, semicolon or colon followed by whitespace) once it is at least that
+    long, so the first audio doesn't wait for a whole sentence.
+
+    With max_chars set, a chunk that reaches that length without a split is cut
+    at its last clause boundary if that leaves at least first_clause_chars (half
+    the cap when unset), otherwise at its last space; first_max_chars does the
+    same for the first chunk with a lower cap, so a long opening sentence
+    without commas still starts speaking early. Neither cut is made
+    inside an *emote*, so a chunk can only outgrow the cap while one is open.
+    """
+
+    def __init__(
+        self,
+        first_clause_chars: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        first_max_chars: Optional[int] = None,
+    ):
+        self.first_clause_chars = first_clause_chars
+        self.max_chars = max_chars
+        self.first_max_chars = first_max_chars
+        self._chars: list[str] = []
+        self._start = 0  # first char of the chunk being accumulated
+        self._scan = 0   # next char to examine
+        self._emitted = 0
+        # Where the pending chunk could be cut at the length cap, and whether it has an unclosed '*'
+        self._last_space: Optional[int] = None
+        self._last_clause: Optional[int] = None
+        self._open_emote = False
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Append streamed text and return any chunks that became ready to speak.
+        """
+        self._chars.extend(text)
+        return self._scan_ready(final=False)
+
+    def flush(self) -> list[str]:
+        """
+        Finish the stream: decide pending splits without lookahead and return the
+        remaining chunks, including the unterminated tail.
+        """
+        chunks = self._scan_ready(final=True)
+        tail = "".join(self._chars[self._start:]).strip()
+        if tail:
+            chunks.append(tail)
+        self.reset()
+        return chunks
+
+    def reset(self) -> None:
+        self._chars = []
+        self._start = 0
+        self._scan = 0
+        self._emitted = 0
+        self._last_space = None
+        self._last_clause = None
+        self._open_emote = False
+
+    def pending_text(self) -> str:
+        """Text received since the last emitted chunk."""
+        return "".join(self._chars[self._start:])
+
+    def _scan_ready(self, final: bool) -> list[str]:
+        chars = self._chars
+        end = len(chars)
+        chunks = []
+        i = self._scan
+        while i < end:
+            ch = chars[i]
+            if ch in CLAUSE_CHARS and self._clause_split_wanted(i):
+                if i + 1 == end and not final:
+                    break  # wait to see whether whitespace follows ("1,000" is not a clause)
+                if i + 1 == end or chars[i + 1].isspace():
+                    self._emit(chunks, i + 1)
+            elif ch in SPLIT_CHARS:
+                if ch != "\n" and not final and end - i < SEGMENT_LOOKAHEAD:
+                    break  # wait for the lookahead window to fill
+                if ch == "\n" or self._safe_to_split_at(i):
+                    self._emit(chunks, i + 1)
+            if self._start <= i:
+                self._track_boundary(i)
+                limit = self._length_limit()
+                if limit is not None and i + 1 - self._start >= limit:
+                    cut = self._last_clause
+                    if cut is None or cut - self._start < self._min_clause_cut(limit):
+                        cut = self._last_space
+                    if cut is not None:
+                        self._emit(chunks, cut, at_boundary=True)
+            i += 1
+        self._scan = i
+        self._compact()
+        return chunks
+
+    def _emit(self, chunks: list[str], stop: int, at_boundary: bool = False) -> None:
+        """End the pending chunk before index stop; at_boundary marks a length-cap cut."""
+        chunk = "".join(self._chars[self._start:stop]).strip()
+        if chunk:
+            chunks.append(chunk)
+            self._emitted += 1
+        self._start = stop
+        self._last_clause = None
+        if at_boundary:
+            # The cut is outside any emote, so an open one stays open in what is left
+            if self._last_space is not None and self._last_space <= stop:
+                self._last_space = None
+        else:
+            self._last_space = None
+            self._open_emote = False
+
+    def _track_boundary(self, idx: int) -> None:
+        """Note where the pending chunk could be cut if it hits the length cap."""
+        ch = self._chars[idx]
+        if ch == "*":
+            self._open_emote = not self._open_emote
+        elif ch.isspace() and not self._open_emote and idx > self._start:
+            self._last_space = idx
+            if self._chars[idx - 1] in CLAUSE_CHARS:
+                self._last_clause = idx
+
+    def _clause_split_wanted(self, idx: int) -> bool:
+        if self.first_clause_chars is None or self._emitted:
+            return False
+        pending = self._chars[self._start:idx + 1]
+        # Never cut an *emote* in half; extract_emotes needs both asterisks in one chunk
+        return len(pending) >= self.first_clause_chars and pending.count("*") % 2 == 0
+
+    def _length_limit(self) -> Optional[int]:
+        if not self._emitted and self.first_max_chars is not None:
+            return self.first_max_chars if self.max_chars is None else min(self.first_max_chars, self.max_chars)
+        return self.max_chars
+
+    def _min_clause_cut(self, limit: int) -> int:
+        """Shortest chunk a length-cap cut may leave at a clause boundary instead of the last space."""
+        return self.first_clause_chars if self.first_clause_chars is not None else limit // 2
+
+    def _safe_to_split_at(self, idx: int) -> bool:
+        lo = max(self._start, idx - SEGMENT_LOOKBEHIND)
+        hi = min(len(self._chars), idx + SEGMENT_LOOKAHEAD)
+        window = "".join(self._chars[lo:hi])
+        return safe_to_split(window, idx - lo)
+
+    def _compact(self) -> None:
+        start = self._start
+        if start > _COMPACT_THRESHOLD and start * 2 > len(self._chars):
+            del self._chars[:start]
+            self._scan -= start
+            self._start = 0
+            if self._last_space is not None:
+                self._last_space -= start
+            if self._last_clause is not None:
+                self._last_clause -= start
@@ -1,7 +1,8 @@
 import re
-import emoji
 from typing import Optional
 from .cleaning import load_emoji_speech_map
+from .patterns import trie_pattern
+from .emoji_rewriter import get_emoji_rewriter
 from vtuber_ai.core.config_manager import Config
 
 import logging
@@ -15,6 +16,11 @@ COMMON_ACTIONS = config.commom_actions()
 
 EMOJI_SPEECH_MAP = load_emoji_speech_map()
 
+_TILDE_AFTER_LETTER = re.compile(r'([a-zA-Z])~')
+_BOLD_MARKERS = re.compile(r"\*\*(.+?)\*\*")
+_ACTION_MARKERS = re.compile(r'\*([^\*]+)\*')
+_VOWELS = re.compile(r"([aeiouáéíóúâêôãõAEIOU])")
+
 def apply_intonation(text: str, style: str) -> str:
     """
     Apply intonation markers or transformations to the text based on the style.
@@ -96,44 +102,21 @@ def adjust_tempo(text: str, style: str) -> str:
     return text
 
 def emoji_to_speech(text, style=None):
-    replaced = False
-    # Only print when a replacement happens for easier debugging
-    for tag, phrase in EMOJI_SPEECH_MAP.items():
-        if tag in text:
-            logger.info(f"[Emoji2Speech] Replacing {tag} with {phrase}")
-            replaced = True
-        text = text.replace(tag, phrase)
-    # Remove emojis at the beginning
-    removed_start = False
-    while text and emoji.emoji_list(text[:2]):
-        first_emoji = emoji.emoji_list(text[:2])[0]['emoji']
-        if text.startswith(first_emoji):
-            logger.info(f"[Emoji2Speech] Removing emoji at start: {first_emoji}")
-            text = text[len(first_emoji):].lstrip()
-            removed_start = True
-        else:
-            break
-    # Remove emojis at the end
-    removed_end = False
-    while text and emoji.emoji_list(text[-2:]):
-        last_emoji = emoji.emoji_list(text[-2:])[-1]['emoji']
-        if text.endswith(last_emoji):
-            logger.info(f"[Emoji2Speech] Removing emoji at end: {last_emoji}")
-            text = text[:-len(last_emoji)].rstrip()
-            removed_end = True
-        else:
-            break
-    if not replaced and not removed_start and not removed_end:
-        logger.info("[Emoji2Speech] No emojis replaced or removed.")
-    return text
+    """
+    Replace mapped emoji/kaomoji with their spoken phrase and trim emoji from the
+    start and end of the text, in a single scan (see EmojiRewriter).
+    """
+    result = get_emoji_rewriter().rewrite(text)
+    if result == text:
+        logger.debug("[Emoji2Speech] No emojis replaced or removed.")
+    return result
 
 def clean_tilde_tokens(text: str) -> str:
     """
     Clean up tilde tokens in the text, doubling the preceding character and removing stray tildes.
     Returns the cleaned text.
     """
-    import re
-    cleaned = re.sub(r'([a-zA-Z])~', r'\1\1', text)
+    cleaned = _TILDE_AFTER_LETTER.sub(r'\1\1', text)
     cleaned = cleaned.replace('~', '')
     return cleaned
 
@@ -157,9 +140,8 @@ def remove_markers(text: str) -> str:
     Remove **double asterisks** used for emphasis, but keep inner text.
     """
     # Remove all pairs of ** around words or phrases
-    import re
     # This regex finds **some text** and replaces with just some text
-    cleaned = re.sub(r"\*\*(.+?)\*\*", r"\1", text)
+    cleaned = _BOLD_MARKERS.sub(r"\1", text)
     return cleaned
 
 def adjust_pitch_rate(emotion: str) -> tuple[float, float]:
@@ -195,8 +177,7 @@ def stretch_vowels(syllable: str, multiplier: int = 3) -> str:
     Stretch all vowels in a syllable by repeating them 'multiplier' times.
     Returns the modified syllable string.
     """
-    import re
-    return re.sub(r"([aeiouáéíóúâêôãõAEIOU])", lambda m: m.group(1) * multiplier, syllable)
+    return _VOWELS.sub(lambda m: m.group(1) * multiplier, syllable)
 
 def apply_consonant_strength(text: str, style: str) -> str:
     styles = VOICE_STYLE_DEFAULTS or {}
@@ -217,16 +198,47 @@ def handle_emoji(text: str, emotion: Optional[str]) -> str:
 
 def interpret_actions(text: str) -> str:
     actions = COMMON_ACTIONS or {}
-    return re.sub(r'\*([^\*]+)\*', lambda m: actions.get(m.group(1), m.group(1)), text)
+    return _ACTION_MARKERS.sub(lambda m: actions.get(m.group(1), m.group(1)), text)
 
 def ensure_punctuation(text: str) -> str:
     if text and text[-1] not in '.!?':
         return text + '.'
     return text
 
+class PhoneticOverrideMatcher:
+    """
+    All phonetic overrides for one language compiled into a single regex whose
+    alternatives are laid out as a character trie, so each position is tested
+    against the table in one walk instead of once per entry. Where keys overlap
+    (e.g. "sério" and "fala sério") the longest one wins, and replacements are
+    never re-scanned.
+    """
+
+    def __init__(self, overrides: dict[str, str]):
+        self.overrides = {word: phon for word, phon in overrides.items() if word}
+        self.pattern = None
+        if self.overrides:
+            self.pattern = re.compile(rf"\b{trie_pattern(self.overrides)}\b")
+
+    def apply(self, text: str) -> str:
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(lambda m: self.overrides[m.group(0)], text)
+
+_override_matchers: dict[str, tuple[int, PhoneticOverrideMatcher]] = {}
+
+def get_override_matcher(lang: str) -> PhoneticOverrideMatcher:
+    """Return the compiled matcher for lang, rebuilding it after a phonetics config reload."""
+    version = Config.phonetics_version()
+    cached = _override_matchers.get(lang)
+    if cached is None or cached[0] != version:
+        overrides = Config.phonetic_overrides().get(lang) or {}
+        cached = (version, PhoneticOverrideMatcher(overrides))
+        _override_matchers[lang] = cached
+    return cached[1]
+
 def apply_phonetic_overrides(sentences: list[str], lang: Optional[str]) -> list[str]:
-    phonetic_overrides = PHONETIC_OVERRIDES or {}
-    if lang is not None and phonetic_overrides.get(lang):
-        for word, phon in phonetic_overrides[lang].items():
-            sentences = [re.sub(rf'\b{re.escape(word)}\b', phon, p) for p in sentences]
-    return sentences
\ No newline at end of file
+    if lang is None:
+        return sentences
+    matcher = get_override_matcher(lang)
+    return [matcher.apply(p) for p in sentences]
@@ -1,12 +1,14 @@
 # tts_module.py
 """
 TTS (Text-to-Speech) related functions for VTuber AI.
+
+The TTS model and the audio player are created on first use (or by an explicit
+prefetch), so importing this module does not load torch, Coqui or PortAudio.
 """
 import tempfile
-import torch
-from TTS.api import TTS
-from typing import Callable, Optional
-import soundfile as sf
+import threading
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,34 +16,79 @@ logger = logging.getLogger(__name__)
 from ai.text_utils.cleaning import clean_artifacts  # Add this import for reading wav files
 
 from .audio_module import StreamingAudioPlayer
+from .audio_cache import get_audio_cache
 from vtuber_ai.core.config_manager import Config
+from vtuber_ai.utils.startup import startup_report
+from vtuber_ai.utils.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from TTS.api import TTS
 
 config = Config()
 FEMALE_VOICES = config.female_voices()
 
-player = StreamingAudioPlayer(sample_rate=24000, channels=1)
-player.start()
+player: Optional[StreamingAudioPlayer] = None
 
-tts: Optional[TTS] = None  # Should be set by main app
+tts: Optional["TTS"] = None  # Should be set by main app
 female_voices: Optional[list[str]] = None  # Should be set by main app
+_tts_lock = threading.Lock()
+_player_lock = threading.Lock()
 
 # Module-level variable to store all LLM outputs
 llm_outputs = ""
 
 TTS_MODEL = getattr(config, "TTS_MODEL", None)
+DEFAULT_TTS_MODEL = "tts_models/en/vctk/vits"
 
-def get_tts() -> TTS:
+def get_tts() -> "TTS":
     """Return a singleton TTS instance with the default model, using GPU if available."""
     global tts
     if tts is not None:
-        logger.info(f"TTS model already loaded: {tts}")
         return tts
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    logger.info(f"Loading TTS model on device: {device}")
-    tts_instance = TTS(model_name="tts_models/en/vctk/vits")
-    tts_instance.to(device)
-    tts = tts_instance
-    return tts
+    with _tts_lock:
+        if tts is not None:
+            return tts
+        with startup_report.measure("import torch + TTS"):
+            import torch
+            from TTS.api import TTS
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        logger.info(f"Loading TTS model on device: {device}")
+        with startup_report.measure(f"TTS model load ({device})"):
+            tts_instance = TTS(model_name=DEFAULT_TTS_MODEL)
+            tts_instance.to(device)
+        tts = tts_instance
+        return tts
+
+def get_player() -> StreamingAudioPlayer:
+    """Return the shared audio player, opening the output device on first use."""
+    global player
+    if player is not None:
+        return player
+    with _player_lock:
+        if player is None:
+            with startup_report.measure("audio player start"):
+                settings = config.audio_output()
+                new_player = StreamingAudioPlayer(
+                    sample_rate=output_sample_rate(),
+                    channels=1,
+                    prebuffer_ms=float(settings.get("prebuffer_ms", 150)),
+                    crossfade_ms=float(settings.get("crossfade_ms", 5)),
+                    buffer_seconds=float(settings.get("buffer_seconds", 30)),
+                    blocksize=int(settings.get("blocksize", 0)),
+                    latency=settings.get("latency", "low"),
+                )
+                new_player.on_playback = _trace_playback
+                new_player.start()
+            player = new_player
+        return player
+
+def output_sample_rate() -> int:
+    """Sample rate of synthesized audio: the loaded model's, else AUDIO_OUTPUT["sample_rate"]."""
+    synthesizer = getattr(tts, "synthesizer", None)
+    rate = getattr(synthesizer, "output_sample_rate", None)
+    if rate:
+        return int(rate)
+    return int(config.audio_output().get("sample_rate", 22050))
 
 def choose_voice() -> str:
     """Return the female voice from config (first entry in FEMALE_VOICES)."""
@@ -49,55 +96,131 @@ def choose_voice() -> str:
         raise ValueError("No female voices available in config.")
     return FEMALE_VOICES[0]
 
-def speak_with_emotion(
+def prepare_speech(
     text: str,
     process_text_for_speech: Callable[[str,], tuple[str, float, float]]
-) -> None:
+) -> Optional[tuple[str, float, float]]:
     """
-    Synthesize speech with emotion and play the resulting audio file using audio_module.
+    Clean a text chunk and run it through the speech preprocessing pipeline.
+    Returns (processed_text, pitch, rate), or None if nothing speakable is left.
     """
-    global tts, llm_outputs
-    logger.debug(f"speak_with_emotion called with text: {text}")
+    logger.debug(f"prepare_speech called with text: {text}")
     text = clean_artifacts(text)
-    tts = get_tts()
+    if not text:
+        return None
+    text, pitch, rate = process_text_for_speech(text)
+    logger.debug(f"processed_text: {text}, pitch: {pitch}, rate: {rate}")
+    return text, pitch, rate
 
-    try:
-        result = process_text_for_speech(text)
-        text, pitch, rate = result
-        logger.debug(f"processed_text: {text}, pitch: {pitch}, rate: {rate}")
-        logger.info(f"FULL TTS SENT: {text}")
-        current_voice = choose_voice()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav:
-            file_path = temp_wav.name
-        logger.debug(f"Synthesizing to file: {file_path}")
-        tts.tts_to_file(
+def synthesize(text: str, pitch: float, rate: float) -> Optional[np.ndarray]:
+    """
+    Synthesize already-processed text and return the audio as a (n, 1) float32 array.
+    The waveform stays in memory; set TTS_DEBUG_WAV in config to go through a WAV
+    file instead when the written audio needs inspecting.
+    """
+    global llm_outputs
+    logger.info(f"FULL TTS SENT: {text}")
+    current_voice = choose_voice()
+    cache = get_audio_cache()
+    cache_key = None
+    if cache is not None and cache.should_cache(text):
+        cache_key = cache.make_key(text, current_voice, pitch, rate, config.tts_model() or DEFAULT_TTS_MODEL)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            llm_outputs += text + "\n"
+            logger.debug(f"[AudioCache] Hit for {text!r} ({cache.stats()['hit_rate']:.0%} hit rate)")
+            return cached
+    tts = get_tts()
+    if config.get("TTS_DEBUG_WAV", False, warn=False):
+        audio = _synthesize_via_file(tts, text, current_voice, pitch, rate)
+    else:
+        wav = tts.tts(
             text=text,
             use_phonemes=True,
-            file_path=file_path,
             speaker=current_voice,
             pitch=pitch,
             rate=rate
         )
-        llm_outputs += text + "\n"
-        logger.debug(f"Synthesis complete, file saved: {file_path}")
-        try:
-            result = sf.read(file_path, dtype='float32')
-            if result is None or not isinstance(result, tuple) or len(result) != 2:
-                raise RuntimeError(f"Failed to read audio file: {file_path}")
-            audio, sr = result
-            if audio.ndim == 1:
-                audio = audio.reshape(-1, 1)
-            if audio.shape[1] > 1:
-                audio = audio[:, 0:1]
-            player.enqueue(audio)
-            logger.debug(f"Audio enqueued for playback.")
-        except Exception as e:
-            logger.error(f"Error loading or playing audio: {e}")
-        try:
-            import os
-            os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Could not delete temp file: {e}")
+        # Coqui hands back a flat sample list; this is the single conversion to float32
+        audio = np.asarray(wav, dtype=np.float32)
+    llm_outputs += text + "\n"
+    if audio.size == 0:
+        return None
+    audio = as_mono_column(audio)
+    if cache_key is not None:
+        cache.put(cache_key, audio)
+    return audio
+
+def as_mono_column(audio: np.ndarray) -> np.ndarray:
+    """
+    Shape audio as the (n, 1) float32 column the player expects. Views are
+    returned where possible, so already-shaped float32 input is never copied.
+    """
+    if audio.dtype != np.float32:
+        audio = audio.astype(np.float32)
+    if audio.ndim == 1:
+        return audio.reshape(-1, 1)
+    if audio.shape[1] > 1:
+        return audio[:, 0:1]
+    return audio
+
+def _synthesize_via_file(tts: "TTS", text: str, speaker: str, pitch: float, rate: float) -> np.ndarray:
+    """Debug path: round-trip through a temporary WAV file, which is kept for inspection."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav:
+        file_path = temp_wav.name
+    logger.debug(f"Synthesizing to file: {file_path}")
+    tts.tts_to_file(
+        text=text,
+        use_phonemes=True,
+        file_path=file_path,
+        speaker=speaker,
+        pitch=pitch,
+        rate=rate
+    )
+    import soundfile as sf
+    result = sf.read(file_path, dtype='float32')
+    if result is None or not isinstance(result, tuple) or len(result) != 2:
+        raise RuntimeError(f"Failed to read audio file: {file_path}")
+    audio, sr = result
+    logger.info(f"[TTS debug] Synthesized audio kept at {file_path} ({sr} Hz)")
+    return audio
+
+def _trace_playback(tag: tuple[Optional[int], Optional[int]], start: float, end: float) -> None:
+    turn, chunk = tag
+    get_tracer().playback(turn, chunk, start, end)
+
+def play_audio(audio: np.ndarray, tag: Optional[tuple[Optional[int], Optional[int]]] = None) -> None:
+    """
+    Hand a synthesized chunk to the streaming audio player. tag is the chunk's
+    (turn, chunk) trace context; its playback is traced when given.
+    """
+    get_player().enqueue(audio, sample_rate=output_sample_rate(), tag=tag)
+    logger.debug(f"Audio enqueued for playback.")
+
+def queued_audio_seconds() -> float:
+    """Seconds of audio waiting in the player (0 before it is opened)."""
+    return player.queued_seconds if player is not None else 0.0
+
+def flush_audio() -> None:
+    """Tell the player the current utterance is complete, so its end plays out without waiting."""
+    if player is not None:
+        player.flush()
+
+def speak_with_emotion(
+    text: str,
+    process_text_for_speech: Callable[[str,], tuple[str, float, float]]
+) -> None:
+    """
+    Synthesize speech with emotion and play it, blocking until the chunk is enqueued.
+    The streaming path uses SpeechPipeline instead, which overlaps these stages.
+    """
+    try:
+        prepared = prepare_speech(text, process_text_for_speech)
+        if prepared is None:
+            return
+        audio = synthesize(*prepared)
+        if audio is not None:
+            play_audio(audio)
     except Exception as e:
         logger.error(f"[TTS error]: {e}")
     logger.info(f"FULL LLM OUTPUT: {llm_outputs}")
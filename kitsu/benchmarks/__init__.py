@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for the VTuber AI speech path. Run from the kitsu directory, e.g.
+`python -m benchmarks.bench_segmenter`.
+"""
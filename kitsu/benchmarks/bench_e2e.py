@@ -0,0 +1,368 @@
+"""
+Offline end-to-end latency of a conversation turn, from get_response to the
+last chunk leaving the speaker, with no Ollama, audio device or models.
+
+Four stand-ins replace the outside world:
+
+  - a fake Ollama server on 127.0.0.1:--port (11434 by default) that streams
+    /api/generate and /api/chat NDJSON after --ttft-ms, at --tokens-per-s. The
+    tokens come from a recorded stream (--stream) or from the AI lines of
+    data/chat_log.txt, one line per turn.
+  - a fake TTS that returns silence, --audio-s-per-char seconds of it per
+    character, after sleeping for --rtf times that plus --tts-overhead-ms.
+  - a null audio sink that runs the real player callback every --block-ms in
+    real time, so prebuffering, crossfades and underruns behave as on a device
+    and playback is timestamped on the virtual output clock.
+  - a scripted load of user turns (--script, or the viewer lines of the chat
+    log), each sent once the previous answer has finished playing plus --pause.
+
+Emotion is stubbed and translation is the identity; language detection, text
+preprocessing, chunking, the speech pipeline and the player are the real code.
+Long-term memory and the summarizer are off, and facts go to a temporary
+directory. From the trace spans it reports, per turn and in aggregate:
+time-to-first-audio, gaps between consecutive chunks' playback, total
+starvation (the sum of those gaps) and player underruns.
+
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --turns 10 --tokens-per-s 15 --rtf 0.6 --json before.json
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import Future
+from contextlib import ExitStack
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+
+import numpy as np
+import orjson
+
+import ai.tts_module as tts_module
+from ai.audio_module import StreamingAudioPlayer
+from ai.memory_module import ConversationMemory
+from ai.text_utils import language
+from benchmarks.corpus import load_ai_lines, load_recorded_stream, load_user_lines, tokenize_like_ollama
+from vtuber_ai.core import emotion, speech_pipeline
+from vtuber_ai.services import conversation_service, ollama_client
+from vtuber_ai.services.conversation_service import ConversationService
+from vtuber_ai.utils.tracing import get_tracer
+
+SAMPLE_RATE = 22050
+STUB_EMOTIONS = ("neutral", "joy", "amusement", "excitement", "curiosity")
+DRAIN_POLL_S = 0.01
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, turns: list[list[str]], ttft_s: float, tokens_per_s: float):
+        super().__init__(("127.0.0.1", port), FakeOllamaHandler)
+        self.turns = turns
+        self.ttft_s = ttft_s
+        self.token_interval_s = 1 / tokens_per_s
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_tokens(self) -> list[str]:
+        with self._lock:
+            tokens = self.turns[self.requests % len(self.turns)]
+            self.requests += 1
+        return tokens
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        body = b'{"models": []}' if self.path.startswith("/api/") else b"Ollama is running"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = orjson.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        chat = self.path == "/api/chat"
+        server: FakeOllamaServer = self.server
+        tokens = server.next_tokens()
+        start = time.perf_counter()
+        time.sleep(server.ttft_s)
+        prompt_ms = (time.perf_counter() - start) * 1000
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        gen_start = time.perf_counter()
+        for token in tokens:
+            message = {"model": request.get("model"), "done": False}
+            if chat:
+                message["message"] = {"role": "assistant", "content": token}
+            else:
+                message["response"] = token
+            self._send(orjson.dumps(message) + b"\n")
+            time.sleep(server.token_interval_s)
+        eval_ms = (time.perf_counter() - gen_start) * 1000
+        prompt = request.get("prompt") or "".join(m.get("content", "") for m in request.get("messages", []))
+        done = {
+            "model": request.get("model"),
+            "done": True,
+            "prompt_eval_count": len(prompt) // 4,
+            "prompt_eval_duration": int(prompt_ms * 1e6),
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_ms * 1e6),
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+        }
+        if chat:
+            done["message"] = {"role": "assistant", "content": ""}
+        else:
+            done["response"] = ""
+        self._send(orjson.dumps(done) + b"\n")
+        self._send(b"")
+
+
+class FakeTTS:
+    """Stands in for Coqui's TTS: silence after a delay proportional to its length."""
+
+    def __init__(self, rtf: float, overhead_s: float, audio_s_per_char: float):
+        self.rtf = rtf
+        self.overhead_s = overhead_s
+        self.audio_s_per_char = audio_s_per_char
+        self.synthesizer = types.SimpleNamespace(output_sample_rate=SAMPLE_RATE)
+
+    def tts(self, text: str, **kwargs) -> np.ndarray:
+        audio_s = len(text) * self.audio_s_per_char
+        time.sleep(self.overhead_s + audio_s * self.rtf)
+        return np.zeros(int(audio_s * SAMPLE_RATE), dtype=np.float32)
+
+
+class StubEmotionService:
+    """Answers immediately with a label derived from the text."""
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        future.set_result(self.analyze(text))
+        return future
+
+    def analyze(self, text: str, timeout: Optional[float] = None) -> str:
+        return STUB_EMOTIONS[zlib.crc32(text.strip().encode("utf-8")) % len(STUB_EMOTIONS)]
+
+
+class NullAudioSink(StreamingAudioPlayer):
+    """
+    A player whose device is a clock thread: every block it runs the real
+    callback into a scratch buffer and advances virtual playback time.
+    """
+
+    def __init__(self, block_ms: float = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.block_s = block_ms / 1000
+        self.virtual_s = 0.0  # output clock
+        self.audio_s = 0.0    # of which carried audio
+        self._clock: Optional[threading.Thread] = None
+        self._clock_stop = threading.Event()
+
+    def _open(self) -> None:
+        self._clock_stop.clear()
+        self._clock = threading.Thread(target=self._run_clock, name="null-audio-sink", daemon=True)
+        self._clock.start()
+
+    def _close(self) -> None:
+        if self._clock is not None:
+            self._clock_stop.set()
+            self._clock.join()
+            self._clock = None
+
+    @property
+    def idle(self) -> bool:
+        with self._cond:
+            return self._queued_frames() == 0 and not self._markers
+
+    def _run_clock(self) -> None:
+        frames = int(self.sample_rate * self.block_s)
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        status = types.SimpleNamespace(output_underflow=False)
+        time_info = types.SimpleNamespace(outputBufferDacTime=0.0, currentTime=0.0)
+        next_block = time.perf_counter()
+        while not self._clock_stop.is_set():
+            played = self._played
+            self._callback(out, frames, time_info, status)
+            self.virtual_s += frames / self.sample_rate
+            self.audio_s += max(self._played - played, 0) / self.sample_rate
+            next_block += self.block_s
+            time.sleep(max(next_block - time.perf_counter(), 0))
+
+
+def token_turns(args) -> list[list[str]]:
+    if args.stream:
+        return [load_recorded_stream(args.stream)]
+    return [tokenize_like_ollama(line) for line in load_ai_lines()]
+
+
+def user_turns(args) -> list[str]:
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+    else:
+        messages = load_user_lines()
+    return [messages[i % len(messages)] for i in range(args.turns)]
+
+
+def turn_metrics(tracer, turn: int) -> dict:
+    first_audio = [end - start for start, end, t, _ in tracer.spans("turn.first_audio") if t == turn]
+    first_token = [end - start for start, end, t, _ in tracer.spans("llm.first_token") if t == turn]
+    playback = sorted((chunk, start, end) for start, end, t, chunk in tracer.spans("audio.playback") if t == turn)
+    # Crossfaded chunks overlap slightly, so only positive gaps count as silence
+    gaps = [max(nxt[1] - cur[2], 0.0) for cur, nxt in zip(playback, playback[1:])]
+    return {
+        "turn": turn,
+        "first_token_s": first_token[0] if first_token else None,
+        "first_audio_s": first_audio[0] if first_audio else None,
+        "chunks": len(playback),
+        "gaps_s": gaps,
+        "starvation_s": sum(gaps),
+        "speech_s": playback[-1][2] - playback[0][1] if playback else 0.0,
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)]
+
+
+def describe(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    return (f"p50 {percentile(values, 50) * 1000:7.0f} ms  p95 {percentile(values, 95) * 1000:7.0f} ms  "
+            f"max {max(values) * 1000:7.0f} ms  (n={len(values)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--script", type=Path, help="user messages, one per line (default: chat log viewer lines)")
+    parser.add_argument("--stream", type=Path, help="recorded Ollama NDJSON stream to replay every turn")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft-ms", type=float, default=250, help="server delay before the first token")
+    parser.add_argument("--tokens-per-s", type=float, default=30)
+    parser.add_argument("--rtf", type=float, default=0.3, help="fake TTS real-time factor")
+    parser.add_argument("--tts-overhead-ms", type=float, default=30, help="fixed fake TTS cost per chunk")
+    parser.add_argument("--audio-s-per-char", type=float, default=0.065)
+    parser.add_argument("--block-ms", type=float, default=10, help="null sink callback period")
+    parser.add_argument("--pause", type=float, default=0.5, help="seconds between the end of playback and the next turn")
+    parser.add_argument("--json", type=Path, help="write per-turn and aggregate results here")
+    parser.add_argument("--verbose", action="store_true", help="show the app's log output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    try:
+        server = FakeOllamaServer(args.port, token_turns(args), args.ttft_ms / 1000, args.tokens_per_s)
+    except OSError as e:
+        sys.exit(f"Could not listen on port {args.port} ({e}); is Ollama running? Try --port.")
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+
+    settings = tts_module.config.audio_output()
+    sink = NullAudioSink(
+        block_ms=args.block_ms,
+        sample_rate=SAMPLE_RATE,
+        prebuffer_ms=float(settings.get("prebuffer_ms", 150)),
+        crossfade_ms=float(settings.get("crossfade_ms", 5)),
+        buffer_seconds=float(settings.get("buffer_seconds", 30)),
+    )
+    sink.on_playback = tts_module._trace_playback
+    sink.start()
+    tracer = get_tracer()
+    facts_dir = tempfile.TemporaryDirectory()
+
+    with ExitStack() as stack:
+        patch = stack.enter_context
+        patch(mock.patch.object(tts_module, "tts", FakeTTS(args.rtf, args.tts_overhead_ms / 1000, args.audio_s_per_char)))
+        patch(mock.patch.object(tts_module, "player", sink))
+        patch(mock.patch.object(tts_module, "get_audio_cache", lambda: None))
+        patch(mock.patch.object(speech_pipeline, "get_audio_cache", lambda: None))
+        patch(mock.patch.object(emotion, "_service", StubEmotionService()))
+        patch(mock.patch.object(language, "generate_response_again", lambda text: text))
+        patch(mock.patch.object(ollama_client, "_client", ollama_client.OllamaClient(host=f"http://127.0.0.1:{args.port}")))
+        patch(mock.patch.object(conversation_service, "get_long_term_memory", lambda: None))
+        patch(mock.patch.object(conversation_service, "create_summarizer", lambda memory: None))
+        patch(mock.patch.object(
+            conversation_service, "ConversationMemory",
+            partial(ConversationMemory, save_path=str(Path(facts_dir.name) / "facts.json")),
+        ))
+        patch(mock.patch.object(tracer, "enabled", True))
+
+        service = ConversationService()
+        results = []
+        print(f"{args.turns} turns | TTFT {args.ttft_ms:.0f} ms, {args.tokens_per_s:g} tok/s | "
+              f"TTS RTF {args.rtf:g} + {args.tts_overhead_ms:.0f} ms | sink block {args.block_ms:g} ms\n")
+        for message in user_turns(args):
+            underruns = sink.underruns
+            service.get_response(message)
+            while not sink.idle:
+                time.sleep(DRAIN_POLL_S)
+            sink.report_playback()
+            turn = service.last_turn_metadata.get("turn")
+            metrics = turn_metrics(tracer, turn)
+            metrics["underruns"] = sink.underruns - underruns
+            results.append(metrics)
+            first_audio = metrics["first_audio_s"]
+            print(f"turn {turn:3d}: first audio {first_audio * 1000 if first_audio is not None else float('nan'):7.0f} ms | "
+                  f"{metrics['chunks']:2d} chunks, {metrics['speech_s']:5.1f}s speech | "
+                  f"starved {metrics['starvation_s'] * 1000:6.0f} ms | underruns {metrics['underruns']}")
+            time.sleep(args.pause)
+
+    sink.stop()
+    server.shutdown()
+    facts_dir.cleanup()
+
+    first_audio = [r["first_audio_s"] for r in results if r["first_audio_s"] is not None]
+    first_token = [r["first_token_s"] for r in results if r["first_token_s"] is not None]
+    gaps = [g for r in results for g in r["gaps_s"]]
+    starvation = sum(r["starvation_s"] for r in results)
+    speech = sum(r["speech_s"] for r in results)
+    print(f"\nfirst token:        {describe(first_token)}")
+    print(f"time to first audio: {describe(first_audio)}")
+    print(f"inter-chunk gaps:   {describe(gaps)}")
+    print(f"starvation total:   {starvation:.2f}s over {speech:.1f}s of speech "
+          f"({starvation / speech if speech else 0:.1%}), {sum(r['underruns'] for r in results)} underruns")
+    print(f"sink clock:         {sink.virtual_s:.1f}s, {sink.audio_s:.1f}s of it audio")
+
+    if args.json:
+        summary = {
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            "turns": results,
+            "aggregate": {
+                "first_audio_p50_s": percentile(first_audio, 50),
+                "first_audio_p95_s": percentile(first_audio, 95),
+                "gap_p50_s": percentile(gaps, 50),
+                "gap_p95_s": percentile(gaps, 95),
+                "gap_mean_s": statistics.fmean(gaps) if gaps else 0.0,
+                "starvation_s": starvation,
+                "speech_s": speech,
+                "underruns": sum(r["underruns"] for r in results),
+            },
+        }
+        args.json.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Differential check and throughput of EmojiRewriter against the original
+emoji_to_speech loops.
+
+Edge cases with a known answer (keycaps, non-emoji symbols at the edges, ZWJ
+and skin-tone sequences, mapped tags) are checked against a fixed speech map.
+Then every AI line in data/chat_log.txt, and every speech chunk cut from it,
+goes through both implementations with the configured map. The legacy loops
+look at two characters at a time, so they cut ZWJ sequences in half and leave
+a stray joiner or variation selector behind; those inputs are counted as
+legacy breakage rather than mismatches. Any other difference is printed and the
+script exits non-zero. Then chunks/s is reported for both.
+
+    python -m benchmarks.bench_emoji
+    python -m benchmarks.bench_emoji --repeat 10
+"""
+import argparse
+import logging
+import sys
+import time
+
+import emoji
+
+from ai.text_utils.emoji_rewriter import EmojiRewriter, get_emoji_rewriter
+from ai.text_utils.segmenter import StreamingSegmenter
+from benchmarks.corpus import load_ai_lines
+from vtuber_ai.core.config_manager import Config
+
+EDGE_MAP = {":fire:": "so hot", "😭": "waah"}
+# input -> expected output with EDGE_MAP
+EDGE_CASES = {
+    "Step 1️⃣": "Step 1️⃣",
+    "Done #️⃣": "Done #️⃣",
+    "1️⃣ first": "1️⃣ first",
+    "*️⃣ then 1️⃣😀": "*️⃣ then 1️⃣",
+    "★ Welcome back ★": "★ Welcome back ★",
+    "☆ star ☆": "☆ star ☆",
+    "→ go": "→ go",
+    "Hi 😀": "Hi",
+    "😀 Hi": "Hi",
+    "😀😀 Hi 🔥 there 🔥": "Hi 🔥 there",
+    "🐱‍👤 ninja": "ninja",
+    "emojis: 😜 🤔 🤦‍♂️": "emojis:",
+    "ok 👍🏽": "ok",
+    "go 🇧🇷": "go",
+    "it's :fire: 😭": "it's so hot waah",
+    "🔥😭": "waah",
+}
+# Left by the legacy loops when their two-character window cuts a sequence
+BROKEN_SEQUENCE = ("\u200d", "\ufe0f")
+
+
+def legacy_emoji_to_speech(text: str, speech_map: dict[str, str]) -> str:
+    """emoji_to_speech as it was before EmojiRewriter, without the logging."""
+    for tag, phrase in speech_map.items():
+        text = text.replace(tag, phrase)
+    while text and emoji.emoji_list(text[:2]):
+        first_emoji = emoji.emoji_list(text[:2])[0]['emoji']
+        if text.startswith(first_emoji):
+            text = text[len(first_emoji):].lstrip()
+        else:
+            break
+    while text and emoji.emoji_list(text[-2:]):
+        last_emoji = emoji.emoji_list(text[-2:])[-1]['emoji']
+        if text.endswith(last_emoji):
+            text = text[:-len(last_emoji)].rstrip()
+        else:
+            break
+    return text
+
+
+def load_chunks(lines: list[str]) -> list[str]:
+    chunks = []
+    for line in lines:
+        segmenter = StreamingSegmenter()
+        chunks.extend(segmenter.feed(line))
+        chunks.extend(segmenter.flush())
+    return chunks
+
+
+def check_edge_cases() -> int:
+    rewriter = EmojiRewriter(EDGE_MAP)
+    failures = 0
+    for text, expected in EDGE_CASES.items():
+        got = rewriter.rewrite(text)
+        if got != expected:
+            failures += 1
+            print(f"  EDGE CASE: {text!r}\n    expected: {expected!r}\n    got:      {got!r}")
+    print(f"edge cases: {len(EDGE_CASES)} inputs, {failures} failures")
+    return failures
+
+
+def check(texts: list[str], label: str, max_report: int = 5) -> int:
+    speech_map = Config.emoji_map()
+    rewriter = get_emoji_rewriter()
+    failures = broken = 0
+    for text in texts:
+        expected = legacy_emoji_to_speech(text, speech_map)
+        got = rewriter.rewrite(text)
+        if got == expected:
+            continue
+        if expected.startswith(BROKEN_SEQUENCE) or expected.endswith(BROKEN_SEQUENCE):
+            broken += 1
+            continue
+        failures += 1
+        if failures <= max_report:
+            print(f"  MISMATCH ({label}): {text!r}\n    legacy:   {expected!r}\n    rewriter: {got!r}")
+    print(f"{label}: {len(texts)} inputs, {failures} mismatches ({broken} cut sequences left by the legacy loops)")
+    return failures
+
+
+def throughput(fn, texts: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return repeat * len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # The rewriter logs every replacement and trim at INFO
+    logging.disable(logging.INFO)
+
+    lines = load_ai_lines()
+    chunks = load_chunks(lines)
+    failures = check_edge_cases()
+    failures += check(lines, "chat_log lines") + check(chunks, "chat_log chunks")
+    if failures:
+        sys.exit(1)
+
+    speech_map = Config.emoji_map()
+    rewriter = get_emoji_rewriter()
+    legacy = throughput(lambda c: legacy_emoji_to_speech(c, speech_map), chunks, args.repeat)
+    fused = throughput(rewriter.rewrite, chunks, args.repeat)
+    print(f"\n{len(chunks)} speech chunks")
+    print(f"  legacy loops: {legacy:10.0f} chunks/s")
+    print(f"  rewriter:     {fused:10.0f} chunks/s  ({fused / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
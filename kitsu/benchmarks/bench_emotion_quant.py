@@ -0,0 +1,75 @@
+"""
+Speed and label agreement of the int8 GoEmotions backend against fp32.
+
+Cuts the AI lines in data/chat_log.txt into speech chunks the way the streaming
+path does, classifies every chunk with both backends, and reports per-chunk
+latency (one at a time and batched) plus how often the top label changes.
+
+    python -m benchmarks.bench_emotion_quant
+    python -m benchmarks.bench_emotion_quant --threads 4 --batch 8
+"""
+import argparse
+import time
+from collections import Counter
+
+import torch
+
+from ai.text_utils.segmenter import StreamingSegmenter
+from benchmarks.corpus import load_ai_lines
+from vtuber_ai.core.emotion import _top_label, build_emotion_classifier
+
+
+def load_chunks() -> list[str]:
+    chunks = []
+    for line in load_ai_lines():
+        segmenter = StreamingSegmenter()
+        chunks.extend(segmenter.feed(line))
+        chunks.extend(segmenter.flush())
+    return chunks
+
+
+def classify(classifier, chunks: list[str], batch: int) -> tuple[list[str], float]:
+    """Return labels and mean ms per chunk."""
+    labels = []
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for i in range(0, len(chunks), batch):
+            texts = chunks[i:i + batch]
+            results = classifier(texts, top_k=1, batch_size=len(texts), truncation=True)
+            labels.extend(_top_label(r) for r in results)
+    elapsed = time.perf_counter() - start
+    return labels, elapsed / len(chunks) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = torch default)")
+    parser.add_argument("--batch", type=int, default=8, help="batch size for the batched run")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    chunks = load_chunks()
+    print(f"{len(chunks)} chunks from data/chat_log.txt, {torch.get_num_threads()} threads")
+
+    results = {}
+    for backend in ("fp32", "int8"):
+        start = time.perf_counter()
+        classifier = build_emotion_classifier(backend)
+        load_s = time.perf_counter() - start
+        labels, single_ms = classify(classifier, chunks, 1)
+        _, batched_ms = classify(classifier, chunks, args.batch)
+        results[backend] = labels
+        print(f"{backend:>5}: load {load_s:6.2f}s | {single_ms:7.2f} ms/chunk single | "
+              f"{batched_ms:7.2f} ms/chunk batch={args.batch}")
+
+    fp32, int8 = results["fp32"], results["int8"]
+    agree = sum(a == b for a, b in zip(fp32, int8))
+    print(f"\nlabel agreement: {agree}/{len(chunks)} ({agree / len(chunks):.1%})")
+    changes = Counter((a, b) for a, b in zip(fp32, int8) if a != b)
+    for (a, b), count in changes.most_common(10):
+        print(f"  {a:>15} -> {b:<15} x{count}")
+
+
+if __name__ == "__main__":
+    main()
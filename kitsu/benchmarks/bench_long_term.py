@@ -0,0 +1,61 @@
+"""
+Recall latency of the long-term memory index.
+
+Builds a throwaway index of the chat log's exchanges, repeated until it holds
+--rows snippets, then times recall (query embedding + cosine top-k) for every
+viewer message in the log. Reports p50/p95 against LONG_TERM_MEMORY's latency
+budget, for float32 and float16 storage.
+
+    python -m benchmarks.bench_long_term
+    python -m benchmarks.bench_long_term --rows 100000 --embedder sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ai.long_term_memory import LongTermMemory, VectorIndex, load_embedder
+from benchmarks.corpus import load_user_lines
+from vtuber_ai.utils.file_ops import read_chat_log
+
+
+def build_index(directory: Path, embedder, dtype: str, rows: int) -> VectorIndex:
+    texts = [f"User: {e.question}\nAiri: {e.response}"[:500] for e in read_chat_log()]
+    vectors = embedder.encode(texts)
+    index = VectorIndex(directory, embedder.dim, embedder.name, dtype)
+    repeats = max(1, rows // len(texts))
+    for _ in range(repeats):
+        index.append(vectors, texts)
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--budget-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    embedder = load_embedder(args.embedder)
+    queries = load_user_lines()
+    for dtype in ("float32", "float16"):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = build_index(Path(tmp), embedder, dtype, args.rows)
+            memory = LongTermMemory(Path(tmp), embedder=args.embedder, dtype=dtype, latency_budget_ms=float("inf"))
+            memory.embedder, memory.index, memory._session_start = embedder, index, index.count
+            memory._ready.set()
+            timings = []
+            for query in queries:
+                start = time.perf_counter()
+                memory.recall(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            p95 = float(np.percentile(timings, 95))
+            print(f"{dtype}: {index.count} rows, recall p50 {statistics.median(timings):.2f} ms, "
+                  f"p95 {p95:.2f} ms (budget {args.budget_ms:.0f} ms{', OVER' if p95 > args.budget_ms else ''})")
+
+
+if __name__ == "__main__":
+    main()
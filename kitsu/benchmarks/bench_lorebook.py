@@ -0,0 +1,89 @@
+"""
+Lorebook trigger matching as the lorebook grows.
+
+Pads lorebook/lorebook.json with synthetic entries and matches every viewer
+message in data/chat_log.txt (plus the AI lines, as longer inputs) with a
+per-entry substring scan and with the compiled LorebookIndex. The matched
+injections must be identical; the index's µs/message should stay roughly
+flat while the scan grows with the number of entries.
+
+    python -m benchmarks.bench_lorebook
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import time
+
+from benchmarks.corpus import load_ai_lines, load_user_lines
+from lorebook.lore_index import POSITIONS, LorebookIndex, entry_triggers
+from lorebook.prompt_manager import LOREBOOK_PATH
+
+LOREBOOK_SIZES = (33, 250, 1000, 4000)
+
+
+def legacy_lore_for(lorebook: list[dict], message: str) -> dict[str, list[str]]:
+    """The per-entry scan: lowercase, test every trigger of every entry, sort per position."""
+    grouped = {}
+    for position in POSITIONS:
+        injections = []
+        for entry in lorebook:
+            if entry["position"] == position and any(t.lower() in message.lower() for t in entry_triggers(entry)):
+                injections.append((entry["priority"], entry["injection"]))
+        grouped[position] = [injection for _, injection in sorted(injections, key=lambda x: x[0])]
+    return grouped
+
+
+def padded_lorebook(base: list[dict], size: int, rng: random.Random) -> list[dict]:
+    lorebook = list(base)
+    while len(lorebook) < size:
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10))) for _ in range(3)]
+        lorebook.append({
+            "trigger": [words[0], f"{words[1]} {words[2]}"],
+            "injection": f"Synthetic lore about {words[0]}.",
+            "position": rng.choice(POSITIONS),
+            "priority": rng.randint(1, 20),
+        })
+    return lorebook
+
+
+def time_per_message(fn, messages: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(LOREBOOK_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    messages = load_user_lines() + load_ai_lines()
+    rng = random.Random(0)
+    print(f"{len(messages)} messages from data/chat_log.txt")
+    print(f"{'entries':>8} {'scan µs/msg':>12} {'index µs/msg':>13} {'build ms':>9} {'hits':>6}")
+    for size in LOREBOOK_SIZES:
+        lorebook = padded_lorebook(base, size, rng)
+        start = time.perf_counter()
+        index = LorebookIndex(lorebook)
+        build_ms = (time.perf_counter() - start) * 1000
+        hits = 0
+        for message in messages:
+            expected = legacy_lore_for(lorebook, message)
+            got = index.lore_for(message)
+            if got != expected:
+                print(f"MISMATCH at {size} entries for {message[:60]!r}:\n  scan:  {expected}\n  index: {got}")
+                sys.exit(1)
+            hits += sum(len(found) for found in got.values())
+        scan = time_per_message(lambda m: legacy_lore_for(lorebook, m), messages, args.repeat)
+        indexed = time_per_message(index.lore_for, messages, args.repeat)
+        print(f"{len(lorebook):>8} {scan:12.1f} {indexed:13.1f} {build_ms:9.1f} {hits:>6}")
+
+
+if __name__ == "__main__":
+    main()
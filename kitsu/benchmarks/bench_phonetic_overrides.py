@@ -0,0 +1,71 @@
+"""
+Cost of applying phonetic overrides as the override table grows.
+
+Pads the real pt table from config_phonetics.json with synthetic entries and
+applies it to the chat_log sentences with the legacy per-entry re.sub loop and
+with the compiled PhoneticOverrideMatcher. The matcher's µs/sentence should stay
+roughly flat; the legacy loop grows linearly (and worse once the table outgrows
+the re module's compile cache).
+
+    python -m benchmarks.bench_phonetic_overrides
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from ai.text_utils.speech_style import PhoneticOverrideMatcher
+from benchmarks.corpus import load_ai_lines
+from vtuber_ai.core.config_manager import Config
+
+TABLE_SIZES = (25, 100, 400, 1600)
+
+
+def legacy_apply(sentences: list[str], overrides: dict[str, str]) -> list[str]:
+    """The pre-matcher loop: one regex per entry, run over every sentence."""
+    for word, phon in overrides.items():
+        sentences = [re.sub(rf'\b{re.escape(word)}\b', phon, p) for p in sentences]
+    return sentences
+
+
+def padded_table(base: dict[str, str], size: int, rng: random.Random) -> dict[str, str]:
+    table = dict(base)
+    while len(table) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        if rng.random() < 0.2:
+            word += " " + "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 6)))
+        table[word] = word.upper()
+    return table
+
+
+def time_per_sentence(fn, sentences: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sentence in sentences:
+            fn([sentence])
+    return (time.perf_counter() - start) / (repeat * len(sentences)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sentences = [s for line in load_ai_lines() for s in re.split(r"(?<=[.!?])\s+", line) if s.strip()]
+    base = Config.phonetic_overrides().get("pt") or {}
+    rng = random.Random(0)
+    print(f"{len(sentences)} sentences from data/chat_log.txt")
+    print(f"{'entries':>8} {'legacy µs/sentence':>19} {'matcher µs/sentence':>20} {'build ms':>9}")
+    for size in TABLE_SIZES:
+        table = padded_table(base, size, rng)
+        legacy = time_per_sentence(lambda s: legacy_apply(s, table), sentences, args.repeat)
+        start = time.perf_counter()
+        matcher = PhoneticOverrideMatcher(table)
+        build_ms = (time.perf_counter() - start) * 1000
+        compiled = time_per_sentence(lambda s: [matcher.apply(p) for p in s], sentences, args.repeat)
+        print(f"{len(table):>8} {legacy:19.1f} {compiled:20.1f} {build_ms:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Golden-output check and throughput of preprocess_for_tts and the style half of
+process_text_for_speech against the chain as it was before its regexes were
+compiled at module level.
+
+The pre-hoist chain is reproduced here: the same steps in the same order, with
+the functions whose patterns were hoisted (remove_urls, remove_markers,
+remove_inline_code, interpret_actions, remove_control_chars, stretch_vowels,
+clean_tilde_tokens) as they were, passing pattern strings to re.sub per call.
+Every AI line in data/chat_log.txt, and every speech chunk cut from it, is run
+through both chains for each override language and for a set of voice styles
+covering every style rule, and every word of the log through both
+stretch_vowels (nothing in the chain calls it); any difference is printed and
+the script exits non-zero. Both chains share emoji_to_speech, so this isolates
+the hoisting from the emoji rewrite. Then chunks/s is reported for both.
+
+    python -m benchmarks.bench_preprocess
+    python -m benchmarks.bench_preprocess --repeat 10 --lang en
+"""
+import argparse
+import logging
+import re
+import sys
+import time
+from typing import Optional
+
+from ai.text_utils import speech_style
+from ai.text_utils.phonemes import emphasize_syllables, group_sentences
+from ai.text_utils.preprocessor import preprocess_for_tts
+from ai.text_utils.segmenter import StreamingSegmenter
+from ai.text_utils.speech_style import (
+    COMMON_ACTIONS, adjust_tempo, apply_consonant_strength, apply_intonation, apply_phonetic_overrides,
+    clean_tilde_tokens, ensure_punctuation, handle_emoji, stretch_vowels,
+)
+from benchmarks.corpus import load_ai_lines
+
+LANGS = (None, "en", "pt")
+# Styles exercising every rule the style half can take; merged into the live
+# VOICE_STYLE_DEFAULTS for the duration of the check
+CHECK_STYLES = {
+    "check_slow": {"tempo": "slow", "intonation": True, "consonant_strength": 1.3},
+    "check_fast": {"tempo": "fast", "consonant_strength": 0.8},
+    "check_drag": {"vowel_drag": True, "vowel_multiplier": 3, "intonation": True},
+}
+STYLES = ("neutral", *CHECK_STYLES)
+
+
+# -- the chain before the hoist -------------------------------------------
+
+def legacy_remove_urls(text: str) -> str:
+    return re.sub(r'https?://\S+', '[link]', text)
+
+
+def legacy_remove_inline_code(text: str) -> str:
+    return re.sub(r'`[^`]+`', '', text)
+
+
+def legacy_remove_control_chars(text: str) -> str:
+    return re.sub(r'[\x00-\x1F\x7F]', '', text)
+
+
+def legacy_remove_markers(text: str) -> str:
+    return re.sub(r"\*\*(.+?)\*\*", r"\1", text)
+
+
+def legacy_interpret_actions(text: str) -> str:
+    actions = COMMON_ACTIONS or {}
+    return re.sub(r'\*([^\*]+)\*', lambda m: actions.get(m.group(1), m.group(1)), text)
+
+
+def legacy_stretch_vowels(syllable: str, multiplier: int = 3) -> str:
+    return re.sub(r"([aeiouáéíóúâêôãõAEIOU])", lambda m: m.group(1) * multiplier, syllable)
+
+
+def legacy_clean_tilde_tokens(text: str) -> str:
+    cleaned = re.sub(r'([a-zA-Z])~', r'\1\1', text)
+    return cleaned.replace('~', '')
+
+
+def legacy_preprocess(text: str, lang: Optional[str]) -> str:
+    text = legacy_remove_urls(text)
+    text = legacy_remove_markers(text)
+    text = legacy_remove_inline_code(text)
+    text = handle_emoji(text, None)
+    text = legacy_interpret_actions(text)
+    text = legacy_remove_control_chars(text)
+    text = ensure_punctuation(text)
+    sentences = group_sentences(text)
+    sentences = apply_phonetic_overrides(sentences, lang)
+    return ' '.join(sentences)
+
+
+def style_half(text: str, style: str, clean_tildes, use_phonemes: bool = False) -> str:
+    """The style-based part of process_text_for_speech."""
+    styles = speech_style.VOICE_STYLE_DEFAULTS or {}
+    if styles.get(style, {}).get("consonant_strength", 1.0) != 1.0:
+        text = apply_consonant_strength(text, style)
+    if styles.get(style, {}).get("vowel_drag", False) and not use_phonemes:
+        text = emphasize_syllables(text, style, styles[style].get("vowel_multiplier", 2) if styles.get(style) else 2)
+    if styles.get(style, {}).get("intonation", False):
+        text = apply_intonation(text, style)
+    text = adjust_tempo(text, style)
+    return clean_tildes(text)
+
+
+def legacy_chain(text: str, lang: Optional[str], style: str) -> str:
+    return style_half(legacy_preprocess(text, lang), style, legacy_clean_tilde_tokens)
+
+
+def current_chain(text: str, lang: Optional[str], style: str) -> str:
+    return style_half(preprocess_for_tts(text, None, lang), style, clean_tilde_tokens)
+
+
+# -- check and timing -----------------------------------------------------
+
+def load_chunks(lines: list[str]) -> list[str]:
+    chunks = []
+    for line in lines:
+        segmenter = StreamingSegmenter()
+        chunks.extend(segmenter.feed(line))
+        chunks.extend(segmenter.flush())
+    return chunks
+
+
+def check(texts: list[str], label: str, max_report: int = 5) -> int:
+    failures = 0
+    for text in texts:
+        for lang in LANGS:
+            for style in STYLES:
+                expected, got = legacy_chain(text, lang, style), current_chain(text, lang, style)
+                if got != expected:
+                    failures += 1
+                    if failures <= max_report:
+                        print(f"  MISMATCH ({label}, lang={lang}, style={style}): {text!r}\n"
+                              f"    pre-hoist: {expected!r}\n    current:   {got!r}")
+    print(f"{label}: {len(texts)} inputs x {len(LANGS)} langs x {len(STYLES)} styles, {failures} mismatches")
+    return failures
+
+
+def check_stretch_vowels(lines: list[str], max_report: int = 5) -> int:
+    words = sorted({word for line in lines for word in line.split()})
+    failures = 0
+    for word in words:
+        for multiplier in (2, 3):
+            expected, got = legacy_stretch_vowels(word, multiplier), stretch_vowels(word, multiplier)
+            if got != expected:
+                failures += 1
+                if failures <= max_report:
+                    print(f"  MISMATCH (stretch_vowels x{multiplier}): {word!r}\n"
+                          f"    pre-hoist: {expected!r}\n    current:   {got!r}")
+    print(f"stretch_vowels: {len(words)} words x 2 multipliers, {failures} mismatches")
+    return failures
+
+
+def throughput(fn, texts: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return repeat * len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lang", default="pt", help="override language for the throughput run")
+    args = parser.parse_args()
+    # emoji_to_speech logs every replacement and trim at INFO
+    logging.disable(logging.INFO)
+
+    lines = load_ai_lines()
+    chunks = load_chunks(lines)
+    styles = speech_style.VOICE_STYLE_DEFAULTS
+    added = [name for name in CHECK_STYLES if name not in styles]
+    styles.update({name: CHECK_STYLES[name] for name in added})
+    try:
+        failures = check(lines, "chat_log lines") + check(chunks, "chat_log chunks")
+    finally:
+        for name in added:
+            del styles[name]
+    failures += check_stretch_vowels(lines)
+    if failures:
+        sys.exit(1)
+
+    for label, texts in (("speech chunks", chunks), ("whole lines", lines)):
+        legacy = throughput(lambda c: legacy_chain(c, args.lang, "neutral"), texts, args.repeat)
+        current = throughput(lambda c: current_chain(c, args.lang, "neutral"), texts, args.repeat)
+        print(f"\n{len(texts)} {label}, lang={args.lang}")
+        print(f"  pre-hoist chain: {legacy:10.0f} chunks/s")
+        print(f"  current chain:   {current:10.0f} chunks/s  ({current / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
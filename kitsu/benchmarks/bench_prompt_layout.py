@@ -0,0 +1,72 @@
+"""
+Time-to-first-token per prompt layout against a running Ollama server.
+
+Replays the viewer messages from data/chat_log.txt as a conversation for each
+PROMPT_LAYOUT, building prompts through ConversationService (no TTS), and
+reports per turn the wall-clock time to first token and the server's prompt
+eval count/duration from the final stream message. With a prefix-stable
+layout the evaluated prompt tokens should drop after the first turn.
+
+    python -m benchmarks.bench_prompt_layout --turns 6
+    python -m benchmarks.bench_prompt_layout --layouts legacy chat --max-tokens 32
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.corpus import load_user_lines
+from vtuber_ai.core.prompt_layout import PROMPT_LAYOUTS, message_text
+from vtuber_ai.services.conversation_service import ConversationService
+from vtuber_ai.services.ollama_client import get_ollama_client
+
+
+def run_layout(layout: str, messages: list[str], max_tokens: int) -> list[tuple[float, int, float]]:
+    """Return (ttft seconds, prompt_eval_count, prompt_eval_ms) per turn."""
+    client = get_ollama_client()
+    service = ConversationService()
+    service.prompt_layout = layout
+    results = []
+    for user_message in messages:
+        service.add_user_message(user_message)
+        request = service.build_prompt(user_message)
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        options = {"num_predict": max_tokens} if max_tokens > 0 else None
+        for message in request.stream(client, options=options):
+            part = message_text(message)
+            if part and ttft is None:
+                ttft = time.perf_counter() - start
+            parts.append(part)
+        service.add_ai_message("".join(parts))
+        timings = client.last_timings
+        if timings is None:
+            results.append((ttft or 0.0, 0, 0.0))
+        else:
+            results.append((ttft or 0.0, timings.prompt_eval_count, timings.prompt_eval_ms))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--layouts", nargs="+", default=list(PROMPT_LAYOUTS), choices=PROMPT_LAYOUTS)
+    parser.add_argument("--max-tokens", type=int, default=48, help="num_predict per turn (0 = unlimited)")
+    args = parser.parse_args()
+
+    messages = load_user_lines()[:args.turns]
+    if not get_ollama_client().ping():
+        raise SystemExit("Ollama is not reachable; start it first (see OLLAMA_HOST).")
+    for layout in args.layouts:
+        results = run_layout(layout, messages, args.max_tokens)
+        print(f"\n{layout}")
+        print(f"  {'turn':>4} {'TTFT ms':>9} {'prompt tok':>11} {'prompt eval ms':>15}")
+        for turn, (ttft, count, eval_ms) in enumerate(results, 1):
+            print(f"  {turn:>4} {ttft * 1000:9.0f} {count:>11} {eval_ms:15.0f}")
+        later = results[1:] or results
+        print(f"  median after first turn: TTFT {statistics.median(r[0] for r in later) * 1000:.0f} ms, "
+              f"prompt eval {statistics.median(r[2] for r in later):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
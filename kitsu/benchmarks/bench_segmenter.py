@@ -0,0 +1,148 @@
+"""
+Per-token cost of splitting a streamed response into TTS chunks.
+
+Replays token streams (recorded Ollama NDJSON files, or the AI lines from
+data/chat_log.txt cut into token-sized pieces) through the legacy rescanning
+splitter and through StreamingSegmenter, at increasing response lengths. The
+segmenter's µs/token should stay flat as responses grow; the legacy one grows
+with the buffer.
+
+Before timing, the chat_log lines are also segmented with the adaptive
+chunker's caps to check the length-cap cuts: a cut at a clause boundary must
+not leave a chunk shorter than first_clause_chars (an opening "Hey there,"
+starves playback while the next chunk synthesizes). Any violation is printed
+and the script exits non-zero.
+
+    python -m benchmarks.bench_segmenter
+    python -m benchmarks.bench_segmenter --stream recorded_turn.ndjson
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+from ai.text_utils.phonemes import safe_to_split
+from ai.text_utils.segmenter import CLAUSE_CHARS, StreamingSegmenter
+from benchmarks.corpus import load_ai_lines, load_recorded_stream, tokenize_like_ollama
+
+LENGTHS = (250, 500, 1000, 2000, 4000)
+# AdaptiveChunker defaults, with its slack-based cap at its ceiling
+CAP_CUT_SETTINGS = {"first_clause_chars": 20, "max_chars": 150, "first_max_chars": 60}
+# Openings whose first clause comes well before the first-chunk cap -> expected first chunk
+CAP_CUT_CASES = {
+    "Hey there, chat! I see one of our LUVs (LUA User Viewers) is here. Hello!":
+        "Hey there, chat! I see one of our LUVs (LUA User Viewers)",
+    "Oh, you want the whole story about the time the stream crashed twice in a row?":
+        "Oh, you want the whole story about the time the stream",
+}
+
+
+class LegacyBufferSplitter:
+    """The pre-segmenter process_buffer loop, rescanning the buffer per token."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, part: str) -> list[str]:
+        self.buffer += part
+        buffer = self.buffer
+        split_points = []
+        i = 0
+        while i < len(buffer):
+            if buffer[i] in ".!?\n":
+                if buffer[i] == '\n' or safe_to_split(buffer, i):
+                    split_points.append(i)
+            i += 1
+        chunks = []
+        last_split = 0
+        for idx in split_points:
+            chunk = buffer[last_split:idx + 1].strip()
+            if chunk:
+                chunks.append(chunk)
+            last_split = idx + 1
+        self.buffer = buffer[last_split:].lstrip()
+        return chunks
+
+    def flush(self) -> list[str]:
+        tail = self.buffer.strip()
+        self.buffer = ""
+        return [tail] if tail else []
+
+
+def _stretch(tokens: list[str], length: int) -> list[str]:
+    out = []
+    while len(out) < length:
+        out.extend(tokens)
+    return out[:length]
+
+
+def _time_per_token(splitter, tokens: list[str]) -> float:
+    start = time.perf_counter()
+    for token in tokens:
+        splitter.feed(token)
+    splitter.flush()
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+
+def _segment(text: str) -> list[str]:
+    segmenter = StreamingSegmenter(**CAP_CUT_SETTINGS)
+    chunks = []
+    for token in tokenize_like_ollama(text):
+        chunks.extend(segmenter.feed(token))
+    chunks.extend(segmenter.flush())
+    return chunks
+
+
+def check_cap_cuts(lines: list[str], max_report: int = 5) -> int:
+    failures = 0
+    for text, expected in CAP_CUT_CASES.items():
+        got = _segment(text)[0]
+        if got != expected:
+            failures += 1
+            print(f"  CAP CUT: {text!r}\n    expected first chunk: {expected!r}\n    got:                  {got!r}")
+    chunks = [chunk for line in lines for chunk in _segment(line)]
+    short = [c for c in chunks if c[-1] in CLAUSE_CHARS and len(c) < CAP_CUT_SETTINGS["first_clause_chars"]]
+    for chunk in short[:max_report]:
+        print(f"  SHORT CLAUSE CUT: {chunk!r}")
+    failures += len(short)
+    print(f"cap cuts: {len(CAP_CUT_CASES)} openings and {len(chunks)} chat_log chunks, {failures} failures")
+    return failures
+
+
+def run(base_tokens: list[str], label: str, max_legacy: int) -> None:
+    print(f"\n== {label} ==")
+    print(f"{'tokens':>8} {'legacy µs/token':>16} {'segmenter µs/token':>19}")
+    for length in LENGTHS:
+        tokens = _stretch(base_tokens, length)
+        legacy = _time_per_token(LegacyBufferSplitter(), tokens) if length <= max_legacy else None
+        segmented = _time_per_token(StreamingSegmenter(), tokens)
+        legacy_str = f"{legacy:16.2f}" if legacy is not None else f"{'skipped':>16}"
+        print(f"{length:>8} {legacy_str} {segmented:19.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stream", type=Path, action="append", default=[],
+                        help="recorded Ollama NDJSON stream to replay (repeatable)")
+    parser.add_argument("--max-legacy-tokens", type=int, default=2000,
+                        help="skip the quadratic legacy splitter above this length")
+    args = parser.parse_args()
+
+    if check_cap_cuts(load_ai_lines()):
+        sys.exit(1)
+
+    if args.stream:
+        tokens = [part for path in args.stream for part in load_recorded_stream(path)]
+        source = ", ".join(str(p) for p in args.stream)
+    else:
+        tokens = [t for line in load_ai_lines() for t in tokenize_like_ollama(line + "\n")]
+        source = "data/chat_log.txt"
+
+    run(tokens, f"punctuated ({source})", args.max_legacy_tokens)
+    unpunctuated = [re.sub(r"[.!?\n]", "", t) or " " for t in tokens]
+    run(unpunctuated, f"unpunctuated run ({source})", args.max_legacy_tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Per-stage cost of the text_utils speech preprocessing that runs for every TTS chunk.
+
+The AI lines in data/chat_log.txt are cut into speech chunks the way the
+streaming path does, and each stage is run over all of them in isolation:
+clean_artifacts, safe_to_split (at every punctuation mark), emoji_to_speech,
+apply_phonetic_overrides, emphasize_syllables, preprocess_for_tts and the full
+process_text_for_speech chain. Model calls are stubbed so only text processing
+is measured: emotion classification returns a label derived from the text,
+langdetect is replaced by a keyword check, translation is the identity, and the
+new-emotion file isn't written. Latency tracing is switched off for the run.
+
+For each stage it reports µs per chunk (best of --repeat passes) and, in a
+separate tracemalloc pass, the mean peak of memory allocated while handling a
+chunk plus what the pass left allocated (cache growth or leaks).
+
+--save-baseline writes the results to a JSON file; --baseline compares against
+one and exits non-zero if any stage got slower or allocates more than
+--tolerance allows. Baselines are machine specific, so compare runs from the
+same machine.
+
+    python -m benchmarks.bench_text_utils
+    python -m benchmarks.bench_text_utils --save-baseline benchmarks/baselines/text_utils.json
+    python -m benchmarks.bench_text_utils --baseline benchmarks/baselines/text_utils.json --tolerance 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import zlib
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable
+from unittest import mock
+
+from ai.text_utils import language, preprocessor
+from ai.text_utils.cleaning import clean_artifacts
+from ai.text_utils.phonemes import emphasize_syllables, group_sentences, safe_to_split
+from ai.text_utils.preprocessor import preprocess_for_tts, process_text_for_speech
+from ai.text_utils.segmenter import SPLIT_CHARS, StreamingSegmenter
+from ai.text_utils.speech_style import apply_phonetic_overrides, emoji_to_speech
+from benchmarks.corpus import load_ai_lines
+from vtuber_ai.utils.tracing import get_tracer
+
+STUB_EMOTIONS = ("neutral", "joy", "amusement", "excitement", "sadness", "surprise", "anger", "curiosity")
+PT_MARKERS = ("ã", "õ", "ç", "você", " não", " é ", "obrigad")
+
+
+def stub_emotion(text: str) -> str:
+    """Deterministic stand-in for the GoEmotions classifier."""
+    return STUB_EMOTIONS[zlib.crc32(text.encode("utf-8")) % len(STUB_EMOTIONS)]
+
+
+def stub_detect(text: str) -> str:
+    """Keyword stand-in for langdetect.detect."""
+    lowered = text.lower()
+    return "pt" if any(marker in lowered for marker in PT_MARKERS) else "en"
+
+
+def stub_models() -> ExitStack:
+    stack = ExitStack()
+    stack.enter_context(mock.patch.object(preprocessor, "analyze_emotion", stub_emotion))
+    stack.enter_context(mock.patch.object(preprocessor, "add_emotion_to_file", lambda emotion, filename="default": None))
+    stack.enter_context(mock.patch.object(language, "detect", stub_detect))
+    stack.enter_context(mock.patch.object(language, "generate_response_again", lambda text: text))
+    stack.enter_context(mock.patch.object(get_tracer(), "enabled", False))
+    return stack
+
+
+def load_chunks(lines: list[str]) -> list[str]:
+    chunks = []
+    for line in lines:
+        segmenter = StreamingSegmenter()
+        chunks.extend(segmenter.feed(line))
+        chunks.extend(segmenter.flush())
+    return chunks
+
+
+def split_points(chunk: str) -> list[int]:
+    return [i for i, ch in enumerate(chunk) if ch in SPLIT_CHARS or ch in ",;:"]
+
+
+def build_stages(lang: str) -> dict[str, tuple[Callable[[str], object], Callable[[object], object]]]:
+    """Stage name -> (prepare input from a chunk, untimed; the timed call)."""
+    return {
+        "clean_artifacts": (lambda c: c, clean_artifacts),
+        "safe_to_split": (
+            lambda c: (c, split_points(c)),
+            lambda item: [safe_to_split(item[0], i) for i in item[1]],
+        ),
+        "emoji_to_speech": (lambda c: c, emoji_to_speech),
+        "apply_phonetic_overrides": (group_sentences, lambda sentences: apply_phonetic_overrides(sentences, lang)),
+        "emphasize_syllables": (lambda c: c, lambda c: emphasize_syllables(c, lang)),
+        "preprocess_for_tts": (lambda c: (c, stub_emotion(c)), lambda item: preprocess_for_tts(item[0], item[1], lang)),
+        "process_text_for_speech": (lambda c: c, process_text_for_speech),
+    }
+
+
+def time_stage(fn: Callable, inputs: list, repeat: int) -> float:
+    """Best per-item time over repeat passes, in µs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            fn(item)
+        best = min(best, (time.perf_counter() - start) / len(inputs))
+    return best * 1e6
+
+
+def allocations(fn: Callable, inputs: list) -> tuple[float, int]:
+    """(mean peak bytes allocated while handling one item, bytes still allocated after the pass)."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        peaks = 0
+        for item in inputs:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn(item)
+            peaks += tracemalloc.get_traced_memory()[1] - current
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peaks / len(inputs), after - before
+
+
+def run(chunks: list[str], lang: str, repeat: int, only: list[str]) -> dict[str, dict]:
+    results = {}
+    for name, (prepare, fn) in build_stages(lang).items():
+        if only and name not in only:
+            continue
+        inputs = [prepare(c) for c in chunks]
+        for item in inputs:  # warm-up: lazy singletons, compiled patterns, caches
+            fn(item)
+        us = time_stage(fn, inputs, repeat)
+        peak, retained = allocations(fn, inputs)
+        results[name] = {"us_per_chunk": us, "peak_bytes_per_chunk": peak, "retained_bytes": retained}
+    return results
+
+
+def print_results(results: dict[str, dict], baseline: dict[str, dict]) -> None:
+    width = max(len(name) for name in results)
+    header = f"{'stage':<{width}}  {'µs/chunk':>10}  {'peak B/chunk':>12}  {'retained B':>10}"
+    print(header + ("  vs baseline" if baseline else ""))
+    for name, r in results.items():
+        line = f"{name:<{width}}  {r['us_per_chunk']:>10.1f}  {r['peak_bytes_per_chunk']:>12.0f}  {r['retained_bytes']:>10d}"
+        base = baseline.get(name)
+        if base:
+            line += f"  {r['us_per_chunk'] / base['us_per_chunk']:.2f}x time"
+            if base["peak_bytes_per_chunk"]:
+                line += f", {r['peak_bytes_per_chunk'] / base['peak_bytes_per_chunk']:.2f}x peak"
+        print(line)
+
+
+def regressions(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key, label in (("us_per_chunk", "time"), ("peak_bytes_per_chunk", "peak allocation")):
+            if base[key] and r[key] > base[key] * (1 + tolerance):
+                found.append(f"{name}: {label} {r[key]:.1f} vs baseline {base[key]:.1f} (+{r[key] / base[key] - 1:.0%})")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per stage (best is kept)")
+    parser.add_argument("--lang", default="pt", help="language passed to the language-specific stages")
+    parser.add_argument("--stage", action="append", default=[], help="only run this stage (repeatable)")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", type=Path, help="write the results as a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth over the baseline")
+    args = parser.parse_args()
+
+    chunks = load_chunks(load_ai_lines())
+    print(f"{len(chunks)} chunks from data/chat_log.txt, lang={args.lang}, best of {args.repeat}\n")
+    with stub_models():
+        results = run(chunks, args.lang, args.repeat, args.stage)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "chunks": len(chunks),
+                "lang": args.lang, "repeat": args.repeat}
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "stages": results}, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if baseline:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print(f"\n{len(found)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shared corpus helpers for benchmarks: AI lines from the chat log and token streams
+shaped like Ollama's NDJSON output.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Iterator, Optional
+
+KITSU_DIR = Path(__file__).resolve().parents[1]
+CHAT_LOG_PATH = KITSU_DIR / "data" / "chat_log.txt"
+
+_TIMESTAMP_RE = re.compile(r"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]$")
+# Roughly the granularity of Mistral's streamed tokens: word pieces with their
+# leading space, single punctuation marks and newlines.
+_TOKEN_RE = re.compile(r" ?[^\W\d_]{1,6}| ?\d{1,3}| ?[^\w\s]| ?_|\s+", re.UNICODE)
+
+
+def load_ai_lines(path: Optional[Path] = None) -> list[str]:
+    """
+    Return every AI response from the legacy chat log format:
+    "[timestamp]" / "Você: ..." / "Airi: ..." blocks, where replies can span lines.
+    """
+    path = path or CHAT_LOG_PATH
+    lines: list[str] = []
+    current: Optional[list[str]] = None
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            line = raw.rstrip("\n")
+            if _TIMESTAMP_RE.match(line):
+                if current is not None:
+                    lines.append("\n".join(current).strip())
+                current = None
+            elif line.startswith("Airi:"):
+                current = [line[len("Airi:"):]]
+            elif current is not None:
+                current.append(line)
+    if current is not None:
+        lines.append("\n".join(current).strip())
+    return [line for line in lines if line]
+
+
+def load_user_lines(path: Optional[Path] = None) -> list[str]:
+    """Return every viewer message ("Você: ...") from the legacy chat log format."""
+    path = path or CHAT_LOG_PATH
+    with open(path, "r", encoding="utf-8") as f:
+        return [line[len("Você:"):].strip() for line in f if line.startswith("Você:") and line[len("Você:"):].strip()]
+
+
+def tokenize_like_ollama(text: str) -> list[str]:
+    """Split text into pieces that approximate streamed LLM tokens."""
+    return _TOKEN_RE.findall(text)
+
+
+def load_recorded_stream(path: Path) -> list[str]:
+    """Read the "response" parts of a recorded Ollama /api/generate NDJSON stream."""
+    parts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                parts.append(json.loads(line).get("response", ""))
+    return parts
+
+
+def synthetic_streams(lines: list[str]) -> Iterator[list[str]]:
+    """Yield one token stream per AI line."""
+    for line in lines:
+        yield tokenize_like_ollama(line)
@@ -0,0 +1,133 @@
+"""
+Compiled lorebook index.
+
+All trigger phrases go into one Aho-Corasick automaton, so a message is
+matched against the whole lorebook in a single pass whose cost depends on the
+message length and the number of hits, not on the number of entries.
+Injections are sorted by priority once, at build time, and grouped by position.
+"""
+from collections import deque
+from typing import Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+POSITIONS = ("before_history", "before_prompt")
+
+
+class TriggerAutomaton:
+    """Aho-Corasick automaton over lowercased phrases; each phrase carries a value."""
+
+    def __init__(self, phrases: Iterable[tuple[str, int]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for phrase, value in phrases:
+            self._add(phrase, value)
+        self._link()
+
+    def _add(self, phrase: str, value: int) -> None:
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        if value not in self._out[node]:
+            self._out[node] += (value,)
+
+    def _link(self) -> None:
+        """Breadth-first pass setting failure links and merging outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                if self._out[self._fail[child]]:
+                    self._out[child] += tuple(v for v in self._out[self._fail[child]] if v not in self._out[child])
+
+    def search(self, text: str) -> set[int]:
+        """Values of every phrase occurring anywhere in text (already lowercased)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def entry_triggers(entry: dict) -> list[str]:
+    """An entry's trigger phrases; "trigger" may be a single string or a list."""
+    trigger = entry.get("trigger") or []
+    if isinstance(trigger, str):
+        trigger = [trigger]
+    return [t for t in trigger if isinstance(t, str) and t.strip()]
+
+
+class LorebookIndex:
+    def __init__(self, entries: list[dict]):
+        self.entries = entries
+        self.triggers: list[str] = []  # every trigger phrase, original casing
+        phrase_ids: dict[str, int] = {}
+        self._phrase_entries: list[list[int]] = []  # phrase id -> entry ids
+        for entry_id, entry in enumerate(entries):
+            for trigger in entry_triggers(entry):
+                key = trigger.lower()
+                phrase_id = phrase_ids.get(key)
+                if phrase_id is None:
+                    phrase_id = phrase_ids[key] = len(self.triggers)
+                    self.triggers.append(trigger)
+                    self._phrase_entries.append([])
+                self._phrase_entries[phrase_id].append(entry_id)
+        self._phrase_ids = phrase_ids
+        self._automaton = TriggerAutomaton(phrase_ids.items())
+
+        # Entries pre-sorted by priority (stable for equal priorities). A match is then
+        # ordered by rank alone, without touching the rest of the lorebook
+        order = sorted(range(len(entries)), key=lambda i: entries[i].get("priority", 0))
+        self._rank = {entry_id: rank for rank, entry_id in enumerate(order)}
+        self._lore = [(entry.get("position"), entry.get("injection", "")) for entry in entries]
+        logger.debug(f"[Lorebook] Indexed {len(self.triggers)} triggers across {len(entries)} entries")
+
+    def _entries_for_phrases(self, phrase_ids: Iterable[int]) -> set[int]:
+        return {entry_id for phrase_id in phrase_ids for entry_id in self._phrase_entries[phrase_id]}
+
+    def match(self, message: str) -> set[int]:
+        """IDs (positions in the lorebook) of entries with a trigger phrase in message."""
+        return self._entries_for_phrases(self._automaton.search(message.lower()))
+
+    def match_triggers(self, message: str) -> list[str]:
+        """Trigger phrases found in message, in lorebook order."""
+        return [self.triggers[i] for i in sorted(self._automaton.search(message.lower()))]
+
+    def entries_for_triggers(self, triggers: Iterable[str]) -> set[int]:
+        """IDs of entries owning any of the given trigger phrases (case-insensitive)."""
+        ids = (self._phrase_ids.get(t.lower()) for t in triggers if isinstance(t, str))
+        return self._entries_for_phrases(i for i in ids if i is not None)
+
+    def injections(self, entry_ids: Iterable[int], position: str) -> list[str]:
+        """Injections of the given entries at position, sorted by priority."""
+        return [
+            self._lore[i][1] for i in sorted(entry_ids, key=self._rank.__getitem__)
+            if self._lore[i][0] == position
+        ]
+
+    def lore_for(self, message: str) -> dict[str, list[str]]:
+        """Matched injections for message grouped by position, each group sorted by priority."""
+        grouped: dict[str, list[str]] = {position: [] for position in POSITIONS}
+        for entry_id in sorted(self.match(message), key=self._rank.__getitem__):
+            position, injection = self._lore[entry_id]
+            grouped.setdefault(position, []).append(injection)
+        return grouped
@@ -2,45 +2,62 @@ import os
 from pathlib import Path
 import json
 import logging
+from typing import Optional
+
+from lorebook.lore_index import LorebookIndex
 
 logger = logging.getLogger(__name__)
 
 # Always use the directory of this file for lorebook files
 LOREBOOK = []
 PREDEFINED_KEYWORDS = []
+LOREBOOK_INDEX: Optional[LorebookIndex] = None
 _TEMPLATE_CACHE = None
 LOREBOOK_DIR = Path(__file__).parent
 LOREBOOK_PATH = LOREBOOK_DIR / "lorebook.json"
 
 def load_lorebook() -> list[dict]:
     """
-    Load the lorebook from a JSON file.
+    Load the lorebook from a JSON file and compile its trigger index.
     """
+    global LOREBOOK, PREDEFINED_KEYWORDS, LOREBOOK_INDEX
     try:
         with open(LOREBOOK_PATH, "r", encoding="utf-8") as f:
-            global LOREBOOK, PREDEFINED_KEYWORDS
             LOREBOOK = json.load(f)
-            PREDEFINED_KEYWORDS = [entry["trigger"] for entry in LOREBOOK]  # Extract triggers
-            return LOREBOOK
     except FileNotFoundError:
         logger.warning(f"Lorebook file not found: {LOREBOOK_PATH}")
-        return []
+        LOREBOOK = []
     except Exception as e:
         logger.error(f"Error loading lorebook: {e}")
-        return []
+        LOREBOOK = []
+    LOREBOOK_INDEX = LorebookIndex(LOREBOOK)
+    PREDEFINED_KEYWORDS = LOREBOOK_INDEX.triggers  # Extract triggers
+    return LOREBOOK
+
+def get_lorebook_index() -> LorebookIndex:
+    """
+    Return the compiled lorebook index, loading the lorebook on first use.
+    """
+    if LOREBOOK_INDEX is None:
+        load_lorebook()
+    return LOREBOOK_INDEX
 
 def get_lore_injections(triggers: list[str], position: str) -> list[str]:
     """
     Retrieve lore injections based on triggers and position.
     """
-    injections = []
-    for entry in LOREBOOK:
-        # Check if any trigger in the entry matches any trigger in the input list
-        if any(t.lower() in [trigger.lower() for trigger in triggers] for t in entry["trigger"]) and entry["position"] == position:
-            injections.append((entry["priority"], entry["injection"]))
-    # Sort by priority and return only the injections
+    index = get_lorebook_index()
+    injections = index.injections(index.entries_for_triggers(triggers), position)
     logger.debug(f"Lore injections for position '{position}': {len(injections)} found.")
-    return [injection for _, injection in sorted(injections, key=lambda x: x[0])]
+    return injections
+
+def get_lore_for_message(message: str) -> dict[str, list[str]]:
+    """
+    Lore injections triggered by a message, grouped by position and sorted by priority.
+    """
+    lore = get_lorebook_index().lore_for(message)
+    logger.debug(f"Lore injections: { {position: len(found) for position, found in lore.items()} }")
+    return lore
 
 def load_prompt(filename: str) -> str:
     path = os.path.join(LOREBOOK_DIR, filename)
@@ -1,9 +1,16 @@
 import sys
 
-from ai.memory_module import ConversationMemory
-from ai.tts_module import get_tts
-from vtuber_ai.services.console_app import ConsoleApp
+from vtuber_ai.utils.startup import startup_report, prefetch
+
+with startup_report.measure("import memory + TTS modules"):
+    from ai.memory_module import ConversationMemory
+    from ai.tts_module import get_tts, get_player
+with startup_report.measure("import console app (conversation service, pipeline, lorebook)"):
+    from vtuber_ai.services.console_app import ConsoleApp
 from vtuber_ai.services.ollama_manager import start_ollama, get_ollama_exit_code
+from vtuber_ai.core.config_manager import Config
+from vtuber_ai.core.emotion import get_emotion_classifier
+from vtuber_ai.utils.profiling import get_profiler, start_configured_profiling
 import logging
 from colorlog import ColoredFormatter
 
@@ -41,13 +48,26 @@ memory = None
 
 def main() -> None:
     
-    global tts, memory
+    global memory
 
-    tts = get_tts()
-    start_ollama()
+    # Heavy models load in the background while Ollama starts and the user types;
+    # anything not prefetched is loaded on first use instead.
+    if Config.get("PREFETCH_MODELS", True, warn=False):
+        prefetch(
+            {
+                "prefetch: emotion classifier": get_emotion_classifier,
+                "prefetch: TTS model": get_tts,
+                "prefetch: audio device": get_player,
+            },
+            on_done=lambda: startup_report.log("Model prefetch finished"),
+        )
+    with startup_report.measure("Ollama check/start"):
+        start_ollama()
 
-    app = ConsoleApp()
+    with startup_report.measure("console app init (memory, lorebook, persona)"):
+        app = ConsoleApp()
     memory = app.conversation_service.memory
+    startup_report.log()
     root_logger.info("\033[93m✨ VTuber Airi is online! Ask anything (type 'exit' to quit, '/help' for commands).\033[0m")
     app.run()
 
@@ -64,14 +84,11 @@ def exit_program() -> None:
 # Entry Point
 # =====================
 if __name__ == "__main__":
-    import cProfile
-    import pstats
-    profiler = cProfile.Profile()
-    profiler.enable()
+    # Off unless PROFILING["mode"] says otherwise; /profile starts it for a few turns
+    start_configured_profiling()
     try:
         main()
     finally:
-        profiler.disable()
-        stats = pstats.Stats(profiler).sort_stats('cumtime')
-        stats.print_stats(30)
+        get_profiler().stop()
+        save_facts_on_exit()
         get_ollama_exit_code()
@@ -0,0 +1,199 @@
+"""
+Adaptive sizing of the text chunks handed to the speech pipeline.
+
+Viewers notice time-to-first-audio most, so the first chunk of a response ends
+at the first clause boundary (StreamingSegmenter's first_clause_chars), or at a
+word boundary once it reaches first_max_chars, and is spoken right away. After
+that, longer chunks synthesize more efficiently, so AdaptiveChunker keeps
+merging finished sentences for as long as the audio already queued ahead of
+them covers the time it expects to need to synthesize the merged chunk plus one
+more sentence. No chunk is longer than RESPONSE_BUFFER_THRESHOLD characters:
+the segmenter cuts longer sentences at a word boundary (unless an *emote* is
+still open) and merging stops short of it.
+
+The expectation comes from SynthesisRate, which the speech pipeline feeds with
+the measured synthesis time and audio length of each chunk it synthesizes.
+CHUNKING supplies the starting estimates used before any measurements exist.
+"""
+from collections import deque
+from typing import Callable, Optional
+import threading
+import logging
+
+from ai.text_utils.segmenter import StreamingSegmenter
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNTH_S_PER_CHAR = 0.02
+DEFAULT_AUDIO_S_PER_CHAR = 0.065
+RATE_SAMPLES = 50
+# Used until a response has produced a sentence to measure
+DEFAULT_SENTENCE_CHARS = 60
+
+
+class SynthesisRate:
+    """
+    Running estimate of synthesis time and audio length as a function of chunk
+    length. Synthesis time is fitted as overhead + per-char cost over the
+    recent chunks, which captures VITS getting cheaper per char on longer input.
+    """
+
+    def __init__(
+        self,
+        synth_s_per_char: float = DEFAULT_SYNTH_S_PER_CHAR,
+        audio_s_per_char: float = DEFAULT_AUDIO_S_PER_CHAR,
+    ):
+        self._samples: deque[tuple[int, float, float]] = deque(maxlen=RATE_SAMPLES)
+        self._lock = threading.Lock()
+        self.overhead_s = 0.0
+        self.synth_s_per_char = synth_s_per_char
+        self.audio_s_per_char = audio_s_per_char
+
+    @property
+    def measured(self) -> int:
+        return len(self._samples)
+
+    def observe(self, chars: int, synth_s: float, audio_s: float) -> None:
+        """Record one synthesized chunk (cache hits should not be reported)."""
+        if chars <= 0 or audio_s <= 0:
+            return
+        with self._lock:
+            self._samples.append((chars, synth_s, audio_s))
+            self._refit()
+
+    def _refit(self) -> None:
+        n = len(self._samples)
+        total_chars = sum(c for c, _, _ in self._samples)
+        total_synth = sum(s for _, s, _ in self._samples)
+        self.audio_s_per_char = sum(a for _, _, a in self._samples) / total_chars
+        mean_chars = total_chars / n
+        mean_synth = total_synth / n
+        var = sum((c - mean_chars) ** 2 for c, _, _ in self._samples)
+        if n >= 3 and var > 0:
+            slope = sum((c - mean_chars) * (s - mean_synth) for c, s, _ in self._samples) / var
+            intercept = mean_synth - slope * mean_chars
+            if slope > 0 and intercept >= 0:
+                self.synth_s_per_char, self.overhead_s = slope, intercept
+                return
+        self.synth_s_per_char, self.overhead_s = total_synth / total_chars, 0.0
+
+    def synth_s(self, chars: int) -> float:
+        return self.overhead_s + chars * self.synth_s_per_char if chars > 0 else 0.0
+
+    def audio_s(self, chars: int) -> float:
+        return chars * self.audio_s_per_char
+
+    def describe(self) -> str:
+        rtf = self.synth_s_per_char / self.audio_s_per_char if self.audio_s_per_char else 0.0
+        return (
+            f"{self.overhead_s * 1000:.0f} ms + {self.synth_s_per_char * 1000:.1f} ms/char "
+            f"(RTF {rtf:.2f}, {self.measured} chunks measured)"
+        )
+
+
+class AdaptiveChunker:
+    """
+    Drop-in for StreamingSegmenter in generate_response: feed streamed text,
+    get back chunks to speak. slack() returns how many seconds of synthesis the
+    audio queued ahead can absorb before the player runs dry.
+    """
+
+    def __init__(
+        self,
+        rate: SynthesisRate,
+        slack: Callable[[], float],
+        first_clause_chars: Optional[int] = 20,
+        max_chars: int = 150,
+        safety: float = 1.25,
+        first_max_chars: Optional[int] = 60,
+    ):
+        self.rate = rate
+        self.slack = slack
+        self.max_chars = max_chars
+        self.safety = safety
+        self.first_max_chars = first_max_chars
+        self._segmenter = StreamingSegmenter(
+            first_clause_chars=first_clause_chars,
+            max_chars=max_chars,
+            first_max_chars=first_max_chars,
+        )
+        self._held: list[str] = []
+        self._held_chars = 0
+        self._emitted = 0
+        self._sentences = 0
+        self._sentence_chars = 0
+
+    def feed(self, text: str) -> list[str]:
+        # Re-checked on every token: the slack shrinks while we wait for the next sentence
+        if self._emitted and not self._held:
+            self._segmenter.max_chars = self._sentence_cap()
+        return self._chunks(self._segmenter.feed(text))
+
+    def flush(self) -> list[str]:
+        chunks = self._chunks(self._segmenter.flush(), final=True)
+        self.reset()
+        return chunks
+
+    def reset(self) -> None:
+        self._segmenter.reset()
+        self._held = []
+        self._held_chars = 0
+        self._emitted = 0
+
+    def _sentence_cap(self) -> int:
+        """
+        Longest sentence worth waiting for while nothing is held: what the queued
+        audio lets us synthesize, between first_max_chars and max_chars. A long
+        sentence is cut at a word boundary rather than let the player run dry.
+        """
+        per_char = self.rate.synth_s_per_char
+        affordable = (self.slack() / self.safety - self.rate.overhead_s) / per_char if per_char > 0 else self.max_chars
+        return int(min(max(affordable, self.first_max_chars or 1), self.max_chars))
+
+    def _typical_sentence(self) -> float:
+        return self._sentence_chars / self._sentences if self._sentences else DEFAULT_SENTENCE_CHARS
+
+    def _can_wait(self, next_chars: float) -> bool:
+        """Whether the queued audio covers synthesizing the held text grown by next_chars."""
+        chars = self._held_chars + next_chars
+        return chars <= self.max_chars and self.slack() >= self.safety * self.rate.synth_s(int(chars))
+
+    def _chunks(self, sentences: list[str], final: bool = False) -> list[str]:
+        chunks = []
+        for sentence in sentences:
+            self._sentences += 1
+            self._sentence_chars += len(sentence)
+            if not self._emitted and not self._held:
+                chunks.append(sentence)  # the first clause goes out immediately
+                self._emitted += 1
+                continue
+            if self._held and not self._can_wait(len(sentence)):
+                chunks.append(self._release())
+            self._held.append(sentence)
+            self._held_chars += len(sentence) + 1
+        if self._held and (final or not self._can_wait(self._typical_sentence())):
+            chunks.append(self._release())
+        return chunks
+
+    def _release(self) -> str:
+        chunk = " ".join(self._held)
+        self._held = []
+        self._held_chars = 0
+        self._emitted += 1
+        return chunk
+
+
+def create_chunker(rate: SynthesisRate, slack: Callable[[], float]):
+    """A chunker for one response as configured by CHUNKING; a plain segmenter if adaptive is off."""
+    settings = Config.chunking()
+    if not settings.get("adaptive", True):
+        return StreamingSegmenter(max_chars=Config.response_buffer_threshold())
+    return AdaptiveChunker(
+        rate,
+        slack,
+        first_clause_chars=settings.get("first_clause_chars", 20),
+        max_chars=Config.response_buffer_threshold(),
+        safety=float(settings.get("safety", 1.25)),
+        first_max_chars=settings.get("first_max_chars", 60),
+    )
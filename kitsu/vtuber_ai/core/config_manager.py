@@ -45,12 +45,53 @@ def _load_emoji_speech_map_file() -> dict:
         logger.info(f"[ERROR] Failed to load emoji speech map: {e}")
         return {}
 
-_emoji_speech_map_data: dict[str, Any] = _load_emoji_speech_map_file()
 _config_data: dict[str, Any] = {}
 _config_data.update(_load_config_file())
 _config_lock = threading.Lock()
 
-_phonetics_data: dict[str, Any] = _load_phonetics_config_file()
+FILE_CHECK_INTERVAL = 2.0
+
+def _file_mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+class _ReloadingJsonFile:
+    """
+    A side config file that is reloaded when its mtime changes. The mtime is
+    checked at most every FILE_CHECK_INTERVAL seconds, so callers on the speech
+    path pay a timestamp comparison, not a stat, on almost every call. The
+    version number lets callers rebuild anything compiled from the data.
+    """
+
+    def __init__(self, path: Path, loader, label: str):
+        self.path = path
+        self.loader = loader
+        self.label = label
+        self.data: dict[str, Any] = loader()
+        self.version = 0
+        self._mtime = _file_mtime(path)
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < FILE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._checked_at < FILE_CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            mtime = _file_mtime(self.path)
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self.data = self.loader()
+                self.version += 1
+                logger.info(f"[✓] {self.label} reloaded.")
+
+_phonetics_file = _ReloadingJsonFile(PHONETICS_CONFIG_PATH, _load_phonetics_config_file, "Phonetics config")
+_emoji_speech_map_file = _ReloadingJsonFile(EMOJI_SPEECH_MAP_PATH, _load_emoji_speech_map_file, "Emoji speech map")
 
 def _watch_config_file(interval=2):
     last_content = None
@@ -93,16 +134,32 @@ class Config:
     @staticmethod
     def phonetic_overrides() -> dict:
         """
-        Retrieves custom phonetic mappings from config_phonetics.json.
+        Retrieves custom phonetic mappings from config_phonetics.json,
+        reloading the file if it changed on disk.
         """
-        return _phonetics_data
+        _phonetics_file.refresh()
+        return _phonetics_file.data
+
+    @staticmethod
+    def phonetics_version() -> int:
+        """Incremented every time config_phonetics.json is reloaded."""
+        _phonetics_file.refresh()
+        return _phonetics_file.version
     
     @staticmethod
     def emoji_map() -> dict:
         """
-        Retrieves emoji speech mappings from config_emoji_speech_map.json.
+        Retrieves emoji speech mappings from config_emoji_speech_map.json,
+        reloading the file if it changed on disk.
         """
-        return _emoji_speech_map_data
+        _emoji_speech_map_file.refresh()
+        return _emoji_speech_map_file.data
+
+    @staticmethod
+    def emoji_map_version() -> int:
+        """Incremented every time config_emoji_speech_map.json is reloaded."""
+        _emoji_speech_map_file.refresh()
+        return _emoji_speech_map_file.version
 
     @staticmethod
     def commom_actions() -> dict:
@@ -145,6 +202,50 @@ class Config:
     def arpabet_map() -> dict:
         return Config.get("ARPABET_MAP", {})
 
+    @staticmethod
+    def ollama_host() -> str:
+        return Config.get("OLLAMA_HOST", "http://localhost:11434")
+
+    @staticmethod
+    def ollama_model() -> str:
+        return Config.get("OLLAMA_MODEL", "mistral")
+
+    @staticmethod
+    def ollama_options() -> dict:
+        return Config.get("OLLAMA_OPTIONS", {"temperature": 0.8, "top_p": 0.9})
+
+    @staticmethod
+    def ollama_timeouts() -> dict:
+        return Config.get("OLLAMA_TIMEOUTS", {})
+
+    @staticmethod
+    def prompt_layout() -> str:
+        return Config.get("PROMPT_LAYOUT", "legacy", warn=False)
+
+    @staticmethod
+    def context_budget() -> dict:
+        return Config.get("CONTEXT_BUDGET", {}, warn=False)
+
+    @staticmethod
+    def summarizer() -> dict:
+        return Config.get("SUMMARIZER", {}, warn=False)
+
+    @staticmethod
+    def profiling() -> dict:
+        return Config.get("PROFILING", {}, warn=False)
+
+    @staticmethod
+    def tracing() -> dict:
+        return Config.get("TRACING", {}, warn=False)
+
+    @staticmethod
+    def chunking() -> dict:
+        return Config.get("CHUNKING", {}, warn=False)
+
+    @staticmethod
+    def audio_output() -> dict:
+        return Config.get("AUDIO_OUTPUT", {}, warn=False)
+
     @staticmethod
     def get_all() -> dict:
         with _config_lock:
@@ -0,0 +1,270 @@
+"""
+Token-budgeted context assembly for the conversation prompt.
+
+build_prompt hands its candidate sections (persona, lore, facts, summary,
+recent turns, recalled long-term snippets, the current message) to
+ContextBudget, which counts them with TokenCounter and keeps them in
+CONTEXT_BUDGET priority order until the budget runs out. The persona and the
+current message are always kept. A section that only partly fits keeps as many
+whole items as it can (the newest ones for recent turns) and may end with one
+truncated item. Everything after that in priority order is dropped.
+
+TokenCounter uses a tokenizer loaded from local files when CONTEXT_BUDGET
+names one ("tokenizer": a tokenizer.json path or a local Hugging Face model
+directory). Otherwise it estimates from the character count, using a
+chars-per-token ratio that is calibrated against the prompt token counts
+Ollama reports.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+import math
+import threading
+import logging
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[2]
+# Sections that are always kept, ahead of the configurable priorities
+REQUIRED_KINDS = ("persona", "message")
+DEFAULT_PRIORITIES = ("lore", "facts", "summary", "turns", "recall")
+DEFAULT_MAX_TOKENS = 3072
+DEFAULT_CHARS_PER_TOKEN = 3.6
+# Characters outside ASCII (accents, kana, emoji) rarely merge into longer BPE tokens
+NON_ASCII_TOKENS = 0.7
+# A partly fitting item is only truncated if at least this many tokens are left for it
+MIN_TRUNCATED_TOKENS = 24
+COUNT_CACHE_SIZE = 1024
+
+
+def _load_tokenizer(name: str) -> Optional[Callable[[str], list]]:
+    """Return an encode function for a local tokenizer, or None if it can't be loaded."""
+    path = Path(name)
+    if not path.is_absolute():
+        path = KITSU_DIR / path
+    try:
+        if path.suffix == ".json":
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(str(path))
+            return lambda text: tokenizer.encode(text, add_special_tokens=False).ids
+        from transformers import AutoTokenizer
+
+        source = str(path) if path.exists() else name
+        tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=True)
+        return lambda text: tokenizer.encode(text, add_special_tokens=False)
+    except Exception as e:
+        logger.warning(f"[Context] Could not load tokenizer '{name}', estimating token counts instead: {e}")
+        return None
+
+
+class TokenCounter:
+    """
+    Counts tokens with a local tokenizer, or estimates them from character counts.
+    Counts are memoized, because persona, facts and older turns repeat every turn.
+    """
+
+    def __init__(self, tokenizer: Optional[str] = None, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self._encode = _load_tokenizer(tokenizer) if tokenizer else None
+        self.chars_per_token = chars_per_token
+        self.calibration_samples = 0
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        return self._encode is not None
+
+    def estimate(self, text: str) -> int:
+        ascii_chars = sum(1 for ch in text if ch < "\x80") if not text.isascii() else len(text)
+        return math.ceil(ascii_chars / self.chars_per_token + (len(text) - ascii_chars) * NON_ASCII_TOKENS)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        tokens = len(self._encode(text)) if self._encode is not None else self.estimate(text)
+        with self._lock:
+            self._cache[text] = tokens
+            if len(self._cache) > COUNT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def observe(self, text: str, prompt_tokens: int) -> None:
+        """
+        Calibrate the estimate against the number of prompt tokens the server
+        reported for text. Ollama only reports tokens it had to evaluate, so counts
+        well below the estimate come from a reused cached prefix and are ignored.
+        """
+        if self.exact or prompt_tokens <= 0 or not text:
+            return
+        estimated = self.estimate(text)
+        if prompt_tokens < 0.9 * estimated:
+            return
+        non_ascii = len(text) - sum(1 for ch in text if ch < "\x80")
+        ascii_tokens = prompt_tokens - non_ascii * NON_ASCII_TOKENS
+        if ascii_tokens <= 0:
+            return
+        observed = (len(text) - non_ascii) / ascii_tokens
+        # Move gradually and stay within plausible BPE ratios; one odd prompt shouldn't swing it
+        ratio = 0.8 * self.chars_per_token + 0.2 * observed
+        ratio = min(max(ratio, 2.0), 6.0)
+        if abs(ratio - self.chars_per_token) > 0.01:
+            with self._lock:
+                self._cache.clear()
+        self.chars_per_token = ratio
+        self.calibration_samples += 1
+        logger.debug(f"[Context] Calibrated estimate to {ratio:.2f} chars/token ({prompt_tokens} tokens reported)")
+
+
+@dataclass
+class ContextSection:
+    """
+    One candidate prompt section. Items are what gets kept or dropped one at a time
+    (a lore injection, a fact line, a conversation turn); the header is counted
+    once if any item is kept.
+    """
+    kind: str
+    items: list[str]
+    header: str = ""
+    keep_tail: bool = False  # when cut short, keep the last items (newest turns) instead of the first
+    kept: list[str] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return len(self.items) - len(self.kept)
+
+    def render(self) -> str:
+        if not self.kept:
+            return ""
+        body = "\n".join(self.kept)
+        return f"{self.header}\n{body}" if self.header else body
+
+
+@dataclass
+class ContextUsage:
+    max_tokens: int
+    exact: bool
+    tokens: dict[str, int] = field(default_factory=dict)
+    dropped: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.tokens.values())
+
+    def describe(self) -> str:
+        parts = []
+        for kind, tokens in self.tokens.items():
+            dropped = self.dropped.get(kind, 0)
+            parts.append(f"{kind} {tokens}" + (f" ({dropped} dropped)" if dropped else ""))
+        source = "tokenizer" if self.exact else "estimated"
+        return f"{' | '.join(parts)} | total {self.total}/{self.max_tokens} tokens ({source})"
+
+
+class ContextBudget:
+    def __init__(self, max_tokens: int, counter: TokenCounter, priorities: Iterable[str] = DEFAULT_PRIORITIES):
+        self.max_tokens = max_tokens
+        self.counter = counter
+        self.priorities = [kind for kind in priorities if kind not in REQUIRED_KINDS]
+
+    def _rank(self, section: ContextSection) -> int:
+        if section.kind in REQUIRED_KINDS:
+            return -1
+        if section.kind in self.priorities:
+            return self.priorities.index(section.kind)
+        return len(self.priorities)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Longest word prefix of text (plus an ellipsis) counting at most budget tokens."""
+        words = text.split(" ")
+        low, high = 0, len(words)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.counter.count(" ".join(words[:mid]) + "...") <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return " ".join(words[:low]) + "..." if low else ""
+
+    def _fill(self, section: ContextSection, remaining: int) -> int:
+        """Keep as much of section as fits in remaining tokens; returns the tokens used."""
+        if not section.items:
+            return 0
+        used = self.counter.count(section.header) + 1 if section.header else 0
+        if used >= remaining:
+            return 0
+        ordered = list(reversed(section.items)) if section.keep_tail else list(section.items)
+        kept = []
+        for item in ordered:
+            cost = self.counter.count(item) + 1
+            if used + cost <= remaining:
+                kept.append(item)
+                used += cost
+                continue
+            # Turns are only ever dropped whole; other material may end with a shortened item
+            if not section.keep_tail and remaining - used >= MIN_TRUNCATED_TOKENS:
+                shortened = self._truncate(item, remaining - used - 1)
+                if shortened:
+                    kept.append(shortened)
+                    used += self.counter.count(shortened) + 1
+            break
+        if not kept:
+            return 0
+        section.kept = list(reversed(kept)) if section.keep_tail else kept
+        return used
+
+    def fit(self, sections: list[ContextSection]) -> ContextUsage:
+        """
+        Decide which items of each section go into the prompt (stored on
+        section.kept) and return the per-kind token use. Required sections are
+        always kept whole, even if they alone exceed the budget.
+        """
+        usage = ContextUsage(self.max_tokens, self.counter.exact)
+        remaining = self.max_tokens
+        for section in sorted(sections, key=self._rank):
+            section.kept = []
+            if section.kind in REQUIRED_KINDS:
+                section.kept = list(section.items)
+                section.tokens = self.counter.count(section.render()) if section.items else 0
+            else:
+                section.tokens = self._fill(section, max(remaining, 0))
+            remaining -= section.tokens
+            usage.tokens[section.kind] = usage.tokens.get(section.kind, 0) + section.tokens
+            usage.dropped[section.kind] = usage.dropped.get(section.kind, 0) + section.dropped
+        if remaining < 0:
+            logger.warning(f"[Context] Persona and message alone exceed the {self.max_tokens}-token budget")
+        return usage
+
+
+_budget: Optional[ContextBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_context_budget() -> ContextBudget:
+    """Return the shared budget configured by CONTEXT_BUDGET."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            settings = Config.context_budget()
+            counter = TokenCounter(
+                tokenizer=settings.get("tokenizer"),
+                chars_per_token=float(settings.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)),
+            )
+            _budget = ContextBudget(
+                max_tokens=int(settings.get("max_tokens", DEFAULT_MAX_TOKENS)),
+                counter=counter,
+                priorities=settings.get("priorities", DEFAULT_PRIORITIES),
+            )
+            logger.info(
+                f"[Context] Budget {_budget.max_tokens} tokens, "
+                f"{'local tokenizer' if counter.exact else 'estimated counts'}, priorities {_budget.priorities}"
+            )
+        return _budget
@@ -1,31 +1,243 @@
 """
 Emotion analysis and classification for VTuber AI.
+
+All classification goes through EmotionService, which collects pending texts
+(speech chunks, viewer messages) and runs them through the GoEmotions model in
+small batches, answering each request with a Future. torch, transformers and
+the model itself are loaded on first use.
 """
-from transformers.pipelines import pipeline
-from collections.abc import Iterable
-import torch
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Optional
+import queue
+import re
+import threading
+import time
+import logging
+
+from vtuber_ai.core.config_manager import Config
+from vtuber_ai.utils.startup import startup_report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMOTION_MODEL = "bhadresh-savani/bert-base-go-emotion"
+KITSU_DIR = Path(__file__).resolve().parents[2]
+
+def _quantized_cache_path(model_name: str, cache_dir: Path) -> Path:
+    import torch
+
+    # Pickled quantized modules are only safe to reload with the same torch build
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return cache_dir / f"{safe_name}-int8-torch{torch.__version__}.pt"
+
+
+def load_quantized_model(model_name: str, cache_dir: Path):
+    """
+    Return a dynamically int8-quantized copy of the classifier for CPU inference.
+    The converted module is cached on disk so later startups skip the conversion.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    path = _quantized_cache_path(model_name, cache_dir)
+    if path.exists():
+        try:
+            model = torch.load(path, weights_only=False)
+            logger.info(f"[Emotion] Loaded quantized model from {path}")
+            return model.eval()
+        except Exception as e:
+            logger.warning(f"[Emotion] Ignoring unreadable quantized cache {path}: {e}")
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        torch.save(model, tmp_path)
+        tmp_path.replace(path)
+        logger.info(f"[Emotion] Quantized model cached at {path}")
+    except Exception as e:
+        logger.warning(f"[Emotion] Could not cache quantized model: {e}")
+    return model
+
+
+def build_emotion_classifier(backend: Optional[str] = None):
+    """
+    Build the GoEmotions pipeline for the configured EMOTION_INFERENCE backend:
+    "fp32" (default, GPU if available) or "int8" (dynamically quantized, CPU only).
+    """
+    with startup_report.measure("import torch + transformers"):
+        import torch
+        from transformers.pipelines import pipeline
+
+    settings = Config.get("EMOTION_INFERENCE", {}, warn=False)
+    backend = backend or settings.get("backend", "fp32")
+    model_name = Config.emotion_model() or DEFAULT_EMOTION_MODEL
+
+    threads = int(settings.get("threads", 0))
+    if threads > 0:
+        torch.set_num_threads(threads)
+
+    if backend == "int8":
+        from transformers import AutoTokenizer
+
+        cache_dir = Path(settings.get("cache_dir", "data/models"))
+        if not cache_dir.is_absolute():
+            cache_dir = KITSU_DIR / cache_dir
+        classifier = pipeline(
+            "text-classification",
+            model=load_quantized_model(model_name, cache_dir),
+            tokenizer=AutoTokenizer.from_pretrained(model_name),
+            top_k=1,
+            device=-1
+        )
+    else:
+        # Use GPU if available
+        device = 0 if torch.cuda.is_available() else -1
+        classifier = pipeline(
+            "text-classification",
+            model=model_name,
+            top_k=1,
+            device=device
+        )
+
+    if settings.get("warmup", True):
+        with torch.inference_mode():
+            classifier(["warming up"], top_k=1)
+    logger.info(f"[Emotion] {backend} classifier ready ({torch.get_num_threads()} intra-op threads)")
+    return classifier
 
-# Use GPU if available
-device = 0 if torch.cuda.is_available() else -1
 
-# Initialize the GoEmotions classifier
-emotion_classifier = pipeline(
-    "text-classification",
-    model="bhadresh-savani/bert-base-go-emotion",
-    top_k=None,
-    device=device
-)
+emotion_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_emotion_classifier():
+    """Return the GoEmotions classifier, building it on first use."""
+    global emotion_classifier
+    if emotion_classifier is not None:
+        return emotion_classifier
+    with _classifier_lock:
+        if emotion_classifier is None:
+            with startup_report.measure("emotion classifier load"):
+                emotion_classifier = build_emotion_classifier()
+        return emotion_classifier
+
+
+def _top_label(result: Any) -> str:
+    """
+    Pull the best label out of one pipeline result, which is a dict or a
+    score-sorted list of dicts depending on the transformers version and top_k.
+    """
+    if isinstance(result, list):
+        if not result:
+            return "neutral"
+        result = result[0]
+    if isinstance(result, dict) and "label" in result:
+        return str(result["label"])
+    return "neutral"
+
+
+class EmotionService:
+    def __init__(self, classifier=None, max_batch: int = 8, max_wait: float = 0.015, memo_size: int = 128):
+        """
+        max_batch caps how many texts share one forward pass; max_wait is how long
+        the first pending text may wait for company before the batch runs anyway.
+        """
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.memo_size = memo_size
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        # Recent/in-flight requests by text, so a chunk prefetched by the speech
+        # pipeline is not classified a second time by process_text_for_speech.
+        self._memo: OrderedDict[str, Future] = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for classification and return a Future for its label."""
+        text = text.strip()
+        with self._memo_lock:
+            future = self._memo.get(text)
+            if future is not None:
+                self._memo.move_to_end(text)
+                return future
+            future = Future()
+            self._memo[text] = future
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        if not text:
+            future.set_result("neutral")
+            return future
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def analyze(self, text: str, timeout: Optional[float] = None) -> str:
+        """Blocking helper: classify one text and return its top label."""
+        return self.submit(text).result(timeout=timeout)
+
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="emotion-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+            try:
+                import torch
+
+                classifier = self.classifier or get_emotion_classifier()
+                with torch.inference_mode():
+                    results = classifier(texts, top_k=1, batch_size=len(texts), truncation=True)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(_top_label(result))
+                logger.debug(f"[EmotionService] Classified batch of {len(texts)}")
+            except Exception as e:
+                logger.error(f"[EmotionService] Classification failed: {e}")
+                for text, future in batch:
+                    with self._memo_lock:
+                        if self._memo.get(text) is future:
+                            del self._memo[text]
+                    if not future.done():
+                        future.set_result("neutral")
+
+
+_service: Optional[EmotionService] = None
+_service_lock = threading.Lock()
+
+
+def get_emotion_service() -> EmotionService:
+    """Return the shared emotion service."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmotionService()
+        return _service
+
 
 def analyze_emotion(text: str) -> str:
     """
     Analyze the emotion of the given text using the GoEmotions model.
     Returns the top emotion label.
     """
-    raw_result = emotion_classifier(text)
-
-    if not isinstance(raw_result, Iterable):
-        return "unknown"
-
-    emotions: list[dict] = list(raw_result)[0]  # type: ignore
-    top_emotion = max(emotions, key=lambda x: float(x['score']))
-    return top_emotion['label']
+    return get_emotion_service().analyze(text)
@@ -0,0 +1,45 @@
+"""
+Prompt layouts for the conversation prompt.
+
+"legacy" keeps the original single prompt with the persona block last. "prefix"
+sends the persona and rules as a byte-identical system prompt ahead of the
+per-turn sections, and "chat" sends the persona as the system message followed by
+the conversation as chat turns. In both of the latter the unchanging part comes
+first, so Ollama can reuse its cached prefix instead of re-evaluating the whole
+prompt every turn.
+"""
+from dataclasses import dataclass
+from typing import Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROMPT_LAYOUTS = ("legacy", "prefix", "chat")
+
+
+@dataclass
+class PromptRequest:
+    """One LLM request: a /api/generate prompt (with optional system prompt) or /api/chat messages."""
+    prompt: str = ""
+    system: Optional[str] = None
+    messages: Optional[list[dict]] = None
+
+    def stream(self, client, options: Optional[dict] = None) -> Iterator[dict]:
+        if self.messages is not None:
+            return client.stream_chat(self.messages, options=options)
+        if self.system is not None:
+            return client.stream_generate(self.prompt, options=options, system=self.system)
+        return client.stream_generate(self.prompt, options=options)
+
+    def __str__(self) -> str:
+        if self.messages is not None:
+            return "\n\n".join(f"<{m['role']}>\n{m['content']}" for m in self.messages)
+        return f"{self.system}\n\n{self.prompt}" if self.system is not None else self.prompt
+
+
+def message_text(message: dict) -> str:
+    """Text piece of a streamed message from either /api/generate or /api/chat."""
+    text = message.get("response")
+    if text is None:
+        text = (message.get("message") or {}).get("content", "")
+    return text or ""
@@ -1,88 +1,106 @@
 import time
-import json
 import re
-import requests
+import httpx
 import logging
-from typing import Callable
-from ai.tts_module import speak_with_emotion
-from ai.text_utils import safe_to_split
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
+from vtuber_ai.core.prompt_layout import PromptRequest, message_text
+from vtuber_ai.core.chunk_policy import create_chunker
+from vtuber_ai.core.speech_pipeline import get_speech_pipeline
+from vtuber_ai.services.ollama_client import get_ollama_client
+from vtuber_ai.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class ResponseStats:
+    """Measurements of one generate_response call, recorded in the transcript."""
+    first_token_s: Optional[float] = None
+    stream_s: float = 0.0
+    total_s: float = 0.0  # including waiting for the speech pipeline to drain
+    chunk_chars: list[int] = field(default_factory=list)
+    emotes: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+
 def generate_response(
-    user_input: str,
-    process_text_for_speech: Callable[[str], tuple[str, float, float]]
+    user_input: Union[str, PromptRequest],
+    process_text_for_speech: Callable[[str], tuple[str, float, float]],
+    stats: Optional[ResponseStats] = None
 ) -> str:
     """
     Stream a response from Mistral, speak it chunk-by-chunk, and extract a summary from the result.
-    Only one LLM call is made.
+    Only one LLM call is made. Chunks are handed to the speech pipeline so the token
+    stream keeps being read while earlier sentences are processed and played.
+    user_input is a plain prompt or a PromptRequest built for the configured prompt layout.
+    If stats is given it is filled in with timings and chunk metadata.
     """
     # 🧠 Construct prompt with request for summary
 
     logger.info("[INFO] Sending prompt to Mistral...")
 
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "mistral",
-                "prompt": user_input,
-                "temperature": 0.8,
-                "top_p": 0.9,
-                "stream": True
-            },
-            stream=True
-        )
-    except Exception as e:
-        logger.error(f"Ollama request failed: {e}")
-        return "Sorry, my brain glitched >_<"
-
-    buffer = ""
-    full_response = ""
-
-    def process_buffer():
-        nonlocal buffer
-        split_points = []
-        i = 0
-        while i < len(buffer):
-            if buffer[i] in ".!?\n":
-                if buffer[i] == '\n' or safe_to_split(buffer, i):
-                    split_points.append(i)
-            i += 1
+    client = get_ollama_client()
+    request = user_input if isinstance(user_input, PromptRequest) else PromptRequest(prompt=user_input)
+    pipeline = get_speech_pipeline()
+    # Short first chunk, then chunks as long as the queued audio allows
+    segmenter = create_chunker(pipeline.rate, pipeline.slack)
+    response_parts = []
+    stats = stats if stats is not None else ResponseStats()
+    tracer = get_tracer()
 
-        last_split = 0
-        for idx in split_points:
-            chunk = buffer[last_split:idx + 1].strip()
-            if chunk:
-                logger.debug("[TTS CHUNK] " + repr(chunk))
-                clean_chunk, emotes = extract_emotes(chunk)
-                if clean_chunk:
-                    speak_with_emotion(clean_chunk, process_text_for_speech)
+    def speak_chunk(chunk: str):
+        logger.debug("[TTS CHUNK] " + repr(chunk))
+        clean_chunk, emotes = extract_emotes(chunk)
+        if clean_chunk:
+            with tracer.bind(chunk=len(stats.chunk_chars)):
+                tracer.instant("chunk", chars=len(clean_chunk))
+                pipeline.submit(clean_chunk, process_text_for_speech)
+            stats.chunk_chars.append(len(clean_chunk))
+        stats.emotes.extend(emotes)
 
-                for emote in emotes:
-                    trigger_emote(emote)
-            last_split = idx + 1
-
-        # Save leftover part in the buffer
-        buffer = buffer[last_split:].lstrip()
+        for emote in emotes:
+            trigger_emote(emote)
 
     # 🔁 Stream and process in real time
     start_time = time.time()
-    for line in response.iter_lines():
-        if line:
-            part = json.loads(line.decode("utf-8"))["response"]
-            buffer += part
-            full_response += part
-            process_buffer()
+    request_start = time.perf_counter()
+    first_token_at = None
+    try:
+        for message in request.stream(client):
+            part = message_text(message)
+            if not part:
+                continue
+            if first_token_at is None:
+                first_token_at = time.time()
+                stats.first_token_s = first_token_at - start_time
+                tracer.record("llm.first_token", request_start, time.perf_counter())
+                logger.info(f"First token after {stats.first_token_s:.2f}s")
+            response_parts.append(part)
+            for chunk in segmenter.feed(part):
+                speak_chunk(chunk)
+    except httpx.HTTPError as e:
+        logger.error(f"Ollama request failed: {e}")
+        stats.error = str(e)
+        if not response_parts:
+            tracer.record("llm.request", request_start, time.perf_counter(), error=stats.error)
+            return "Sorry, my brain glitched >_<"
+
+    tracer.record("llm.request", request_start, time.perf_counter(), error=stats.error)
 
     # 🔚 Final flush
-    if buffer.strip():
-        logger.debug("[FINAL FLUSH] " + repr(buffer.strip()))
-        speak_with_emotion(buffer.strip(), process_text_for_speech)
+    for chunk in segmenter.flush():
+        logger.debug("[FINAL FLUSH] " + repr(chunk))
+        speak_chunk(chunk)
 
+    full_response = "".join(response_parts)
     elapsed = time.time() - start_time
+    stats.stream_s = elapsed
     logger.info(f"Ollama streaming finished in {elapsed:.2f}s")
 
+    # Wait for the last chunks to reach the player before handing control back
+    pipeline.join()
+    stats.total_s = time.time() - start_time
+    logger.debug(f"[Chunking] Chunk lengths {stats.chunk_chars}; synthesis {pipeline.rate.describe()}")
+
     return full_response
 
 def trigger_emote(action: str):
@@ -0,0 +1,192 @@
+"""
+Staged speech pipeline: text chunks → preprocessing → synthesis → playback.
+
+Each stage runs on its own worker thread and the stages are connected by bounded
+FIFO queues, so sentence N+1 is preprocessed and synthesized while sentence N is
+still playing. With one worker per stage, playback order matches submission order.
+
+The synthesis stage measures how long each chunk takes to synthesize and how
+much audio it yields; the chunk policy uses that (through rate and slack) to
+decide how much text it can merge into the next chunk.
+"""
+import queue
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+from ai.audio_cache import get_audio_cache
+from ai.tts_module import (
+    prepare_speech, synthesize, play_audio, flush_audio,
+    output_sample_rate, queued_audio_seconds,
+)
+from ai.text_utils.cleaning import clean_artifacts
+from vtuber_ai.core.chunk_policy import SynthesisRate
+from vtuber_ai.core.config_manager import Config
+from vtuber_ai.core.emotion import get_emotion_service
+from vtuber_ai.utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+ProcessFn = Callable[[str], tuple[str, float, float]]
+
+_STOP = object()
+
+
+class SpeechPipeline:
+    def __init__(self, max_pending: int = 4):
+        """
+        max_pending bounds each inter-stage queue; a full queue applies backpressure
+        to the stage feeding it instead of letting work pile up in memory.
+        """
+        self.text_queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.synth_queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._threads = [
+            threading.Thread(target=self._preprocess_worker, name="speech-preprocess", daemon=True),
+            threading.Thread(target=self._synthesis_worker, name="speech-synthesis", daemon=True),
+        ]
+        self._started = False
+        self._start_lock = threading.Lock()
+        chunking = Config.chunking()
+        self.rate = SynthesisRate(
+            synth_s_per_char=float(chunking.get("synth_s_per_char", 0.02)),
+            audio_s_per_char=float(chunking.get("audio_s_per_char", 0.065)),
+        )
+        # Chunks submitted but not synthesized yet
+        self._pending_chars = 0
+        self._pending_chunks = 0
+        self._pending_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            for t in self._threads:
+                t.start()
+            self._started = True
+
+    def stop(self) -> None:
+        """Ask the workers to exit once the queued chunks have been handled."""
+        if self._started:
+            self.text_queue.put(_STOP)
+
+    def submit(self, text: str, process_text_for_speech: ProcessFn) -> None:
+        """
+        Queue a raw text chunk for speaking. Blocks only while the preprocessing
+        queue is full. Must not be called from the pipeline's own workers: they
+        could block on their own bounded queue, and all synthesis has to go
+        through the single synthesis worker to keep playback in order.
+        """
+        if self._in_worker():
+            raise RuntimeError("SpeechPipeline.submit called from a pipeline worker")
+        self.start()
+        # Start classifying now so the chunks queued behind the one being processed
+        # share a batched forward pass; process_text_for_speech picks the result up.
+        get_emotion_service().submit(clean_artifacts(text))
+        with self._pending_lock:
+            self._pending_chars += len(text)
+            self._pending_chunks += 1
+        # The chunk carries the submitting thread's (turn, chunk) so worker spans are correlated
+        self.text_queue.put((text, process_text_for_speech, get_tracer().context()))
+
+    def slack(self) -> float:
+        """
+        Seconds of synthesis the next chunk can take before playback runs dry:
+        the audio queued in the player plus what the pending chunks are expected
+        to add, minus the time needed to synthesize those pending chunks.
+        """
+        with self._pending_lock:
+            chars, chunks = self._pending_chars, self._pending_chunks
+        pending_synth = self.rate.synth_s(chars) + self.rate.overhead_s * max(chunks - 1, 0)
+        return queued_audio_seconds() + self.rate.audio_s(chars) - pending_synth
+
+    def _done(self, chars: int) -> None:
+        with self._pending_lock:
+            self._pending_chars -= chars
+            self._pending_chunks -= 1
+
+    def join(self) -> None:
+        """
+        Wait until every submitted chunk has been synthesized and handed to the player,
+        then mark the utterance complete.
+        """
+        if self._in_worker():
+            return
+        # The preprocess worker only marks an item done after forwarding it,
+        # so once text_queue drains everything left is already in synth_queue.
+        self.text_queue.join()
+        self.synth_queue.join()
+        flush_audio()
+
+    def _in_worker(self) -> bool:
+        return threading.current_thread() in self._threads
+
+    def _preprocess_worker(self) -> None:
+        while True:
+            item = self.text_queue.get()
+            try:
+                if item is _STOP:
+                    self.synth_queue.put(_STOP)
+                    return
+                text, process_text_for_speech, trace_tag = item
+                tracer = get_tracer()
+                prepared = None
+                try:
+                    with tracer.bind(*trace_tag), tracer.span("pipeline.preprocess"):
+                        prepared = prepare_speech(text, process_text_for_speech)
+                finally:
+                    if prepared is None:
+                        self._done(len(text))
+                if prepared is not None:
+                    self.synth_queue.put((prepared, len(text), trace_tag))
+            except Exception as e:
+                logger.error(f"[Pipeline preprocess error]: {e}")
+            finally:
+                self.text_queue.task_done()
+
+    def _synthesis_worker(self) -> None:
+        while True:
+            item = self.synth_queue.get()
+            try:
+                if item is _STOP:
+                    return
+                (text, pitch, rate), chars, trace_tag = item
+                tracer = get_tracer()
+                with tracer.bind(*trace_tag):
+                    try:
+                        cache_hits = _cache_hits()
+                        start = time.perf_counter()
+                        audio = synthesize(text, pitch, rate)
+                        synth_s = time.perf_counter() - start
+                    finally:
+                        self._done(chars)
+                    if audio is not None:
+                        cached = _cache_hits() != cache_hits
+                        tracer.record("pipeline.synthesis", start, start + synth_s, chars=chars, cached=cached)
+                        if not cached:  # a cache hit says nothing about synthesis speed
+                            self.rate.observe(chars, synth_s, len(audio) / output_sample_rate())
+                        with tracer.span("audio.enqueue"):
+                            play_audio(audio, tag=trace_tag if trace_tag[0] is not None else None)
+            except Exception as e:
+                logger.error(f"[Pipeline synthesis error]: {e}")
+            finally:
+                self.synth_queue.task_done()
+
+
+def _cache_hits() -> int:
+    cache = get_audio_cache()
+    return cache.hits + cache.disk_hits if cache is not None else 0
+
+
+_pipeline: Optional[SpeechPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_speech_pipeline() -> SpeechPipeline:
+    """Return the shared speech pipeline, starting its workers on first use."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = SpeechPipeline()
+            _pipeline.start()
+        return _pipeline
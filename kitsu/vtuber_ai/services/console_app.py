@@ -1,10 +1,14 @@
 import logging
 from ..utils.file_ops import log_chat
 from ..utils.text import clean_text
+from ..utils.profiling import PROFILE_MODES, get_profiler
+from ..utils.tracing import get_tracer
 from .conversation_service import ConversationService
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROFILE_TURNS = 5
+
 def user_prompt() -> str:
     return input("\033[94mYou: \033[0m")
 
@@ -24,12 +28,22 @@ class ConsoleApp:
                     logger.info("\033[93mAiri: Teehee~ See you later, senpai!\033[0m")
                     break
                 elif cmd == "/help":
-                    logger.info("\033[96mAvailable commands:\n  /help - Show this help message\n  /clear - Clear conversation history\n  /history - Show conversation history\n  exit or quit - Exit the program\033[0m")
+                    logger.info("\033[96mAvailable commands:\n  /help - Show this help message\n  /clear - Clear conversation history\n  /history - Show conversation history\n  /trace - Show latency percentiles per pipeline stage\n  /trace export - Write the recent spans as Chrome trace JSON\n  /profile [cprofile|sampling [turns]|off] - Profile the next turns (default 5) or stop\n  exit or quit - Exit the program\033[0m")
                     continue
                 elif cmd == "/clear":
                     self.conversation_service.memory.memory.clear()
                     logger.info("\033[92m[INFO] Conversation history cleared.\033[0m")
                     continue
+                elif cmd == "/trace":
+                    logger.info("\033[92m--- Latency by stage ---\n" + get_tracer().describe() + "\033[0m")
+                    continue
+                elif cmd == "/trace export":
+                    path = get_tracer().export_chrome()
+                    logger.info(f"\033[92m[INFO] Trace written to {path} (open it in chrome://tracing or ui.perfetto.dev)\033[0m")
+                    continue
+                elif cmd == "/profile" or cmd.startswith("/profile "):
+                    self.profile_command(cmd.split()[1:])
+                    continue
                 elif cmd == "/history":
                     if not self.conversation_service.memory.memory:
                         logger.info("\033[92m[INFO] No conversation history yet.\033[0m")
@@ -41,10 +55,9 @@ class ConsoleApp:
                     continue
                 try:
                     response = ConversationService.get_response(self.conversation_service, pergunta)
-                    log_chat(pergunta, response)
+                    log_chat(pergunta, response, **self.conversation_service.last_turn_metadata)
+                    get_profiler().turn_finished()
                     logger.info("\033[93mAiri:\033[0m", response)
-                    self.conversation_service.memory.memory.append(f"You: {pergunta}")
-                    self.conversation_service.memory.memory.append(f"Airi: {response}")
                 except Exception as e:
                     logger.error(f"Error during response generation: {e}")
                     logger.info("\033[91m[ERROR] Something went wrong. Please try again.\033[0m")
@@ -52,3 +65,19 @@ class ConsoleApp:
             logger.info("\n\033[0m[INFO] Exiting due to keyboard interrupt...\033[0m")
             import sys
             sys.exit(0)
+
+    def profile_command(self, args: list[str]) -> None:
+        profiler = get_profiler()
+        if not args:
+            logger.info(f"\033[92m[INFO] {profiler.describe()}\033[0m")
+            return
+        mode = args[0]
+        if mode not in PROFILE_MODES or (len(args) > 1 and not args[1].isdigit()):
+            logger.info(f"\033[91m[WARN] Usage: /profile [{'|'.join(PROFILE_MODES)}] [turns]\033[0m")
+            return
+        if mode == "off":
+            path = profiler.stop()
+            logger.info(f"\033[92m[INFO] Profiling stopped{f', saved to {path}' if path else ''}.\033[0m")
+            return
+        profiler.start(mode, turns=int(args[1]) if len(args) > 1 else DEFAULT_PROFILE_TURNS)
+
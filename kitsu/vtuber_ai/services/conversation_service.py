@@ -1,13 +1,22 @@
 import threading
 import logging
-from typing import Optional
+from concurrent.futures import Future
+from dataclasses import asdict
+from typing import Any, Optional
 
 from vtuber_ai.core.config_manager import Config
-from vtuber_ai.core.response_gen import generate_response
+from vtuber_ai.core.response_gen import ResponseStats, generate_response
+from vtuber_ai.core.emotion import get_emotion_service
+from vtuber_ai.core.prompt_layout import PROMPT_LAYOUTS, PromptRequest
+from vtuber_ai.core.context_budget import ContextSection, get_context_budget
+from vtuber_ai.services.ollama_client import get_ollama_client
+from vtuber_ai.services.summarizer import create_summarizer
 from ai.text_utils import process_text_for_speech
 from vtuber_ai.utils.text import clean_text
-from lorebook.prompt_manager import build_full_prompt, load_lorebook, PREDEFINED_KEYWORDS, get_lore_injections, LOREBOOK
+from vtuber_ai.utils.tracing import get_tracer
+from lorebook.prompt_manager import build_full_prompt, load_lorebook, get_lorebook_index
 from ai.memory_module import ConversationMemory
+from ai.long_term_memory import get_long_term_memory
 
 logger = logging.getLogger(__name__)
 
@@ -19,25 +28,42 @@ class ConversationService:
         Handles conversation state, memory, and response generation for the AI character.
         """
         self.lock = threading.Lock()
-        self.memory = ConversationMemory()
+        self.max_memory_length = Config.max_memory_length()
+        # Turns kept in memory; how many of them reach the prompt is decided by the context budget
+        self.memory = ConversationMemory(max_len=self.max_memory_length, ai_name=AI_NAME)
+        # Turns falling off the deque are folded into memory.summary in the background
+        self.summarizer = create_summarizer(self.memory)
+        # Past exchanges from the chat log, recalled by similarity to each new message
+        self.long_term = get_long_term_memory()
         self.response_fn = response_fn
+        self.user_emotion: Optional[Future] = None  # label of the latest viewer message
+        # Metadata about the latest turn, for the transcript (see utils/transcript.py)
+        self.last_turn_metadata: dict[str, Any] = {}
+        self.last_context_usage = None
 
         self.logger = logging.getLogger(__name__)
 
-        self.max_memory_length = Config.max_memory_length()
         self.streamer_name = Config.streamer_name()
         self.vtuber_personality = build_full_prompt(self.streamer_name)
-
-        # Load the lorebook at startup
+        # Built once so it is byte-identical across turns (see prompt_layout)
+        self.persona_section = f"[PERSONALITY]\n{self.vtuber_personality.strip()}"
+        self.prompt_layout = Config.prompt_layout()
+        if self.prompt_layout not in PROMPT_LAYOUTS:
+            self.logger.warning(f"Unknown PROMPT_LAYOUT '{self.prompt_layout}', using 'legacy'.")
+            self.prompt_layout = "legacy"
+        self.context_budget = get_context_budget()
+
+        # Load the lorebook at startup and compile its trigger index
         load_lorebook()
-        self.keywords = PREDEFINED_KEYWORDS  # Initialize keywords from the lorebook
+        self.lore_index = get_lorebook_index()
+        self.keywords = self.lore_index.triggers  # Initialize keywords from the lorebook
 
     def add_user_message(self, message: str) -> None:
         """
         Safely adds a user message to the memory.
         """
         with self.lock:
-            self.memory.add_user(f"User: {message}")
+            self.memory.add_user(message)
             self.logger.debug(f"User message added to memory: {message}")
 
     def add_ai_message(self, message: str) -> None:
@@ -45,84 +71,149 @@ class ConversationService:
         Safely adds an AI response to the memory.
         """
         with self.lock:
-            self.memory.add_ai(f"{AI_NAME}: {message}")
+            self.memory.add_ai(message)
             self.logger.debug(f"AI message added to memory: {message}")
 
     def extract_triggers(self, message: str) -> list[str]:
         """
         Extract triggers from the user message based on the lorebook.
         """
-        triggers = []
-        for entry in LOREBOOK:
-            if entry["trigger"].lower() in message.lower():
-                triggers.append(entry["trigger"])
+        triggers = self.lore_index.match_triggers(message)
         self.logger.debug(f"Extracted triggers from message '{message}': {triggers}")
         return triggers
 
-    def build_prompt(self, user_message: str) -> str:
+    def build_prompt(self, user_message: str) -> PromptRequest:
         """
-        Builds the full prompt including personality, memory, facts, and lore.
+        Builds the full prompt including personality, memory, facts, and lore,
+        fitted to the CONTEXT_BUDGET token budget and arranged according to the
+        PROMPT_LAYOUT setting.
         """
-        # Extract triggers from the user message
-        triggers = self.extract_triggers(user_message)
-
-        # Get lore injections for "before_history" and "before_prompt" positions
-        before_history_lore = get_lore_injections(triggers, "before_history")
-        before_prompt_lore = get_lore_injections(triggers, "before_prompt")
-
-        sections = []
-
-        # Add lore before history
-        if before_history_lore:
-            sections.append(f"[LORE BEFORE HISTORY]\n" + "\n".join(before_history_lore))
-
-        if hasattr(self.memory, "summary") and self.memory.summary:
-            sections.append(f"[SUMMARY]\n{self.memory.summary.strip()}")
-
-        if hasattr(self.memory, "facts") and self.memory.facts:
-            facts_section = "[KNOWN FACTS]\n" + "\n".join(
-                f"- {k}: {v}" for k, v in self.memory.facts.items()
-            )
-            sections.append(facts_section)
-
-        conversation_section = "[RECENT CONVERSATION]\n" + "\n".join(self.memory.memory)
+        # Match the user message against the lorebook index in one pass; injections
+        # come back grouped by "before_history" / "before_prompt" and sorted by priority
+        lore = self.lore_index.lore_for(user_message)
+
+        with self.memory.lock:
+            summary = self.memory.summary.strip()
+            fact_keys = list(self.memory.facts)
+            facts = [f"- {k}: {v}" for k, v in self.memory.facts.items()]
+        turns = self.memory.turns()
+        # The current message is always sent; earlier turns compete for the budget
+        if turns and turns[-1][0] == "user":
+            history, message = turns[:-1], turns[-1][1]
+        else:
+            history, message = turns, user_message
+        speaker = {"user": "User", "assistant": AI_NAME}
+        recalled = self.long_term.recall(user_message) if self.long_term is not None else []
+
+        persona = ContextSection("persona", [self.persona_section])
+        current = ContextSection("message", [f"User: {message}"], header="[RECENT CONVERSATION]")
+        lore_before_history = ContextSection("lore", lore["before_history"], header="[LORE BEFORE HISTORY]")
+        summary_section = ContextSection("summary", [summary] if summary else [], header="[SUMMARY]")
+        facts_section = ContextSection("facts", facts, header="[KNOWN FACTS]")
+        recall_section = ContextSection("recall", recalled, header="[RELATED MEMORIES]")
+        history_section = ContextSection(
+            "turns", [f"{speaker[role]}: {text}" for role, text in history], keep_tail=True
+        )
+        lore_before_prompt = ContextSection("lore", lore["before_prompt"], header="[LORE BEFORE PROMPT]")
+        usage = self.context_budget.fit([
+            persona, current, lore_before_history, summary_section, facts_section, recall_section,
+            history_section, lore_before_prompt,
+        ])
+        self.logger.info(f"[Context] {usage.describe()}")
+        self.last_context_usage = usage
+        if facts_section.kept:
+            self.memory.touch_facts(fact_keys[:len(facts_section.kept)])
+
+        context = [
+            s.render() for s in (lore_before_history, summary_section, facts_section, recall_section) if s.kept
+        ]
+        lore_section = lore_before_prompt.render() or None
+        layout = self.prompt_layout
+
+        if layout == "chat":
+            # Persona, then the conversation as chat turns; everything that changes
+            # per turn rides on the last user message so earlier turns stay a stable prefix
+            messages = [{"role": "system", "content": self.persona_section}]
+            kept_turns = history[len(history) - len(history_section.kept):]
+            for role, text in kept_turns:
+                messages.append({"role": role, "content": text})
+            messages.append({"role": "user", "content": "\n\n".join(context + ([lore_section] if lore_section else []) + [message])})
+            self.logger.debug(f"Chat prompt built with {len(messages)} messages.")
+            return PromptRequest(messages=messages)
+
+        sections = list(context)
+        conversation_section = "[RECENT CONVERSATION]\n" + "\n".join(history_section.kept + current.kept)
         sections.append(conversation_section)
 
         # Add lore before prompt
-        if before_prompt_lore:
-            sections.append(f"[LORE BEFORE PROMPT]\n" + "\n".join(before_prompt_lore))
+        if lore_section:
+            sections.append(lore_section)
+
+        if layout == "prefix":
+            # The persona is identical every turn, so it goes first as the system prompt
+            prompt = "\n\n".join(sections) + f"\n\n{AI_NAME}:"
+            self.logger.debug(f"Prefix-stable prompt built with {len(sections) + 1} sections.")
+            return PromptRequest(prompt=prompt, system=self.persona_section)
 
         # Add personality
-        sections.append(f"[PERSONALITY]\n{self.vtuber_personality.strip()}")
+        sections.append(self.persona_section)
 
         full_prompt = "\n\n".join(sections) + f"\n\n{AI_NAME}:"
         self.logger.debug(f"Prompt built successfully with {len(sections)} sections.")
-        return full_prompt
+        return PromptRequest(prompt=full_prompt)
 
     def get_response(self, user_message: str) -> str:
         """
         Handles the full cycle of receiving a user message and generating an AI response.
         """
+        tracer = get_tracer()
+        turn = tracer.begin_turn()
         try:
             self.logger.info(f'{AI_NAME} is thinking...')
-            self.add_user_message(user_message)
-
-            prompt = self.build_prompt(user_message)
-            response = self.response_fn(prompt, process_text_for_speech)
-
-            self.add_ai_message(response)
-            return response
+            self.last_turn_metadata = {}
+            with tracer.span("turn"):
+                return self._respond(user_message, turn)
 
         except Exception as e:
             logger.exception(f"Error generating response: {e}")
             return "I'm sorry, I encountered an issue while processing your request. Please try again."
 
+    def _respond(self, user_message: str, turn: int) -> str:
+        """One traced turn: build the prompt, stream and speak the response, record it."""
+        tracer = get_tracer()
+        self.user_emotion = get_emotion_service().submit(user_message)
+        self.add_user_message(user_message)
+
+        with tracer.span("prompt.build"):
+            prompt = self.build_prompt(user_message)
+        client = get_ollama_client()
+        previous_timings = client.last_timings
+        stats = ResponseStats()
+        response = self.response_fn(prompt, process_text_for_speech, stats=stats)
+        timings = client.last_timings
+        if timings is not None and timings is not previous_timings:
+            # Refine the token estimate with the count the server reported
+            self.context_budget.counter.observe(str(prompt), timings.prompt_eval_count)
+        else:
+            timings = None
+        self.last_turn_metadata = {
+            "turn": turn,
+            "user_emotion": self.user_emotion,
+            "layout": self.prompt_layout,
+            "timing": {"first_token_s": stats.first_token_s, "stream_s": stats.stream_s, "total_s": stats.total_s},
+            "chunks": {"count": len(stats.chunk_chars), "chars": stats.chunk_chars, "emotes": stats.emotes},
+            "context_tokens": dict(self.last_context_usage.tokens) if self.last_context_usage else None,
+            "ollama": asdict(timings) if timings is not None else None,
+            "error": stats.error,
+        }
+
+        self.add_ai_message(response)
+        if self.long_term is not None:
+            self.long_term.add_turn(user_message, response)
+        return response
+
     def extract_keywords(self, message: str) -> list[str]:
         """
         Extract keywords from the user message based on the lorebook keys.
         """
-        keywords = []
-        for key in self.keywords:
-            if key.lower() in message.lower():
-                keywords.append(key)
-        return keywords
\ No newline at end of file
+        return self.lore_index.match_triggers(message)
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+Shared HTTP client for the local Ollama server.
+
+One pooled, keep-alive connection set is reused for every turn and health probe,
+streamed NDJSON lines are decoded with orjson, and sampling parameters go in the
+request's "options" object where Ollama actually reads them. The server-side
+timings from the final message of every stream are kept for inspection.
+"""
+import asyncio
+import threading
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import httpx
+import orjson
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True)
+class OllamaTimings:
+    """Server-side timings reported in the final ("done") message of a stream, in ms."""
+    endpoint: str
+    prompt_eval_count: int
+    prompt_eval_ms: float
+    eval_count: int
+    eval_ms: float
+    load_ms: float
+    total_ms: float
+
+    @classmethod
+    def from_message(cls, endpoint: str, message: dict) -> "OllamaTimings":
+        ns = 1e-6
+        return cls(
+            endpoint=endpoint,
+            prompt_eval_count=int(message.get("prompt_eval_count", 0)),
+            prompt_eval_ms=message.get("prompt_eval_duration", 0) * ns,
+            eval_count=int(message.get("eval_count", 0)),
+            eval_ms=message.get("eval_duration", 0) * ns,
+            load_ms=message.get("load_duration", 0) * ns,
+            total_ms=message.get("total_duration", 0) * ns,
+        )
+
+    @property
+    def eval_tokens_per_s(self) -> float:
+        return self.eval_count / self.eval_ms * 1000 if self.eval_ms else 0.0
+
+    def describe(self) -> str:
+        # A small prompt_eval_count on a long prompt means the server reused its cached prefix
+        return (f"prompt eval {self.prompt_eval_count} tok in {self.prompt_eval_ms:.0f} ms | "
+                f"generation {self.eval_count} tok in {self.eval_ms:.0f} ms ({self.eval_tokens_per_s:.1f} tok/s) | "
+                f"load {self.load_ms:.0f} ms, total {self.total_ms:.0f} ms")
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        model: Optional[str] = None,
+        options: Optional[dict] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_connections: int = 4,
+    ):
+        self.host = (host or Config.ollama_host()).rstrip("/")
+        self.model = model or Config.ollama_model()
+        self.options = dict(options if options is not None else Config.ollama_options())
+        timeouts = Config.ollama_timeouts()
+        self.timeout = httpx.Timeout(
+            read_timeout if read_timeout is not None else timeouts.get("read", 120.0),
+            connect=connect_timeout if connect_timeout is not None else timeouts.get("connect", 2.0),
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=timeouts.get("keepalive", 300.0),
+        )
+        self._client = httpx.Client(base_url=self.host, timeout=self.timeout, limits=self.limits)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_lock = threading.Lock()
+        self.timings: deque[OllamaTimings] = deque(maxlen=100)
+        self._foreground = 0  # conversation streams in flight
+        self._foreground_lock = threading.Lock()
+
+    def build_payload(self, prompt: str, stream: bool = True, options: Optional[dict] = None, **extra: Any) -> bytes:
+        """
+        Encode a /api/generate request. Per-call options are merged over the defaults.
+        """
+        merged = dict(self.options)
+        if options:
+            merged.update(options)
+        payload = {"model": self.model, "prompt": prompt, "stream": stream, "options": merged}
+        payload.update(extra)
+        return orjson.dumps(payload)
+
+    def build_chat_payload(self, messages: list[dict], stream: bool = True, options: Optional[dict] = None, **extra: Any) -> bytes:
+        """
+        Encode a /api/chat request. Per-call options are merged over the defaults.
+        """
+        merged = dict(self.options)
+        if options:
+            merged.update(options)
+        payload = {"model": self.model, "messages": messages, "stream": stream, "options": merged}
+        payload.update(extra)
+        return orjson.dumps(payload)
+
+    @property
+    def last_timings(self) -> Optional[OllamaTimings]:
+        return self.timings[-1] if self.timings else None
+
+    def _record_timings(self, endpoint: str, message: dict) -> None:
+        timings = OllamaTimings.from_message(endpoint, message)
+        self.timings.append(timings)
+        logger.info(f"[Ollama] {timings.describe()}")
+
+    @property
+    def busy(self) -> bool:
+        """True while a foreground (conversation) stream is in flight."""
+        return self._foreground > 0
+
+    def _stream(self, endpoint: str, body: bytes, background: bool = False) -> Iterator[dict]:
+        # Background streams (summaries) neither mark the client busy nor record
+        # timings, so they stay invisible to the conversation path
+        if not background:
+            with self._foreground_lock:
+                self._foreground += 1
+        try:
+            with self._client.stream("POST", endpoint, content=body, headers=_JSON_HEADERS) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        message = orjson.loads(line)
+                        if message.get("done") and not background:
+                            self._record_timings(endpoint, message)
+                        yield message
+        finally:
+            if not background:
+                with self._foreground_lock:
+                    self._foreground -= 1
+
+    def ping(self, timeout: float = 1.0) -> bool:
+        """Return True if the server answers on its root endpoint."""
+        try:
+            return self._client.get("/", timeout=timeout).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def stream_generate(
+        self, prompt: str, options: Optional[dict] = None, background: bool = False, **extra: Any
+    ) -> Iterator[dict]:
+        """
+        Stream /api/generate, yielding each decoded NDJSON message.
+        Raises httpx.HTTPError if the request fails.
+        """
+        body = self.build_payload(prompt, stream=True, options=options, **extra)
+        yield from self._stream("/api/generate", body, background=background)
+
+    def stream_chat(self, messages: list[dict], options: Optional[dict] = None, **extra: Any) -> Iterator[dict]:
+        """
+        Stream /api/chat, yielding each decoded NDJSON message; the text is in
+        message["message"]["content"]. Raises httpx.HTTPError if the request fails.
+        """
+        body = self.build_chat_payload(messages, stream=True, options=options, **extra)
+        yield from self._stream("/api/chat", body)
+
+    def generate(self, prompt: str, options: Optional[dict] = None, **extra: Any) -> str:
+        """Run a non-streaming generation and return the response text."""
+        body = self.build_payload(prompt, stream=False, options=options, **extra)
+        response = self._client.post("/api/generate", content=body, headers=_JSON_HEADERS)
+        response.raise_for_status()
+        return orjson.loads(response.content).get("response", "")
+
+    async def astream_generate(
+        self, prompt: str, options: Optional[dict] = None, background: bool = False, **extra: Any
+    ) -> AsyncIterator[dict]:
+        """
+        Async counterpart of stream_generate for asyncio callers.
+        """
+        body = self.build_payload(prompt, stream=True, options=options, **extra)
+        async for message in self._astream("/api/generate", body, background=background):
+            yield message
+
+    async def _astream(self, endpoint: str, body: bytes, background: bool = False) -> AsyncIterator[dict]:
+        # Same busy and timings bookkeeping as _stream
+        if not background:
+            with self._foreground_lock:
+                self._foreground += 1
+        try:
+            client = self._get_async_client()
+            async with client.stream("POST", endpoint, content=body, headers=_JSON_HEADERS) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        message = orjson.loads(line)
+                        if message.get("done") and not background:
+                            self._record_timings(endpoint, message)
+                        yield message
+        finally:
+            if not background:
+                with self._foreground_lock:
+                    self._foreground -= 1
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # An AsyncClient's pool belongs to the loop it was first used on
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            if self._async_client is None or self._async_loop is not loop:
+                self._discard_async_client()
+                self._async_client = httpx.AsyncClient(base_url=self.host, timeout=self.timeout, limits=self.limits)
+                self._async_loop = loop
+            return self._async_client
+
+    def _discard_async_client(self) -> None:
+        """Close the async client on the loop that owns its connections and forget it."""
+        client, loop = self._async_client, self._async_loop
+        self._async_client = None
+        self._async_loop = None
+        if client is None or client.is_closed:
+            return
+        if loop is not None and not loop.is_closed():
+            # Runs now if the loop is running, otherwise the next time it does
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            # Its transports can't be closed without their loop; dropping the
+            # client lets the sockets be collected
+            logger.debug("[Ollama] Async client's event loop is closed; dropping its connection pool")
+
+    def close(self) -> None:
+        self._client.close()
+        with self._async_lock:
+            self._discard_async_client()
+
+    async def aclose(self) -> None:
+        """Close the async client; call it before the event loop that used astream_generate ends."""
+        with self._async_lock:
+            client, loop = self._async_client, self._async_loop
+            if loop is not asyncio.get_running_loop():
+                self._discard_async_client()
+                return
+            self._async_client = None
+            self._async_loop = None
+        if client is not None:
+            await client.aclose()
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Return the process-wide Ollama client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+            logger.debug(f"Ollama client created for {_client.host} (model: {_client.model})")
+        return _client
@@ -1,20 +1,29 @@
 import subprocess
 import platform
 import time
-import requests
+from typing import Optional
 
 import logging
 
+from .ollama_client import OllamaClient, get_ollama_client
+
 logger = logging.getLogger(__name__)
 
 _ollama_process = None  # Track the subprocess globally (internal use)
 
-def is_ollama_running(host="http://localhost:11434") -> bool:
+def is_ollama_running(host: Optional[str] = None) -> bool:
+    """
+    Probe the Ollama server through the shared client's connection pool.
+    A host other than the configured one gets a throwaway client.
+    """
+    client = get_ollama_client()
+    if host is None or host.rstrip("/") == client.host:
+        return client.ping()
+    probe = OllamaClient(host=host, max_connections=1)
     try:
-        r = requests.get(host, timeout=1)
-        return r.status_code == 200
-    except requests.exceptions.RequestException:
-        return False
+        return probe.ping()
+    finally:
+        probe.close()
 
 def start_ollama():
     global _ollama_process
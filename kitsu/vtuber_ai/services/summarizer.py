@@ -0,0 +1,208 @@
+"""
+Rolling conversation summary, maintained off the request path.
+
+ConversationMemory hands every entry that is about to fall off its deque to
+RollingSummarizer.submit, which only queues it. A background thread folds the
+queued entries into the existing summary with one small LLM call on the shared
+Ollama client and swaps the result in. The memory lock is held only to read
+the old summary and to swap in the new one, never during inference.
+
+A conversation turn always comes first. The summarizer waits while a
+foreground stream is in flight. If a turn starts while a summary is being
+generated, that summary is abandoned and retried later with the same entries
+(plus any evicted since).
+
+Each call folds at most max_fold_entries of the oldest queued entries, and at
+most max_pending entries are kept queued; while Ollama is unreachable the
+oldest are dropped beyond that. A failed call is retried with exponential
+backoff, whatever the error, so the thread never dies and leaves entries
+piling up.
+"""
+from typing import Optional
+import os
+import threading
+import time
+import logging
+
+import httpx
+
+from vtuber_ai.core.config_manager import Config
+from vtuber_ai.core.prompt_layout import message_text
+from vtuber_ai.services.ollama_client import OllamaClient, get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a livestream chat between viewers (User) and {ai_name}.\n"
+    "Update the summary with the new lines below. Keep names, facts, promises and running jokes; "
+    "drop small talk. Write at most {max_words} words of plain prose, no preamble.\n\n"
+    "[CURRENT SUMMARY]\n{summary}\n\n"
+    "[NEW LINES]\n{lines}\n\n"
+    "[UPDATED SUMMARY]\n"
+)
+IDLE_POLL_S = 0.25
+RETRY_DELAY_S = 5.0
+MAX_RETRY_DELAY_S = 300.0
+# Niceness added to the summarizer thread where the OS supports per-thread priorities
+THREAD_NICENESS = 10
+
+
+class RollingSummarizer:
+    def __init__(
+        self,
+        memory,
+        client: Optional[OllamaClient] = None,
+        max_words: int = 150,
+        batch_entries: int = 2,
+        num_predict: int = 256,
+        max_fold_entries: int = 16,
+        max_pending: int = 256,
+    ):
+        self.memory = memory
+        self._client = client
+        self.max_words = max_words
+        self.batch_entries = max(1, batch_entries)
+        self.max_fold_entries = max(self.batch_entries, max_fold_entries)
+        self.max_pending = max(self.max_fold_entries, max_pending)
+        self.options = {"temperature": 0.3, "num_predict": num_predict}
+        self._pending: list[str] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.runs = 0
+        self.abandoned = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def client(self) -> OllamaClient:
+        if self._client is None:
+            self._client = get_ollama_client()
+        return self._client
+
+    def submit(self, entry: str) -> None:
+        """Queue an evicted memory entry. Never blocks on summarization."""
+        with self._cond:
+            self._pending.append(entry)
+            if len(self._pending) > self.max_pending:
+                del self._pending[0]
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning(f"[Summarizer] Backlog full; dropped {self.dropped} evicted lines so far")
+            self._cond.notify()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="summarizer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _lower_priority(self) -> None:
+        try:
+            # On Linux niceness is per thread, so this leaves the speaking path alone
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), THREAD_NICENESS)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"[Summarizer] Could not lower thread priority: {e}")
+
+    def _next_batch(self) -> Optional[list[str]]:
+        with self._cond:
+            while not self._stopped and len(self._pending) < self.batch_entries:
+                self._cond.wait()
+            return None if self._stopped else self._pending[:self.max_fold_entries]
+
+    def _sleep(self, seconds: float) -> bool:
+        """Wait seconds unless stopped first; returns False once stopped."""
+        with self._cond:
+            return not self._cond.wait_for(lambda: self._stopped, seconds)
+
+    def _wait_idle(self) -> bool:
+        while self.client.busy:
+            if self._stopped:
+                return False
+            time.sleep(IDLE_POLL_S)
+        return not self._stopped
+
+    def _fold(self, summary: str, lines: list[str]) -> Optional[str]:
+        """Return the updated summary, or None if a conversation turn interrupted it."""
+        prompt = SUMMARY_PROMPT.format(
+            ai_name=self.memory.ai_name,
+            max_words=self.max_words,
+            summary=summary or "(empty)",
+            lines="\n".join(lines),
+        )
+        parts = []
+        for message in self.client.stream_generate(prompt, options=self.options, background=True):
+            if self.client.busy or self._stopped:
+                return None
+            parts.append(message_text(message))
+        return "".join(parts).strip()
+
+    def _run(self) -> None:
+        self._lower_priority()
+        delay = RETRY_DELAY_S
+        while True:
+            try:
+                batch = self._next_batch()
+                if batch is None or not self._wait_idle():
+                    return
+                self._summarize(batch)
+            except Exception as e:
+                self.failures += 1
+                level = logging.WARNING if isinstance(e, httpx.HTTPError) else logging.ERROR
+                logger.log(level, f"[Summarizer] Summary failed, retrying in {delay:.0f}s: {e!r}")
+                if not self._sleep(delay):
+                    return
+                delay = min(delay * 2, MAX_RETRY_DELAY_S)
+            else:
+                delay = RETRY_DELAY_S
+
+    def _summarize(self, batch: list[str]) -> None:
+        with self.memory.lock:
+            old_summary = self.memory.summary
+        start = time.perf_counter()
+        new_summary = self._fold(old_summary, batch)
+        if new_summary is None:
+            self.abandoned += 1
+            logger.debug("[Summarizer] Abandoned summary; a conversation turn started")
+            return
+        with self._cond:
+            # submit only appends and drops from the front, so the batch is
+            # still the oldest entries unless some of it was dropped meanwhile
+            done = len(batch)
+            while done and self._pending[:done] != batch[len(batch) - done:]:
+                done -= 1
+            del self._pending[:done]
+        if not new_summary:
+            return
+        if self.memory.replace_summary(old_summary, new_summary):
+            self.runs += 1
+            logger.info(
+                f"[Summarizer] Folded {len(batch)} evicted lines into the summary "
+                f"in {time.perf_counter() - start:.2f}s ({len(new_summary.split())} words)"
+            )
+        else:
+            logger.debug("[Summarizer] Summary changed meanwhile; discarding this update")
+
+
+def create_summarizer(memory) -> Optional[RollingSummarizer]:
+    """Build and start the summarizer configured by SUMMARIZER, or None if disabled."""
+    settings = Config.summarizer()
+    if not settings.get("enabled", True):
+        return None
+    summarizer = RollingSummarizer(
+        memory,
+        max_words=int(settings.get("max_words", 150)),
+        batch_entries=int(settings.get("batch_entries", 2)),
+        num_predict=int(settings.get("num_predict", 256)),
+        max_fold_entries=int(settings.get("max_fold_entries", 16)),
+        max_pending=int(settings.get("max_pending", 256)),
+    )
+    memory.on_evict = summarizer.submit
+    summarizer.start()
+    return summarizer
@@ -1,26 +1,79 @@
 """
 File operations utilities for VTuber AI.
 """
-from datetime import datetime
+from dataclasses import dataclass
 import os
-from typing import Optional
+import re
+import time
+from typing import Any, Iterator, Optional
 
 import logging
 
+from vtuber_ai.utils.transcript import get_transcript_writer
+
 logger = logging.getLogger(__name__)
 
-def log_chat(question: str, response: str, filename: Optional[str] = None):
+_TIMESTAMP_LINE = re.compile(rb"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]\r?\n$")
+
+
+def default_chat_log_path() -> str:
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
+    return os.path.join(data_dir, "chat_log.txt")
+
+
+@dataclass
+class ChatLogEntry:
+    timestamp: str
+    question: str
+    response: str
+    end_offset: int  # byte offset just past this entry
+
+
+def _parse_block(lines: list[bytes], end_offset: int) -> Optional[ChatLogEntry]:
+    text = b"".join(lines).decode("utf-8", errors="replace")
+    header, _, body = text.partition("\n")
+    question, sep, response = body.partition("\nAiri:")
+    if not sep or not question.startswith("Você:"):
+        return None
+    return ChatLogEntry(header.strip()[1:-1], question[len("Você:"):].strip(), response.strip(), end_offset)
+
+
+def read_chat_log(filename: Optional[str] = None, start_offset: int = 0) -> Iterator[ChatLogEntry]:
     """
-    Log a chat interaction to a file with a timestamp.
-    Always writes to kitsu/data/chat_log.txt by default.
+    Lazily yield the complete entries of the legacy text chat log
+    (data/chat_log.txt, written by log_chat before the JSONL transcript), starting
+    at a byte offset (an earlier entry's end_offset). Replies may span lines; an
+    entry ends at the next timestamp line, or at EOF once its closing blank line
+    has been written.
     """
-    if filename is None:
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
-        os.makedirs(data_dir, exist_ok=True)
-        filename = os.path.join(data_dir, "chat_log.txt")
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filename = filename or default_chat_log_path()
     try:
-        with open(filename, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}]\nVocê: {question}\nAiri: {response}\n\n")
-    except Exception as e:
-        logger.info(f"[Log error]: {e}")
+        f = open(filename, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(start_offset)
+        block: list[bytes] = []
+        offset = start_offset
+        for line in f:
+            if _TIMESTAMP_LINE.match(line) and block:
+                entry = _parse_block(block, offset)
+                if entry is not None:
+                    yield entry
+                block = []
+            block.append(line)
+            offset += len(line)
+        if block and b"".join(block[-2:]).endswith(b"\n\n"):
+            entry = _parse_block(block, offset)
+            if entry is not None:
+                yield entry
+
+
+def log_chat(question: str, response: str, **metadata: Any) -> None:
+    """
+    Record a chat interaction in the JSONL transcript (see utils/transcript.py).
+    Only enqueues the record; the file is written on the transcript thread.
+    metadata (timing, emotion, language, chunks...) is stored alongside; Future
+    values are resolved by the writer.
+    """
+    get_transcript_writer().write({"ts": time.time(), "question": question, "response": response, **metadata})
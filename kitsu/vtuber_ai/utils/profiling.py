@@ -0,0 +1,200 @@
+"""
+Opt-in profiling of live sessions.
+
+Profiling is off unless PROFILING["mode"] asks for it at startup, or the
+console starts it for a window of turns (/profile <mode> [turns]). Modes:
+
+    off        no profiler, no overhead
+    cprofile   deterministic cProfile of the main thread (console loop, prompt
+               building, LLM streaming), saved as a .prof file for pstats or
+               snakeviz. cProfile only sees the thread that enabled it.
+    sampling   a background thread that snapshots the stacks of the other
+               threads (the speech pipeline workers included) every
+               sample_interval_ms and writes them as collapsed stacks, one
+               "thread;frame;frame count" line each, for flamegraph.pl or
+               speedscope. The app itself runs at full speed between samples.
+
+Output goes to PROFILING["output_dir"] as profile-<time>.prof / .collapsed.
+"""
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import logging
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_DIR = KITSU_DIR / "data" / "profiles"
+PROFILE_MODES = ("off", "cprofile", "sampling")
+DEFAULT_SAMPLE_INTERVAL_MS = 10
+# Entries of the cProfile summary logged when a profile is saved
+SUMMARY_ENTRIES = 30
+
+
+def _frame_label(code) -> str:
+    # Collapsed-stack format separates frames with ';', so keep it out of labels.
+    # co_qualname is new in Python 3.11; older versions only have the bare name.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{Path(code.co_filename).stem}.{name}".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Records collapsed stacks of every other thread (or only those named in threads) at a fixed interval."""
+
+    def __init__(self, interval_s: float = DEFAULT_SAMPLE_INTERVAL_MS / 1000, threads: Optional[list[str]] = None):
+        self.interval_s = interval_s
+        self.threads = set(threads) if threads else None
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, str(ident))
+            if ident == own or (self.threads is not None and name not in self.threads):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(name.replace(";", ":"))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def write_collapsed(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileController:
+    """Starts and stops the configured profiler, for the whole session or a window of turns."""
+
+    def __init__(
+        self,
+        output_dir: Path = DEFAULT_OUTPUT_DIR,
+        sample_interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS,
+        threads: Optional[list[str]] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.sample_interval_s = sample_interval_ms / 1000
+        self.threads = threads
+        self.mode = "off"
+        self.turns_left: Optional[int] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    def describe(self) -> str:
+        if not self.active:
+            return "Profiling is off."
+        window = f" for {self.turns_left} more turn(s)" if self.turns_left is not None else " until exit"
+        return f"Profiling ({self.mode}){window}."
+
+    def start(self, mode: str, turns: Optional[int] = None) -> None:
+        """Start profiling in mode; with turns set it stops by itself after that many turns."""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {', '.join(PROFILE_MODES)}")
+        self.stop()
+        if mode == "off":
+            return
+        with self._lock:
+            if mode == "cprofile":
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            else:
+                self._sampler = SamplingProfiler(self.sample_interval_s, self.threads)
+                self._sampler.start()
+            self.mode = mode
+            self.turns_left = turns
+        logger.info(f"[Profile] {self.describe()}")
+
+    def stop(self) -> Optional[Path]:
+        """Stop profiling and write the results. Returns the output file, if any."""
+        with self._lock:
+            if not self.active:
+                return None
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            stem = self.output_dir / f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            if self._cprofile is not None:
+                self._cprofile.disable()
+                path = stem.with_suffix(".prof")
+                self._cprofile.dump_stats(path)
+                summary = io.StringIO()
+                pstats.Stats(self._cprofile, stream=summary).sort_stats("cumtime").print_stats(SUMMARY_ENTRIES)
+                logger.debug(f"[Profile] Top {SUMMARY_ENTRIES} by cumulative time:\n{summary.getvalue()}")
+                self._cprofile = None
+            else:
+                self._sampler.stop()
+                path = stem.with_suffix(".collapsed")
+                self._sampler.write_collapsed(path)
+                logger.debug(f"[Profile] {self._sampler.samples} samples, {len(self._sampler.stacks)} distinct stacks")
+                self._sampler = None
+            self.mode = "off"
+            self.turns_left = None
+        logger.info(f"[Profile] Saved to {path}")
+        return path
+
+    def turn_finished(self) -> None:
+        """Count down a turn window; the profile is saved when it runs out."""
+        if self.turns_left is None:
+            return
+        self.turns_left -= 1
+        if self.turns_left <= 0:
+            self.stop()
+
+
+_profiler: Optional[ProfileController] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> ProfileController:
+    """Return the shared profile controller configured by PROFILING."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            settings = Config.profiling()
+            output_dir = Path(settings.get("output_dir", DEFAULT_OUTPUT_DIR))
+            _profiler = ProfileController(
+                output_dir=output_dir if output_dir.is_absolute() else KITSU_DIR / output_dir,
+                sample_interval_ms=float(settings.get("sample_interval_ms", DEFAULT_SAMPLE_INTERVAL_MS)),
+                threads=settings.get("threads"),
+            )
+        return _profiler
+
+
+def start_configured_profiling() -> None:
+    """Start session-long profiling if PROFILING["mode"] asks for it."""
+    mode = Config.profiling().get("mode", "off")
+    if mode != "off":
+        get_profiler().start(mode)
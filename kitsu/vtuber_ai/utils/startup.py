@@ -0,0 +1,64 @@
+"""
+Startup timing: records how long each component takes to import or initialize
+and logs a breakdown once the app is ready.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.entries: list[tuple[str, float, str]] = []  # (component, seconds, thread name)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, component: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, time.perf_counter() - start)
+
+    def record(self, component: str, seconds: float) -> None:
+        with self._lock:
+            self.entries.append((component, seconds, threading.current_thread().name))
+
+    def log(self, title: str = "Startup report") -> None:
+        with self._lock:
+            entries = list(self.entries)
+        total = time.perf_counter() - self.started_at
+        lines = [f"{title} ({total:.2f}s since process start):"]
+        for component, seconds, thread in sorted(entries, key=lambda e: e[1], reverse=True):
+            where = "" if thread == "MainThread" else f" [{thread}]"
+            lines.append(f"  {seconds * 1000:9.1f} ms  {component}{where}")
+        logger.info("\n".join(lines))
+
+
+startup_report = StartupReport()
+
+
+def prefetch(components: dict[str, Callable[[], object]], on_done: Optional[Callable[[], None]] = None) -> threading.Thread:
+    """
+    Load heavy components on a background thread so the first turn doesn't pay
+    for them. Each load is timed into the startup report; failures are logged
+    and left for on-first-use loading to retry.
+    """
+    def worker():
+        for name, load in components.items():
+            try:
+                with startup_report.measure(name):
+                    load()
+            except Exception as e:
+                logger.warning(f"[Prefetch] {name} failed: {e}")
+        if on_done is not None:
+            on_done()
+
+    thread = threading.Thread(target=worker, name="model-prefetch", daemon=True)
+    thread.start()
+    return thread
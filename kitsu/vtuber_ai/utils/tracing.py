@@ -0,0 +1,302 @@
+"""
+Per-turn latency tracing across the speech pipeline.
+
+Every stage records a span (name, monotonic start and end) tagged with the
+turn ID and, from the first chunk boundary on, the chunk index:
+
+    turn                 the whole get_response call
+    prompt.build         context assembly in build_prompt
+    llm.request          HTTP request until the token stream ends
+    llm.first_token      request start until the first token
+    chunk                (instant) a text chunk handed to the speech pipeline
+    pipeline.preprocess  language, emotion and normalization of one chunk
+    tts.language / tts.emotion / tts.normalize
+    pipeline.synthesis   TTS inference of one chunk
+    audio.enqueue        handing the audio to the player (waits if its buffer is full)
+    audio.playback       when the chunk was actually heard, from the audio callback
+    turn.first_audio     turn start until the first chunk started playing
+
+Worker threads pick up the turn and chunk from bind(), which the pipeline
+wraps around each item. Span durations feed a log-bucketed histogram per name
+(p50/p95/p99 through summary()), and the most recent spans can be written as
+Chrome trace-event JSON (chrome://tracing or https://ui.perfetto.dev) with
+export_chrome().
+"""
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import atexit
+import math
+import os
+import threading
+import time
+import logging
+
+import orjson
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_EXPORT_DIR = KITSU_DIR / "data" / "traces"
+DEFAULT_MAX_EVENTS = 20000
+# Turn start times kept for turn.first_audio; playback lags its turn by seconds at most
+TURN_HISTORY = 64
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed histogram: 8 buckets per octave from 10 µs up (about 9% resolution)."""
+
+    MIN_S = 1e-5
+    BUCKETS_PER_OCTAVE = 8
+    BUCKETS = 224  # up to about 27 minutes
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds <= self.MIN_S:
+            bucket = 0
+        else:
+            bucket = min(int(math.log2(seconds / self.MIN_S) * self.BUCKETS_PER_OCTAVE) + 1, self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th percentile (capped at the maximum seen)."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.MIN_S * 2 ** (bucket / self.BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+
+class Tracer:
+    def __init__(self, enabled: bool = True, max_events: int = DEFAULT_MAX_EVENTS):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.origin_wall = time.time()
+        self._events: deque[tuple] = deque(maxlen=max_events)
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._turn_starts: dict[int, float] = {}
+        self._tracks: dict[str, int] = {}
+        self._thread_names: dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    # -- context ----------------------------------------------------------
+
+    def begin_turn(self) -> int:
+        """Start a new turn and bind it to the calling thread. Returns the turn ID."""
+        with self._lock:
+            self._turn += 1
+            turn = self._turn
+            self._turn_starts[turn] = time.perf_counter()
+            if len(self._turn_starts) > TURN_HISTORY:
+                del self._turn_starts[min(self._turn_starts)]
+        self._local.turn = turn
+        self._local.chunk = None
+        return turn
+
+    def context(self) -> tuple[Optional[int], Optional[int]]:
+        """(turn, chunk) bound to the calling thread."""
+        return getattr(self._local, "turn", None), getattr(self._local, "chunk", None)
+
+    @contextmanager
+    def bind(self, turn: Optional[int] = None, chunk: Optional[int] = None) -> Iterator[None]:
+        """Tag spans recorded on this thread with turn/chunk (turn defaults to the bound one)."""
+        previous = self.context()
+        self._local.turn = turn if turn is not None else previous[0]
+        self._local.chunk = chunk
+        try:
+            yield
+        finally:
+            self._local.turn, self._local.chunk = previous
+
+    # -- recording --------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        turn: Optional[int] = None,
+        chunk: Optional[int] = None,
+        track: Optional[str] = None,
+        **args: Any,
+    ) -> None:
+        """
+        Record a span from perf_counter timestamps. turn/chunk default to the
+        thread's binding; track puts it on a named timeline instead of the thread's.
+        """
+        if not self.enabled:
+            return
+        if turn is None:
+            turn, bound_chunk = self.context()
+            chunk = bound_chunk if chunk is None else chunk
+        tid = self._tid(track)
+        with self._lock:
+            self._events.append(("X", name, start, end, tid, turn, chunk, args))
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(max(end - start, 0.0))
+
+    def instant(self, name: str, at: Optional[float] = None, **args: Any) -> None:
+        if not self.enabled:
+            return
+        turn, chunk = self.context()
+        at = time.perf_counter() if at is None else at
+        tid = self._tid(None)
+        with self._lock:
+            self._events.append(("i", name, at, at, tid, turn, chunk, args))
+
+    def playback(self, turn: Optional[int], chunk: Optional[int], start: float, end: float) -> None:
+        """Record when a chunk was heard; the first chunk of a turn also closes turn.first_audio."""
+        self.record("audio.playback", start, end, turn=turn, chunk=chunk, track="audio output")
+        if chunk == 0 and turn is not None:
+            turn_start = self._turn_starts.get(turn)
+            if turn_start is not None:
+                self.record("turn.first_audio", turn_start, start, turn=turn, chunk=chunk, track="turns")
+
+    def _tid(self, track: Optional[str]) -> int:
+        if track is not None:
+            tid = self._tracks.get(track)
+            if tid is None:
+                tid = self._tracks.setdefault(track, -(len(self._tracks) + 1))
+                self._thread_names[tid] = track
+            return tid
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    # -- reporting --------------------------------------------------------
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """count, mean, p50, p95, p99 and max (seconds) per span name."""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "mean": h.total / h.count,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                    "p99": h.percentile(99),
+                    "max": h.max,
+                }
+                for name, h in sorted(self._histograms.items())
+                if h.count
+            }
+
+    def spans(self, name: str) -> list[tuple[float, float, Optional[int], Optional[int]]]:
+        """(start, end, turn, chunk) of the retained spans called name, in recording order."""
+        with self._lock:
+            return [(e[2], e[3], e[5], e[6]) for e in self._events if e[0] == "X" and e[1] == name]
+
+    def describe(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return "No spans recorded yet."
+        width = max(len(name) for name in summary)
+        lines = [f"{'span':<{width}}  {'count':>6}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'max ms':>9}"]
+        for name, s in summary.items():
+            lines.append(
+                f"{name:<{width}}  {s['count']:>6}  {s['p50'] * 1000:>9.1f}  {s['p95'] * 1000:>9.1f}"
+                f"  {s['p99'] * 1000:>9.1f}  {s['max'] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_events(self) -> list[dict]:
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        out = [
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for phase, name, start, end, tid, turn, chunk, args in events:
+            event = {
+                "ph": phase,
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - self.origin) * 1e6,
+                "args": {"turn": turn, "chunk": chunk, **args},
+            }
+            if phase == "X":
+                event["dur"] = (end - start) * 1e6
+            else:
+                event["s"] = "t"
+            out.append(event)
+        return out
+
+    def export_chrome(self, path: Optional[Path] = None) -> Path:
+        """Write the recorded spans as Chrome trace-event JSON and return the file path."""
+        if path is None:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = trace_export_dir() / f"trace-{stamp}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trace = {
+            "traceEvents": self.chrome_events(),
+            "displayTimeUnit": "ms",
+            "otherData": {"origin_unix_s": self.origin_wall},
+        }
+        path.write_bytes(orjson.dumps(trace, option=orjson.OPT_SERIALIZE_NUMPY))
+        logger.info(f"[Trace] Wrote {len(trace['traceEvents'])} events to {path}")
+        return path
+
+
+def trace_export_dir() -> Path:
+    """Directory configured by TRACING["export_dir"] (relative paths are under kitsu/)."""
+    directory = Path(Config.tracing().get("export_dir", DEFAULT_EXPORT_DIR))
+    return directory if directory.is_absolute() else KITSU_DIR / directory
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the shared tracer configured by TRACING."""
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            settings = Config.tracing()
+            tracer = Tracer(
+                enabled=settings.get("enabled", True),
+                max_events=int(settings.get("max_events", DEFAULT_MAX_EVENTS)),
+            )
+            if tracer.enabled and settings.get("export_on_exit", False):
+                atexit.register(tracer.export_chrome)
+            _tracer = tracer
+        return _tracer
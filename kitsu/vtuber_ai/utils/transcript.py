@@ -0,0 +1,243 @@
+"""
+Structured conversation transcript.
+
+Each turn becomes one JSON line in data/transcripts/transcript-<start time>.jsonl:
+
+    {"ts": 1760000000.12, "question": "...", "response": "...", "lang": "en",
+     "user_emotion": "joy", "timing": {...}, "chunks": {...}, "ollama": {...}}
+
+log_chat only puts the record on a bounded queue. A writer thread serializes
+it with orjson, resolves metadata that isn't ready yet (the viewer-emotion
+Future, the response language), appends to the current file and fsyncs at
+most once per FSYNC_INTERVAL_S. A file is rotated once it passes max_bytes or
+max_age_s. If the queue is ever full the record is dropped and counted rather
+than making the console loop wait.
+
+read_transcripts streams records lazily across files, skipping whole files
+that end before `since` (file names carry their start time), so a time range
+out of months of logs is read without parsing the rest.
+"""
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import atexit
+import os
+import queue
+import threading
+import time
+import logging
+
+import orjson
+
+from vtuber_ai.core.config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+KITSU_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_DIR = KITSU_DIR / "data" / "transcripts"
+FILE_PREFIX = "transcript-"
+FILE_TIME_FORMAT = "%Y%m%d-%H%M%S"
+FSYNC_INTERVAL_S = 1.0
+FUTURE_TIMEOUT_S = 5.0
+
+_CLOSE = object()
+
+
+def _file_name(start: float) -> str:
+    stamp = datetime.fromtimestamp(start)
+    return f"{FILE_PREFIX}{stamp.strftime(FILE_TIME_FORMAT)}-{stamp.microsecond // 1000:03d}.jsonl"
+
+
+def _file_start(path: Path) -> Optional[float]:
+    try:
+        stamp, _, millis = path.stem[len(FILE_PREFIX):].rpartition("-")
+        return datetime.strptime(stamp, FILE_TIME_FORMAT).timestamp() + int(millis) / 1000
+    except ValueError:
+        return None
+
+
+def transcript_dir() -> Path:
+    """Directory configured by TRANSCRIPT["dir"] (relative paths are under kitsu/)."""
+    directory = Path(Config.get("TRANSCRIPT", {}, warn=False).get("dir", DEFAULT_DIR))
+    return directory if directory.is_absolute() else KITSU_DIR / directory
+
+
+def transcript_files(directory: Optional[Path] = None) -> list[Path]:
+    """Transcript files, oldest first."""
+    directory = Path(directory or transcript_dir())
+    if not directory.exists():
+        return []
+    return sorted(directory.glob(f"{FILE_PREFIX}*.jsonl"))
+
+
+def read_transcripts(
+    directory: Optional[Path] = None, since: Optional[float] = None, until: Optional[float] = None
+) -> Iterator[dict]:
+    """Lazily yield transcript records with since <= ts < until, oldest first."""
+    files = transcript_files(directory)
+    for i, path in enumerate(files):
+        start = _file_start(path)
+        if until is not None and start is not None and start >= until:
+            return
+        next_start = _file_start(files[i + 1]) if i + 1 < len(files) else None
+        if since is not None and next_start is not None and next_start <= since:
+            continue  # every record in this file predates the next file
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn last line after a crash
+                ts = record.get("ts", 0.0)
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts >= until:
+                    return
+                yield record
+
+
+def _resolve(value: Any) -> Any:
+    """Wait (on the writer thread) for Future-valued metadata; unresolved values become None."""
+    if isinstance(value, Future):
+        try:
+            return value.result(timeout=FUTURE_TIMEOUT_S)
+        except Exception:
+            return None
+    if isinstance(value, dict):
+        return {k: _resolve(v) for k, v in value.items()}
+    return value
+
+
+class TranscriptWriter:
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_age_s: float = 24 * 3600,
+        queue_size: int = 1024,
+    ):
+        self.directory = Path(directory or DEFAULT_DIR)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._file_opened = 0.0
+        self._file_bytes = 0
+        self._last_fsync = 0.0
+        self._dirty = False
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict) -> None:
+        """Queue a record. Never blocks; drops it if the writer has fallen far behind."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"[Transcript] Writer queue full, {self.dropped} records dropped so far")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued, fsync and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join(timeout)
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        path = self.directory / _file_name(now)
+        while path.exists():  # rotated twice within a millisecond
+            now += 0.001
+            path = self.directory / _file_name(now)
+        self._file = open(path, "ab")
+        self._file_opened = now
+        self._file_bytes = self._file.tell()
+        logger.debug(f"[Transcript] Writing to {path}")
+
+    def _sync(self) -> None:
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _encode(self, record: dict) -> bytes:
+        record = _resolve(record)
+        if record.get("lang") is None and record.get("response"):
+            from ai.text_utils.language import detect_language
+
+            record["lang"] = detect_language(record["response"])
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+    def _append(self, line: bytes) -> None:
+        if self._file is not None and (
+            self._file_bytes >= self.max_bytes or time.time() - self._file_opened >= self.max_age_s
+        ):
+            self._close_file()
+        if self._file is None:
+            self._open()
+        self._file.write(line)
+        self._file_bytes += len(line)
+        self._dirty = True
+        self.written += 1
+
+    def _run(self) -> None:
+        while True:
+            timeout = max(FSYNC_INTERVAL_S - (time.monotonic() - self._last_fsync), 0.05) if self._dirty else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._sync()
+                continue
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = False
+            for record in batch:
+                if record is _CLOSE:
+                    closing = True
+                    continue
+                try:
+                    self._append(self._encode(record))
+                except Exception as e:
+                    logger.error(f"[Transcript] Could not write record: {e}")
+            if self._file is not None:
+                self._file.flush()  # hand the batch to the OS; fsync is batched below
+            if closing:
+                self._close_file()
+                return
+            if time.monotonic() - self._last_fsync >= FSYNC_INTERVAL_S:
+                self._sync()
+
+
+_writer: Optional[TranscriptWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_transcript_writer() -> TranscriptWriter:
+    """Return the shared transcript writer configured by TRANSCRIPT, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            settings = Config.get("TRANSCRIPT", {}, warn=False)
+            _writer = TranscriptWriter(
+                transcript_dir(),
+                max_bytes=int(settings.get("max_bytes", 16 * 1024 * 1024)),
+                max_age_s=float(settings.get("max_age_hours", 24)) * 3600,
+                queue_size=int(settings.get("queue_size", 1024)),
+            )
+            atexit.register(_writer.close)
+        return _writer